@@ -112,6 +112,15 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Médias stockés par empreinte du contenu, avec comptage de références (dédoublonnage)
+STORAGES = {
+    'default': {'BACKEND': 'accounts.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Envois d'images radiologiques par morceaux en cours (hors MEDIA_ROOT : jamais servis tels quels)
+RADIOLOGY_UPLOAD_DIR = os.path.join(BASE_DIR, 'radiology_uploads')
+
 
 
 # Password validation
@@ -162,7 +171,7 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',  # Use JWT for authentication
+        'accounts.authentication.ClaimsJWTAuthentication',  # JWT, request user built from token claims
     ),
     
 }
@@ -176,6 +185,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),   
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.BlacklistCheckedTokenRefreshSerializer',
 }
 
 
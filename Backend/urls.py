@@ -21,7 +21,7 @@ from rest_framework import routers
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from django.conf import settings
-from django.conf.urls.static import static
+from dpi.views import MediaFileView
 
 
 # Schema view for Swagger
@@ -51,6 +51,9 @@ urlpatterns = [
     path('examens/', include('examens.urls')),
     path('traitements/', include('traitements.urls')),
 
+    # Fichiers médias (images radiologiques, QR codes) : contrôle d'accès par dossier, Range et ETag
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", MediaFileView.as_view(), name='media-file'),
+
 
 
 
@@ -60,5 +63,3 @@ urlpatterns = [
 
 
 ]
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
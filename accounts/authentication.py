@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+
+from .models import User
+from .permissions import TECHNICIAN_ROLE_CLAIM
+
+
+ROLE_CLAIM = 'role'
+PROFILE_ID_CLAIM = 'profile_id'
+DOSSIER_ID_CLAIM = 'dossier_id'
+
+# Champs du profil renvoyés à la connexion, par rôle : clé de la réponse -> champ joint
+LOGIN_PROFILE_FIELDS = {
+    'technicien': {
+        'technician_role': 'technician__role',
+        'technicien_id': 'technician__id',
+        'nom': 'technician__nom',
+        'prenom': 'technician__prenom',
+    },
+    'patient': {
+        'dossier_id': 'patient__dossier__id',
+        'patient_id': 'patient__id',
+        'nom': 'patient__nom',
+        'prenom': 'patient__prenom',
+    },
+    'admin': {
+        'admin_id': 'admin__id',
+        'nom': 'admin__nom',
+        'prenom': 'admin__prenom',
+    },
+    'administratif': {
+        'administratif_id': 'administratif__id',
+        'nom': 'administratif__nom',
+        'prenom': 'administratif__prenom',
+    },
+}
+
+# Clé de l'id du profil dans LOGIN_PROFILE_FIELDS, par rôle
+PROFILE_ID_KEYS = {
+    'technicien': 'technicien_id',
+    'patient': 'patient_id',
+    'admin': 'admin_id',
+    'administratif': 'administratif_id',
+}
+
+
+def resolve_login_profile(user):
+    """
+    Renvoie le profil de l'utilisateur (ids, nom, prénom...) selon son rôle.
+
+    Une seule requête, jointe uniquement sur la table de profil du rôle ; le
+    résultat est mémorisé sur l'utilisateur, partagé entre les claims du jeton
+    et la réponse de LoginView.
+    """
+    profile = getattr(user, '_login_profile', None)
+    if profile is not None:
+        return profile
+
+    fields = LOGIN_PROFILE_FIELDS.get(user.role, {})
+    row = {}
+    if fields:
+        row = User.objects.filter(pk=user.pk).values(*fields.values()).first() or {}
+    profile = {key: row.get(field) for key, field in fields.items()}
+
+    user._login_profile = profile
+    return profile
+
+
+def resolve_login_claims(user):
+    """
+    Renvoie les claims de profil à inscrire dans le jeton d'un utilisateur :
+    rôle 'Technician', id du profil et id du dossier (patients).
+    """
+    profile = resolve_login_profile(user)
+    return {
+        TECHNICIAN_ROLE_CLAIM: profile.get('technician_role'),
+        PROFILE_ID_CLAIM: profile.get(PROFILE_ID_KEYS.get(user.role)),
+        DOSSIER_ID_CLAIM: profile.get('dossier_id'),
+    }
+
+
+def resolve_dossier_id(user):
+    """
+    Id du dossier d'un utilisateur patient (None pour les autres rôles) : lu
+    dans le jeton quand la requête est authentifiée par ClaimsJWTAuthentication,
+    sinon chargé une fois par resolve_login_profile.
+    """
+    if user.role != 'patient':
+        return None
+    dossier_id = getattr(user, 'dossier_id', None)
+    if dossier_id is None:
+        dossier_id = resolve_login_profile(user).get('dossier_id')
+    return dossier_id
+
+
+class UserPrincipalCache:
+    """
+    Cache LRU en mémoire (par processus) de l'état des utilisateurs authentifiés.
+
+    Les clés sont les ids utilisateur et les valeurs le triplet
+    (role, is_active, rôle 'Technician'). Une entrée est invalidée par les
+    signaux post_save / post_delete de User et de Technician
+    (voir accounts/signals.py) et à la déconnexion ; le TTL borne la durée de
+    vie d'une entrée modifiée depuis un autre worker.
+    """
+
+    def __init__(self, maxsize=8192, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return value
+
+    def set(self, user_id, role, is_active, technician_role):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = ((role, is_active, technician_role), time.monotonic() + self.ttl)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_principal_cache = UserPrincipalCache()
+
+
+def get_user_state(user_id):
+    """
+    Renvoie (role, is_active, rôle 'Technician') de l'utilisateur, depuis le
+    cache ou en une seule requête (jointure sur Technician) ; None si
+    l'utilisateur n'existe pas.
+    """
+    state = user_principal_cache.get(user_id)
+    if state is not None:
+        return state
+
+    state = User.objects.filter(pk=user_id).values_list('role', 'is_active', 'technician__role').first()
+    if state is not None:
+        user_principal_cache.set(user_id, *state)
+    return state
+
+
+class TokenPrincipal(TokenUser):
+    """
+    Utilisateur de requête construit à partir des claims du jeton, sans charger
+    l'instance User.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token[ROLE_CLAIM]
+
+    @cached_property
+    def profile_id(self):
+        return self.token.get(PROFILE_ID_CLAIM)
+
+    @cached_property
+    def dossier_id(self):
+        return self.token.get(DOSSIER_ID_CLAIM)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Authentification JWT qui renvoie un TokenPrincipal quand le jeton porte les
+    claims de profil. Les jetons émis avant l'ajout de ces claims sont encore
+    résolus par la base de données.
+
+    L'existence, l'activité, le rôle de l'utilisateur et son rôle 'Technician'
+    sont vérifiés à partir de user_principal_cache : la table `accounts_user` n'est lue qu'en cas
+    d'absence dans le cache.
+    """
+
+    def get_user(self, validated_token):
+        if ROLE_CLAIM not in validated_token or TECHNICIAN_ROLE_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        principal = TokenPrincipal(validated_token)
+        state = get_user_state(principal.pk)
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        role, is_active, technician_role = state
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if role != principal.role or technician_role != validated_token[TECHNICIAN_ROLE_CLAIM]:
+            # Rôle modifié depuis l'émission du jeton : ses claims ne sont plus fiables
+            raise AuthenticationFailed("User role has changed, please log in again.", code="role_changed")
+        return principal
@@ -0,0 +1,150 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class BloomFilter:
+    """
+    Filtre de Bloom sur un bytearray : « absent » est certain, « présent »
+    n'est que probable (taux de faux positifs ~ `error_rate` à `capacity` éléments).
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class JTIBlacklistFilter:
+    """
+    Filtre de Bloom (par processus) des JTI présents dans token_blacklist.
+
+    Il est construit au premier contrôle à partir des jetons blacklistés non
+    expirés, complété à chaque déconnexion, et resynchronisé toutes les
+    `sync_interval` secondes avec les lignes ajoutées par d'autres workers, en
+    une requête sur l'id. La base n'est interrogée pour un jeton donné que si
+    le filtre répond « probablement présent ».
+
+    Les id auto-incrémentés peuvent être validés dans le désordre (MySQL) : la
+    synchronisation relit donc toutes les lignes blacklistées depuis moins de
+    `overlap` secondes, pas seulement celles au-delà du plus grand id vu. Le
+    filtre est de plus reconstruit entièrement toutes les `rebuild_interval`
+    secondes.
+    """
+
+    def __init__(self, sync_interval=10, overlap=120, rebuild_interval=3600, min_capacity=10000, error_rate=0.001):
+        self.sync_interval = sync_interval
+        self.overlap = overlap
+        self.rebuild_interval = rebuild_interval
+        self.min_capacity = min_capacity
+        self.error_rate = error_rate
+        self._filter = None
+        self._watermark = 0  # plus grand id blacklisté depuis plus de `overlap` secondes
+        self._recent_ids = set()  # id au-delà du filigrane déjà ajoutés au filtre
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def rebuild(self):
+        rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list('id', 'token__jti', 'blacklisted_at')
+        bloom = BloomFilter(max(self.min_capacity, rows.count() * 2), self.error_rate)
+        settled_before = timezone.now() - timedelta(seconds=self.overlap)
+        watermark, recent = 0, []
+        for row_id, jti, blacklisted_at in rows.iterator(chunk_size=2000):
+            bloom.add(jti)
+            if blacklisted_at < settled_before:
+                watermark = max(watermark, row_id)
+            else:
+                recent.append(row_id)
+        with self._lock:
+            self._filter = bloom
+            self._watermark = watermark
+            self._recent_ids = {row_id for row_id in recent if row_id > watermark}
+            self._built_at = self._synced_at = time.monotonic()
+
+    def add(self, jti):
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def might_contain(self, jti):
+        with self._lock:
+            bloom = self._filter
+            now = time.monotonic()
+            stale = bloom is None or bloom.count > bloom.capacity or now - self._built_at > self.rebuild_interval
+            due = now - self._synced_at > self.sync_interval
+        if stale:
+            self.rebuild()
+        elif due:
+            self._sync()
+        with self._lock:
+            return jti in self._filter
+
+    def _sync(self):
+        with self._lock:
+            bloom, watermark = self._filter, self._watermark
+        settled_before = timezone.now() - timedelta(seconds=self.overlap)
+        rows = list(
+            BlacklistedToken.objects.filter(id__gt=watermark).order_by('id').values_list('id', 'token__jti', 'blacklisted_at')
+        )
+        with self._lock:
+            if self._filter is not bloom:  # reconstruit entre-temps
+                return
+            for row_id, jti, blacklisted_at in rows:
+                if row_id not in self._recent_ids:
+                    bloom.add(jti)
+                    self._recent_ids.add(row_id)
+            settled = [row_id for row_id, _, blacklisted_at in rows if blacklisted_at < settled_before]
+            if settled:
+                self._watermark = max(watermark, max(settled))
+                self._recent_ids = {row_id for row_id in self._recent_ids if row_id > self._watermark}
+            self._synced_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._watermark = 0
+            self._recent_ids = set()
+            self._built_at = 0.0
+            self._synced_at = 0.0
+
+
+jti_blacklist_filter = JTIBlacklistFilter()
+
+
+class BloomCheckedRefreshToken(RefreshToken):
+    """
+    RefreshToken dont le contrôle de blacklist passe d'abord par le filtre de Bloom.
+    """
+
+    def check_blacklist(self):
+        if jti_blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        jti_blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
@@ -0,0 +1,20 @@
+import csv
+import io
+
+
+def read_csv_rows(uploaded_file):
+    """
+    Lit un fichier CSV (en-têtes = noms des champs) ligne par ligne.
+    Les cellules vides sont converties en None. Un fichier illisible lève
+    UnicodeDecodeError ou ValueError (csv.Error converti).
+
+    Partagé par les imports en lot (patients, résultats d'examens).
+    """
+    text = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+    try:
+        return [
+            {key: (value if value != '' else None) for key, value in row.items()}
+            for row in csv.DictReader(text)
+        ]
+    except csv.Error as e:
+        raise ValueError(str(e)) from e
@@ -0,0 +1,13 @@
+import django_filters
+
+from .models import Admin
+
+
+class AdminFilter(django_filters.FilterSet):
+    # préfixe plutôt que icontains : pas de LIKE '%...' sur toute la table
+    nom = django_filters.CharFilter(lookup_expr='istartswith')
+    prenom = django_filters.CharFilter(lookup_expr='istartswith')
+
+    class Meta:
+        model = Admin
+        fields = ['nom', 'prenom']
@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.contrib.auth.hashers import make_password
+
+
+# Ce module n'importe aucun modèle : les processus du pool le chargent avant django.setup().
+
+# En dessous de ce nombre de mots de passe, démarrer un pool de processus coûte plus qu'il ne rapporte
+PARALLEL_HASHING_THRESHOLD = 16
+
+# Pools de hachage, un par nombre de processus, créés à la première utilisation et
+# réutilisés d'un lot à l'autre. Les processus sont lancés en 'spawn' : un fork
+# depuis un worker web qui fait tourner des threads (files QR / déclinaisons)
+# peut hériter d'un verrou tenu et se bloquer.
+_hashing_pools = {}
+_hashing_pools_lock = threading.Lock()
+
+
+def _init_hashing_worker():
+    import django
+    django.setup()
+
+
+def _hashing_pool(processes):
+    with _hashing_pools_lock:
+        pool = _hashing_pools.get(processes)
+        if pool is None:
+            pool = _hashing_pools[processes] = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_hashing_worker,
+            )
+        return pool
+
+
+def hash_passwords(passwords, processes=None):
+    """
+    Hache une liste de mots de passe (PBKDF2) en parallèle sur tous les cœurs.
+    L'ordre du résultat est celui de l'entrée ; None donne un mot de passe inutilisable.
+    """
+    passwords = list(passwords)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(passwords) < PARALLEL_HASHING_THRESHOLD:
+        return [make_password(password) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (processes * 4))
+    try:
+        return list(_hashing_pool(processes).map(make_password, passwords, chunksize=chunksize))
+    except BrokenProcessPool:
+        # Un processus du pool est mort : pool abandonné (recréé au prochain appel), hachage ici
+        with _hashing_pools_lock:
+            _hashing_pools.pop(processes, None)
+        return [make_password(password) for password in passwords]
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.media_gc import MEDIA_DIRECTORIES, dispose_orphans, orphaned_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime (ou met en quarantaine) les fichiers de media/ que plus aucune ligne ne référence "
+        "(images radiologiques, déclinaisons, QR codes), par lots et en mémoire constante."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Nombre de fichiers traités par lot.")
+        parser.add_argument('--dry-run', action='store_true', help="Liste les fichiers orphelins sans rien modifier.")
+        parser.add_argument('--quarantine', help="Déplace les orphelins dans ce répertoire au lieu de les supprimer.")
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help="Ignore les fichiers modifiés depuis moins de N secondes (envois en cours).",
+        )
+        parser.add_argument(
+            '--directory', action='append', choices=MEDIA_DIRECTORIES, dest='directories',
+            help="Limite le parcours à ce répertoire de MEDIA_ROOT (répétable).",
+        )
+
+    def handle(self, *args, **options):
+        root = settings.MEDIA_ROOT
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        directories = options['directories'] or MEDIA_DIRECTORIES
+
+        count = 0
+        size = 0
+        batch = []
+        for name, entry in orphaned_files(root, min_age=options['min_age'], directories=directories):
+            if dry_run:
+                count += 1
+                size += entry.stat(follow_symlinks=False).st_size
+                self.stdout.write(name)
+                continue
+            batch.append((name, entry.stat(follow_symlinks=False).st_size))
+            if len(batch) >= batch_size:
+                count, size = self._dispose(root, batch, options['quarantine'], count, size)
+                batch = []
+        if batch:
+            count, size = self._dispose(root, batch, options['quarantine'], count, size)
+
+        action = "orphelin(s) trouvé(s)" if dry_run else ("mis en quarantaine" if options['quarantine'] else "supprimé(s)")
+        self.stdout.write(self.style.SUCCESS(f"{count} fichier(s) {action}, {size} octet(s)."))
+
+    def _dispose(self, root, batch, quarantine, count, size):
+        sizes = dict(batch)
+        disposed = dispose_orphans(root, list(sizes), quarantine=quarantine)
+        return count + len(disposed), size + sum(sizes[name] for name in disposed)
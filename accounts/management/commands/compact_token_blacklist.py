@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Supprime par lots les jetons expirés (OutstandingToken et BlacklistedToken associés)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de jetons supprimés par lot.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        total = 0
+        while True:
+            ids = list(
+                OutstandingToken.objects
+                .filter(expires_at__lt=now)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # Un jeton expiré ne peut plus être présenté : sa ligne de blacklist est inutile
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            total += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"{total} jeton(s) expiré(s) supprimé(s)."))
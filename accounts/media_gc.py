@@ -0,0 +1,127 @@
+import heapq
+import os
+import shutil
+import time
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Collate
+
+from .models import StoredFile
+from .storage import tracked_file_fields
+
+
+# Collation binaire par moteur : l'ordre SQL est alors celui des chaînes Python
+# (ordre des points de code), indispensable pour fusionner avec le parcours du disque
+BINARY_COLLATIONS = {
+    'mysql': 'utf8mb4_bin',
+    'postgresql': 'C',
+    'sqlite': 'BINARY',
+}
+
+# Répertoires de MEDIA_ROOT dont les fichiers appartiennent à des lignes de la base
+MEDIA_DIRECTORIES = ['qr_code', 'radiology_images']
+
+
+def walk_media(root, directory):
+    """
+    Parcourt récursivement `root/directory` avec os.scandir et produit les
+    chemins relatifs à `root` (séparateur '/') dans l'ordre croissant des
+    chaînes, en ne gardant en mémoire qu'un répertoire à la fois par niveau.
+
+    Trier un sous-répertoire sous la clé 'nom/' place son contenu exactement là
+    où un tri global des chemins complets le mettrait.
+    """
+    path = os.path.join(root, directory)
+    try:
+        with os.scandir(path) as scanner:
+            entries = sorted(
+                (entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name, entry)
+                for entry in scanner
+            )
+    except FileNotFoundError:
+        return
+    for key, entry in entries:
+        relative = f"{directory}/{entry.name}"
+        if key.endswith('/'):
+            yield from walk_media(root, relative)
+        elif entry.is_file(follow_symlinks=False):
+            yield relative, entry
+
+
+def referenced_names(chunk_size=2000):
+    """
+    Noms de fichiers référencés en base, triés et sans doublons : une requête
+    par champ fichier suivi, lue par blocs (curseur serveur quand le moteur le
+    permet), puis fusion des flux triés.
+    """
+    collation = BINARY_COLLATIONS.get(connection.vendor)
+    streams = []
+    for model, field in tracked_file_fields():
+        key = Collate(field, collation) if collation else field
+        streams.append(
+            model.objects
+            .exclude(Q(**{field: ''}) | Q(**{f'{field}__isnull': True}))
+            .annotate(sort_key=key)
+            .order_by('sort_key')
+            .values_list(field, flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+    previous = None
+    for name in heapq.merge(*streams):
+        if name != previous:
+            yield name
+            previous = name
+
+
+def orphaned_files(root, min_age=0, directories=MEDIA_DIRECTORIES, references=None):
+    """
+    Fusion de deux flux triés (fichiers sur le disque, noms référencés en base)
+    produisant les (chemin relatif, DirEntry) des fichiers que rien ne
+    référence. Les fichiers modifiés depuis moins de `min_age` secondes sont
+    ignorés : leur ligne n'est peut-être pas encore validée.
+    """
+    references = referenced_names() if references is None else references
+    files = heapq.merge(*(walk_media(root, directory) for directory in sorted(directories)), key=lambda item: item[0])
+    cutoff = time.time() - min_age
+    reference = next(references, None)
+    for name, entry in files:
+        while reference is not None and reference < name:
+            reference = next(references, None)
+        if reference == name:
+            continue
+        if entry.stat(follow_symlinks=False).st_mtime <= cutoff:
+            yield name, entry
+
+
+def still_referenced(names):
+    """
+    Parmi `names`, ceux qui sont référencés au moment du contrôle (un fichier
+    a pu être réutilisé après le passage du flux de la base).
+    """
+    found = set()
+    for model, field in tracked_file_fields():
+        found.update(model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True))
+    return found
+
+
+def dispose_orphans(root, names, quarantine=None):
+    """
+    Supprime (ou déplace sous `quarantine`, en conservant l'arborescence) un
+    lot de fichiers orphelins et les lignes StoredFile correspondantes.
+    Renvoie les noms effectivement traités.
+    """
+    names = [name for name in names if name not in still_referenced(names)]
+    for name in names:
+        path = os.path.join(root, name)
+        if quarantine:
+            target = os.path.join(quarantine, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(path, target)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    StoredFile.objects.filter(name__in=names).delete()
+    return names
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_merge_20250101_1616'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examenbiologique',
+            index=models.Index(fields=['date', 'id'], name='examen_bio_date_id_idx'),
+        ),
+    ]
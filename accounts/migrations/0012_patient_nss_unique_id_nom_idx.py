@@ -0,0 +1,45 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_nss(apps, schema_editor):
+    """
+    Refuse la migration tant que des patients partagent un NSS : la contrainte
+    d'unicité échouerait sans dire lesquels. Les doublons désignent des dossiers
+    médicaux à fusionner à la main, ils ne sont pas supprimés ici.
+    """
+    Patient = apps.get_model('accounts', 'Patient')
+    duplicates = list(
+        Patient.objects.values('nss').annotate(count=Count('id')).filter(count__gt=1).values_list('nss', flat=True)[:20]
+    )
+    if duplicates:
+        lines = [
+            f"  {nss!r}: patients {sorted(Patient.objects.filter(nss=nss).values_list('id', flat=True))}"
+            for nss in duplicates
+        ]
+        raise RuntimeError(
+            "Cannot make Patient.nss unique, these NSS values are shared by several patients "
+            "(first 20 shown). Merge or correct them, then run the migration again:\n" + "\n".join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_examenbiologique_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_nss, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='patient',
+            name='nss',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['id', 'nom'], name='patient_id_nom_idx'),
+        ),
+    ]
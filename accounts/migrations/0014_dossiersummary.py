@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_patient_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DossierSummary',
+            fields=[
+                ('dossier', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='accounts.dossierpatient')),
+                ('consultations_count', models.PositiveIntegerField(default=0)),
+                ('last_consultation_date', models.DateField(blank=True, null=True)),
+                ('examens_biologiques_count', models.PositiveIntegerField(default=0)),
+                ('last_examen_biologique_date', models.DateField(blank=True, null=True)),
+                ('examens_radiologiques_count', models.PositiveIntegerField(default=0)),
+                ('last_examen_radiologique_date', models.DateField(blank=True, null=True)),
+                ('pending_ordonnances_count', models.PositiveIntegerField(default=0)),
+                ('radiology_images_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
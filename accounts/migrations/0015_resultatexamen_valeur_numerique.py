@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_dossiersummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultatexamen',
+            name='valeur_numerique',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='resultatexamen',
+            index=models.Index(fields=['parametre', 'valeur_numerique'], name='resultat_param_valeur_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:18
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_resultatexamen_valeur_numerique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='radiologyimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='radiology_images/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='radiologyimage',
+            name='web_image',
+            field=models.ImageField(blank=True, null=True, upload_to='radiology_images/web/'),
+        ),
+        migrations.CreateModel(
+            name='RadiologyUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('titre', models.TextField(blank=True, null=True)),
+                ('size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('examen_radiologique', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='accounts.examenradiologique')),
+                ('radiologue', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='radiology_uploads', to='accounts.technician')),
+            ],
+        ),
+    ]
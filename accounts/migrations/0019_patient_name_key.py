@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientNameKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=8)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_keys', to='accounts.patient')),
+            ],
+            options={
+                'unique_together': {('key', 'patient')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_patient_name_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(fields=['term', '-frequency'], name='posting_term_frequency_idx'),
+        ),
+    ]
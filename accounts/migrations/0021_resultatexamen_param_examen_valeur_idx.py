@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_search_posting_term_frequency'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resultatexamen',
+            index=models.Index(fields=['parametre', 'examen_biologique', 'valeur_numerique'], name='resultat_param_examen_val_idx'),
+        ),
+    ]
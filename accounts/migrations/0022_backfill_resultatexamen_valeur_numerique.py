@@ -0,0 +1,39 @@
+from django.db import migrations
+
+from accounts.models import parse_numeric_value
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_valeur_numerique(apps, schema_editor):
+    """
+    Renseigne valeur_numerique pour les résultats enregistrés avant 0015 (sans
+    quoi les graphiques de GraphiquePatientView restent vides) et recalcule les
+    bornes ('< 5') désormais stockées à NULL. Par lots, dans l'ordre des id.
+    """
+    ResultatExamen = apps.get_model('accounts', 'ResultatExamen')
+    last_id = 0
+    while True:
+        batch = list(ResultatExamen.objects.filter(id__gt=last_id).order_by('id').only('id', 'valeur', 'valeur_numerique')[:BATCH_SIZE])
+        if not batch:
+            break
+        changed = []
+        for resultat in batch:
+            value = parse_numeric_value(resultat.valeur)
+            if value != resultat.valeur_numerique:
+                resultat.valeur_numerique = value
+                changed.append(resultat)
+        ResultatExamen.objects.bulk_update(changed, ['valeur_numerique'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_resultatexamen_param_examen_valeur_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_valeur_numerique, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_backfill_resultatexamen_valeur_numerique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificat',
+            index=models.Index(fields=['date', 'id'], name='certificat_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examenradiologique',
+            index=models.Index(fields=['date', 'id'], name='examen_radio_date_id_idx'),
+        ),
+    ]
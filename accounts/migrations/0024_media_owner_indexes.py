@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_certificat_examenradiologique_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dossierpatient',
+            index=models.Index(fields=['qr'], name='dossier_qr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='radiologyimage',
+            index=models.Index(fields=['image'], name='radio_image_image_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='radiologyimage',
+            index=models.Index(fields=['thumbnail'], name='radio_image_thumbnail_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='radiologyimage',
+            index=models.Index(fields=['web_image'], name='radio_image_web_idx'),
+        ),
+    ]
@@ -7,6 +7,12 @@ from django.db import models
 
 from django.contrib.auth.models import BaseUserManager
 
+import re
+import uuid
+
+from .hashing import hash_passwords
+
+
 class CustomUserManager(BaseUserManager):
     """
     Custom user manager that supports user creation with only email, password, and role.
@@ -31,6 +37,31 @@ class CustomUserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def build_users(self, users, processes=None):
+        """
+        Construit (sans les enregistrer) des utilisateurs à partir de dictionnaires
+        {email, password, **champs}, les mots de passe étant hachés en parallèle.
+        """
+        users = [dict(data) for data in users]
+        for data in users:
+            if not data.get('email'):
+                raise ValueError("The Email field must be set")
+
+        hashed = hash_passwords([data.pop('password', None) for data in users], processes=processes)
+        built = []
+        for data, password in zip(users, hashed):
+            email = self.normalize_email(data.pop('email'))
+            user = self.model(email=email, **data)
+            user.password = password
+            built.append(user)
+        return built
+
+    def create_users_bulk(self, users, batch_size=500, processes=None):
+        """
+        Crée un lot d'utilisateurs : hachage parallèle puis insertion par bulk_create.
+        """
+        return self.bulk_create(self.build_users(users, processes=processes), batch_size=batch_size)
+
 
 class User(AbstractUser):
     username = None  # Remove the default username field
@@ -118,7 +149,13 @@ class Patient(models.Model):
     medecin_traitant = models.ForeignKey(Technician, on_delete=models.SET_NULL, null=True, related_name='patients')
     personne_a_contacter = models.CharField(max_length=100)
     
-    nss = models.CharField(max_length=100) 
+    nss = models.CharField(max_length=100, unique=True)  # index unique : recherche par NSS
+    updated_at = models.DateTimeField(auto_now=True)  # Last-Modified du QR code
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id', 'nom'], name='patient_id_nom_idx'),
+        ]
 
 
 
@@ -134,6 +171,12 @@ class DossierPatient(models.Model):
     patient = models.OneToOneField(Patient, on_delete=models.CASCADE, related_name='dossier')
     qr = models.ImageField(upload_to='qr_code/',blank=True, null=True)  # QR 
 
+    class Meta:
+        # Dossier propriétaire d'un QR code servi par /media (dpi/media.py)
+        indexes = [
+            models.Index(fields=['qr'], name='dossier_qr_idx'),
+        ]
+
     
 # SoinInfermier model
 class SoinInfermier(models.Model):
@@ -192,6 +235,12 @@ class Certificat(models.Model):
     contenu = models.TextField()
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='certificats')
 
+    class Meta:
+        # Index composite pour la pagination keyset (date, id)
+        indexes = [
+            models.Index(fields=['date', 'id'], name='certificat_date_id_idx'),
+        ]
+
 
 class ExamenRadiologique(models.Model):
     date = models.DateField()
@@ -202,6 +251,12 @@ class ExamenRadiologique(models.Model):
     description = models.TextField(blank=True, null=True)
     dossier_patient = models.ForeignKey(DossierPatient, on_delete=models.CASCADE, related_name='examens_radiologiques')
 
+    class Meta:
+        # Index composite pour la pagination keyset (date, id)
+        indexes = [
+            models.Index(fields=['date', 'id'], name='examen_radio_date_id_idx'),
+        ]
+
 class RadiologyImage(models.Model):
     """
     Modèle pour stocker les images associées à un examen radiologique.
@@ -215,6 +270,34 @@ class RadiologyImage(models.Model):
     image = models.ImageField(upload_to='radiology_images/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     titre = models.TextField(blank=True, null=True)
+    # déclinaisons JPEG générées en arrière-plan (examens/renditions.py), vides tant qu'elles ne sont pas prêtes
+    thumbnail = models.ImageField(upload_to='radiology_images/thumbnails/', blank=True, null=True)
+    web_image = models.ImageField(upload_to='radiology_images/web/', blank=True, null=True)
+
+    class Meta:
+        # Examen propriétaire d'un fichier servi par /media (dpi/media.py) : un index par colonne
+        indexes = [
+            models.Index(fields=['image'], name='radio_image_image_idx'),
+            models.Index(fields=['thumbnail'], name='radio_image_thumbnail_idx'),
+            models.Index(fields=['web_image'], name='radio_image_web_idx'),
+        ]
+
+
+class RadiologyUpload(models.Model):
+    """
+    Envoi par morceaux (reprise possible) d'une image radiologique volumineuse.
+    Les octets reçus sont ajoutés à un fichier temporaire (examens/uploads.py) ;
+    `offset` est le nombre d'octets déjà enregistrés.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    examen_radiologique = models.ForeignKey('ExamenRadiologique', on_delete=models.CASCADE, related_name='uploads')
+    radiologue = models.ForeignKey(Technician, on_delete=models.SET_NULL, related_name='radiology_uploads', null=True)
+    filename = models.CharField(max_length=255)
+    titre = models.TextField(blank=True, null=True)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
 class ExamenBiologique(models.Model):
     date = models.DateField()
@@ -224,11 +307,35 @@ class ExamenBiologique(models.Model):
     description = models.TextField(blank=True, null=True)
     dossier_patient = models.ForeignKey(DossierPatient, on_delete=models.CASCADE, related_name='examens_biologiques')
 
+    class Meta:
+        # Index composite pour la pagination keyset (date, id)
+        indexes = [
+            models.Index(fields=['date', 'id'], name='examen_bio_date_id_idx'),
+        ]
+
+
+_NUMERIC_VALUE = re.compile(r'[-+]?\d+(?:[.,]\d+)?')
+_CENSORED_VALUE = re.compile(r'\s*(?:[<>≤≥]|inf|sup)', re.IGNORECASE)
+
+
+def parse_numeric_value(valeur):
+    """
+    Extrait la valeur numérique d'un résultat ('1,2', '12 mg') ; None si le
+    résultat n'est pas numérique ('positif', '', None) ou n'est qu'une borne
+    ('< 5', '> 200') : 5.0 fausserait les filtres par plage (valeur_lt, valeur_gt).
+    """
+    if _CENSORED_VALUE.match(valeur or ''):
+        return None
+    match = _NUMERIC_VALUE.search(valeur or '')
+    return float(match.group().replace(',', '.')) if match else None
+
 
 # ResultatExamen model
 class ResultatExamen(models.Model):
     parametre = models.CharField(max_length=100)
     valeur = models.CharField(max_length=100)
+    # valeur analysée à l'écriture (voir save), pour les filtres numériques en SQL
+    valeur_numerique = models.FloatField(blank=True, null=True, editable=False)
     unite = models.CharField(max_length=50)
     commentaire = models.TextField(blank=True, null=True)
 
@@ -236,8 +343,90 @@ class ResultatExamen(models.Model):
     
     class Meta:
         unique_together = ('parametre', 'examen_biologique')
+        indexes = [
+            # Requêtes par plage de valeurs sur un paramètre (ex. glycémie > 1.26)
+            models.Index(fields=['parametre', 'valeur_numerique'], name='resultat_param_valeur_idx'),
+            # Valeur d'un paramètre pour des examens donnés (graphiques, alertes) lue dans l'index seul
+            models.Index(fields=['parametre', 'examen_biologique', 'valeur_numerique'], name='resultat_param_examen_val_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.valeur_numerique = parse_numeric_value(self.valeur)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'valeur' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'valeur_numerique'}
+        super().save(*args, **kwargs)
+
+
+# DossierSummary model : compteurs et dernières dates d'un dossier, tenus à jour par
+# les signaux de dpi/signals.py (lecture en O(1) pour les tableaux de bord)
+class DossierSummary(models.Model):
+    dossier = models.OneToOneField(DossierPatient, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    consultations_count = models.PositiveIntegerField(default=0)
+    last_consultation_date = models.DateField(blank=True, null=True)
+    examens_biologiques_count = models.PositiveIntegerField(default=0)
+    last_examen_biologique_date = models.DateField(blank=True, null=True)
+    examens_radiologiques_count = models.PositiveIntegerField(default=0)
+    last_examen_radiologique_date = models.DateField(blank=True, null=True)
+    pending_ordonnances_count = models.PositiveIntegerField(default=0)
+    radiology_images_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+# StoredFile model : fichiers du stockage adressé par contenu (accounts/storage.py),
+# un fichier physique par contenu et le nombre de champs qui y font référence
+class StoredFile(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+# Index plein texte des textes cliniques (dpi/search.py) : un document par objet
+# indexé (résumé, examen radiologique, soin infirmier), tenu à jour par les signaux
+class SearchDocument(models.Model):
+    KIND_CHOICES = [
+        ('resume', 'Resume'),
+        ('examen_radiologique', 'Examen radiologique'),
+        ('soin_infirmier', 'Soin infirmier'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    dossier = models.ForeignKey(DossierPatient, on_delete=models.CASCADE, related_name='search_documents', null=True, blank=True)
+    date = models.DateField(blank=True, null=True)
+    length = models.PositiveIntegerField(default=0)  # nombre de termes indexés (normalisation BM25)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+
+# Liste inversée : un terme (forme normalisée) par document et son nombre d'occurrences
+class SearchPosting(models.Model):
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('term', 'document')
+        indexes = [
+            # Meilleurs documents d'un terme sans trier toute sa liste (recherche plafonnée)
+            models.Index(fields=['term', '-frequency'], name='posting_term_frequency_idx'),
+        ]
+
+
+
+# Index de recherche approchée des noms de patients (dpi/names.py) : trigrammes des
+# mots de nom / prenom et clés phonétiques ('#' + clé), tenus à jour par les signaux
+class PatientNameKey(models.Model):
+    key = models.CharField(max_length=8)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='name_keys')
+
+    class Meta:
+        unique_together = ('key', 'patient')
+
+
 
-    
 
 
     
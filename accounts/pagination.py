@@ -0,0 +1,144 @@
+import base64
+from datetime import date as date_type
+
+from django.db.models import Q
+from drf_yasg import openapi
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPaginator:
+    """
+    Pagination par curseur (keyset) sur le couple (date, id), ou sur l'id seul
+    avec date_field=None pour les modèles sans date.
+
+    Les résultats sont triés du plus récent au plus ancien ; le curseur encode
+    la date et l'id du dernier élément renvoyé, de sorte que la page suivante
+    se résume à un simple filtre indexé, quelle que soit la profondeur.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    default_page_size = 50
+    max_page_size = 500
+
+    def __init__(self, date_field='date'):
+        self.date_field = date_field
+
+    def is_requested(self, request):
+        """
+        Vrai si le client a demandé une réponse paginée (curseur ou taille de page).
+        """
+        return (
+            self.cursor_query_param in request.GET
+            or self.page_size_query_param in request.GET
+        )
+
+    def get_page_size(self, request):
+        raw = request.GET.get(self.page_size_query_param)
+        if not raw:
+            return self.default_page_size
+        try:
+            page_size = int(raw)
+        except ValueError:
+            raise ValueError("page_size must be an integer.")
+        if page_size < 1:
+            raise ValueError("page_size must be a positive integer.")
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, instance):
+        if self.date_field is None:
+            value = str(instance.id)
+        else:
+            value = f"{getattr(instance, self.date_field).isoformat()}:{instance.id}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            if self.date_field is None:
+                return None, int(value)
+            raw_date, raw_id = value.split(':')
+            return date_type.fromisoformat(raw_date), int(raw_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor.")
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Renvoie la page demandée sous forme de liste (une seule requête SQL).
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        if self.date_field is None:
+            queryset = queryset.order_by('-id')
+        else:
+            queryset = queryset.order_by(f'-{self.date_field}', '-id')
+        cursor = request.GET.get(self.cursor_query_param)
+        if cursor:
+            last_date, last_id = self.decode_cursor(cursor)
+            if self.date_field is None:
+                queryset = queryset.filter(id__lt=last_id)
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.date_field}__lt': last_date})
+                    | Q(**{self.date_field: last_date, 'id__lt': last_id})
+                )
+
+        # Un élément de plus que la taille de page pour savoir s'il reste une suite
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.last_item = page[-1] if page else None
+        return page
+
+    def get_next_link(self):
+        if not self.has_next or self.last_item is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_item))
+
+    def get_paginated_data(self, results):
+        return {
+            'next': self.get_next_link(),
+            'results': results,
+        }
+
+
+# Paramètres de pagination à ajouter aux manual_parameters des vues de liste
+KEYSET_PAGINATION_PARAMETERS = [
+    openapi.Parameter('cursor', openapi.IN_QUERY, description="Cursor returned in 'next' by the previous page.", type=openapi.TYPE_STRING),
+    openapi.Parameter('page_size', openapi.IN_QUERY, description="Number of items per page (default 50, max 500).", type=openapi.TYPE_INTEGER),
+]
+
+
+class PaginatedListMixin:
+    """
+    GET de liste commun : filtres django_filters, puis une page KeysetPaginator
+    (taille plafonnée à max_page_size), sérialisée en {'next', 'results'}.
+
+    La vue déclare `filterset_class` et `list_date_field` (None : tri par id) ;
+    le queryset transmis porte ses select_related / prefetch_related, exécutés
+    sur la seule page retenue.
+    """
+
+    filterset_class = None
+    list_date_field = 'date'
+
+    def list_response(self, request, queryset, serializer_class):
+        if self.filterset_class is not None:
+            filterset = self.filterset_class(request.GET, queryset=queryset, request=request)
+            if not filterset.is_valid():
+                return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+            queryset = filterset.qs
+
+        paginator = KeysetPaginator(date_field=self.list_date_field)
+        try:
+            page = paginator.paginate_queryset(queryset, request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = serializer_class(page, many=True, context={'request': request})
+        return Response(paginator.get_paginated_data(serializer.data), status=status.HTTP_200_OK)
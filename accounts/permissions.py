@@ -0,0 +1,43 @@
+from .models import Technician
+
+
+TECHNICIAN_ROLE_CLAIM = 'technician_role'
+
+def resolve_technician_role(user, token=None, request=None):
+    """
+    Renvoie le rôle 'Technician' de l'utilisateur (ou None s'il n'en a pas).
+
+    Le rôle est lu dans le claim du jeton JWT s'il y figure, sinon chargé par une
+    seule requête. Il est mémorisé sur la requête HTTP (jamais sur l'objet
+    utilisateur, qui peut lui survivre), donc résolu au plus une fois par requête.
+    """
+    if token is not None and TECHNICIAN_ROLE_CLAIM in token:
+        return token[TECHNICIAN_ROLE_CLAIM]
+
+    roles = getattr(request, '_technician_roles', None) if request is not None else None
+    if roles is not None and user.pk in roles:
+        return roles[user.pk]
+
+    role = Technician.objects.filter(user_id=user.pk).values_list('role', flat=True).first()
+    if request is not None:
+        if roles is None:
+            roles = request._technician_roles = {}
+        roles[user.pk] = role
+    return role
+
+
+def has_role(user, token=None, user_roles=None, technician_roles=None, request=None):
+    """
+    Vrai si l'utilisateur a un rôle parmi `user_roles` ou, à défaut, si son
+    modèle 'Technician' a un rôle parmi `technician_roles`.
+    """
+    if user is None or not user.is_authenticated:
+        return False
+
+    if user_roles and user.role in user_roles:
+        return True
+
+    if technician_roles:
+        return resolve_technician_role(user, token, request) in technician_roles
+
+    return False
@@ -0,0 +1,70 @@
+import logging
+import queue
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BatchPipeline:
+    """
+    File traitée par un thread d'arrière-plan, par lots : au plus `batch_size`
+    éléments, ou ce qui est arrivé pendant `batch_wait` secondes. Les pics
+    sont absorbés sans bloquer les workers HTTP.
+
+    Les sous-classes définissent `process_batch` (une liste d'éléments, en
+    général des ids) et `thread_name`. La file est en mémoire : ce qui n'est
+    pas traité avant l'arrêt du processus doit pouvoir être repris autrement
+    (commande de rattrapage).
+    """
+    thread_name = 'batch-pipeline'
+
+    def __init__(self, batch_size=50, batch_wait=0.5):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, item):
+        self._ensure_worker()
+        self._queue.put(item)
+
+    def enqueue_many(self, items):
+        self._ensure_worker()
+        for item in items:
+            self._queue.put(item)
+
+    def process_batch(self, batch):
+        raise NotImplementedError
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self.process_batch(batch)
+            except Exception:
+                logger.exception("%s failed for batch %s", self.thread_name, batch)
+            finally:
+                close_old_connections()
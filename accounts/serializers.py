@@ -12,6 +12,9 @@ from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.tokens import RefreshToken
 from accounts.models import User
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from .authentication import resolve_login_claims
+from .blacklist import BloomCheckedRefreshToken
 
 
 # ****************************************** auth ********************************************************
@@ -22,9 +25,18 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
         token['role'] = user.role  # Add custom claims
+        # Technician role, profile id and dossier id, resolved in one joined query;
+        # accounts.authentication builds the request user from these claims
+        for claim, value in resolve_login_claims(user).items():
+            token[claim] = value
         return token
 
 
+# Refresh serializer whose blacklist check goes through the in-memory bloom filter
+class BlacklistCheckedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = BloomCheckedRefreshToken
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -76,7 +88,7 @@ class LogoutUserSerializer(serializers.Serializer):
 
     def save(self, **kwargs):
         try:
-            token = RefreshToken(self.token)
+            token = BloomCheckedRefreshToken(self.token)
             token.blacklist()  # Blacklist the token (requires blacklisting enabled in SimpleJWT)
         except TokenError:
             raise ValidationError(self.default_error_messages['bad_token'])
@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import user_principal_cache
+from .models import User, Technician
+from .storage import FileReferenceTracker, TRACKED_FILE_MODELS
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_principal(sender, instance, **kwargs):
+    user_principal_cache.invalidate(instance.pk)
+
+
+# Le rôle 'Technician' fait partie de l'état vérifié à chaque requête (claim technician_role)
+@receiver([post_save, post_delete], sender=Technician)
+def invalidate_technician_principal(sender, instance, **kwargs):
+    user_principal_cache.invalidate(instance.user_id)
+
+
+# Fichiers médias : une référence est libérée à la suppression ou au remplacement (accounts/storage.py)
+for label in TRACKED_FILE_MODELS:
+    FileReferenceTracker(apps.get_model(label)).connect()
@@ -0,0 +1,145 @@
+import hashlib
+import os
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F, FileField
+from django.db.models.signals import post_delete, post_save, pre_save
+
+
+CONTENT_HASH_SIZE = 20
+
+# Modèles dont les champs fichiers sont suivis (références libérées, ramasse-miettes des médias)
+TRACKED_FILE_MODELS = ['accounts.RadiologyImage', 'accounts.DossierPatient']
+
+
+def content_hash(content):
+    hasher = hashlib.blake2b(digest_size=CONTENT_HASH_SIZE)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stockage des médias par contenu, avec comptage de références.
+
+    Un fichier enregistré sous 'radiology_images/scan.png' est écrit sous
+    'radiology_images/<2 car.>/<empreinte>.png' : le répertoire d'upload_to est
+    conservé, le nom devient l'empreinte BLAKE2b du contenu. Des octets
+    identiques ne sont donc écrits qu'une fois ; chaque save() ajoute une
+    référence dans StoredFile et delete() en retire une, le fichier physique
+    n'étant supprimé qu'à la dernière. La ligne StoredFile est verrouillée
+    pendant l'écriture ou la suppression du fichier physique.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Le nom définitif (empreinte) est calculé dans _save
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredFile
+
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        digest = content_hash(content)
+        name = os.path.join(directory, digest[:2], f"{digest}{extension}").replace('\\', '/')
+
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    stored = StoredFile.objects.select_for_update().filter(name=name).first()
+                    if stored is None:
+                        StoredFile.objects.create(name=name, size=content.size, refcount=1)
+                    else:
+                        StoredFile.objects.filter(pk=stored.pk).update(refcount=F('refcount') + 1)
+                    if not self.exists(name):
+                        super()._save(name, content)
+                return name
+            except IntegrityError:
+                # Création concurrente de la même empreinte : la ligne existe désormais
+                if attempt:
+                    raise
+
+    def delete(self, name):
+        from .models import StoredFile
+
+        if not name:
+            return
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(name=name).first()
+            if stored is not None and stored.refcount > 1:
+                StoredFile.objects.filter(pk=stored.pk).update(refcount=F('refcount') - 1)
+                return
+            if stored is not None:
+                stored.delete()
+            # Dernière référence (ou fichier antérieur à ce stockage, à un seul propriétaire)
+            super().delete(name)
+
+
+def release_file_later(storage, name):
+    """
+    Retire une référence une fois la transaction courante validée : un
+    rollback ne doit pas supprimer le fichier d'une ligne restaurée.
+    """
+    if name:
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+def _file_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, FileField)]
+
+
+def tracked_file_fields():
+    """
+    Couples (modèle, nom du champ) de tous les champs fichiers suivis.
+    """
+    return [
+        (model, field.name)
+        for model in map(apps.get_model, TRACKED_FILE_MODELS)
+        for field in _file_fields(model)
+    ]
+
+
+class FileReferenceTracker:
+    """
+    Libère les références des fichiers d'un modèle : à la suppression d'une
+    ligne, et à l'enregistrement pour un fichier remplacé ou vidé. Les anciens
+    noms sont relus en pre_save, en une requête, seulement pour une ligne
+    existante dont un champ fichier peut avoir changé.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = [field.name for field in _file_fields(model)]
+
+    def connect(self):
+        uid = f"file-references-{self.model._meta.label}"
+        pre_save.connect(self.pre_save, sender=self.model, weak=False, dispatch_uid=uid)
+        post_save.connect(self.post_save, sender=self.model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self.post_delete, sender=self.model, weak=False, dispatch_uid=uid)
+
+    def pre_save(self, sender, instance, raw=False, update_fields=None, **kwargs):
+        fields = self.fields if update_fields is None else [name for name in self.fields if name in update_fields]
+        if raw or instance._state.adding or not fields:
+            return
+        previous = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+        released = []
+        for name in fields:
+            old_name = previous.get(name)
+            current = getattr(instance, name)
+            # Nouveau fichier (pas encore enregistré) ou champ modifié : l'ancien perd une référence
+            if old_name and (current.name != old_name or not current._committed):
+                released.append((current.storage, old_name))
+        instance._released_files = released
+
+    def post_save(self, sender, instance, **kwargs):
+        for storage, name in instance.__dict__.pop('_released_files', []):
+            release_file_later(storage, name)
+
+    def post_delete(self, sender, instance, **kwargs):
+        for name in self.fields:
+            field_file = getattr(instance, name)
+            release_file_later(field_file.storage, field_file.name)
+
@@ -0,0 +1,78 @@
+import os
+import pytest
+from datetime import date
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from accounts.models import ExamenRadiologique, RadiologyImage, StoredFile
+
+
+@pytest.fixture
+def examen(settings, tmp_path, dossier):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return ExamenRadiologique.objects.create(date=date(2024, 6, 1), dossier_patient=dossier)
+
+
+def create_image(examen, content, filename='scan.png'):
+    return RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile(filename, content))
+
+
+@pytest.mark.django_db
+def test_identical_content_is_stored_once(examen):
+    first = create_image(examen, b'same bytes', 'a.png')
+    second = create_image(examen, b'same bytes', 'b.PNG')
+    other = create_image(examen, b'other bytes')
+
+    assert first.image.name == second.image.name
+    assert first.image.name != other.image.name
+    assert first.image.name.startswith('radiology_images/')
+    assert StoredFile.objects.get(name=first.image.name).refcount == 2
+    assert len(os.listdir(os.path.dirname(first.image.path))) == 1
+
+
+@pytest.mark.django_db
+def test_file_is_removed_with_its_last_reference(examen, django_capture_on_commit_callbacks):
+    first = create_image(examen, b'same bytes')
+    second = create_image(examen, b'same bytes')
+    path = first.image.path
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert os.path.exists(path)
+    assert StoredFile.objects.get(name=second.image.name).refcount == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not os.path.exists(path)
+    assert not StoredFile.objects.exists()
+
+
+@pytest.mark.django_db
+def test_replacing_a_file_releases_the_previous_one(examen, django_capture_on_commit_callbacks):
+    image = create_image(examen, b'v1')
+    old_path = image.image.path
+
+    # Même contenu renvoyé : une seule référence au final
+    with django_capture_on_commit_callbacks(execute=True):
+        image.image = SimpleUploadedFile('scan.png', b'v1')
+        image.save()
+    assert StoredFile.objects.get(name=image.image.name).refcount == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image.image = SimpleUploadedFile('scan.png', b'v2')
+        image.save()
+    assert not os.path.exists(old_path)
+    assert list(StoredFile.objects.values_list('name', 'refcount')) == [(image.image.name, 1)]
+
+
+@pytest.mark.django_db
+def test_dossier_deletion_releases_cascaded_files(examen, django_capture_on_commit_callbacks):
+    dossier = examen.dossier_patient
+    dossier.qr.save('qr.png', ContentFile(b'qr'), save=True)
+    image = create_image(examen, b'scan')
+    paths = [dossier.qr.path, image.image.path]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        dossier.delete()
+
+    assert not any(os.path.exists(path) for path in paths)
+    assert not StoredFile.objects.exists()
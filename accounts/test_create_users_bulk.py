@@ -0,0 +1,31 @@
+import pytest
+from django.contrib.auth import get_user_model
+from accounts.hashing import _hashing_pools
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+def test_create_users_bulk_hashes_in_parallel():
+    users = [
+        {'email': f'Staff{i}@EXAMPLE.com', 'password': f'password{i}', 'role': 'technicien'}
+        for i in range(20)
+    ]
+
+    User.objects.create_users_bulk(users, processes=2)
+
+    assert User.objects.filter(role='technicien').count() == 20
+    user = User.objects.get(email='Staff7@example.com')  # domaine normalisé comme create_user
+    assert user.check_password('password7')
+    assert not user.check_password('password8')
+
+    # le pool de processus est réutilisé par les lots suivants
+    pool = _hashing_pools[2]
+    User.objects.create_users_bulk([dict(data, email=f'again{i}@example.com') for i, data in enumerate(users)], processes=2)
+    assert _hashing_pools[2] is pool
+
+
+@pytest.mark.django_db
+def test_create_users_bulk_requires_email():
+    with pytest.raises(ValueError):
+        User.objects.create_users_bulk([{'email': '', 'password': 'x'}])
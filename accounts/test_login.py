@@ -0,0 +1,48 @@
+import pytest
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from accounts.models import User
+
+
+@pytest.mark.django_db
+def test_login_patient_returns_profile(api_client, dossier):
+    patient = dossier.patient
+    user = patient.user
+
+    with mock.patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check_password, \
+            CaptureQueriesContext(connection) as queries:
+        response = api_client.post('/accounts/login/', {'email': 'patient@example.com', 'password': 'password123'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert check_password.call_count == 1
+    assert response.data['role'] == 'patient'
+    assert response.data['userID'] == user.id
+    assert response.data['patient_id'] == patient.id
+    assert response.data['dossier_id'] == dossier.id
+    assert response.data['nom'] == 'Rofieda'
+    assert 'refreshToken' in response.cookies
+    # une requête pour l'utilisateur, une pour le profil (jointe), le reste pour token_blacklist
+    profile_queries = [q for q in queries.captured_queries if 'token_blacklist' not in q['sql']]
+    assert len(profile_queries) == 2
+
+
+@pytest.mark.django_db
+def test_login_technician_returns_technician_role(api_client, medecin):
+
+    response = api_client.post('/accounts/login/', {'email': 'doc@example.com', 'password': 'password123'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['technician_role'] == 'medecin'
+    assert response.data['technicien_id'] == medecin.id
+    assert response.data['prenom'] == 'Dalia'
+
+
+@pytest.mark.django_db
+def test_login_invalid_credentials(api_client):
+    User.objects.create_user(email='doc@example.com', password='password123', role='technicien')
+
+    response = api_client.post('/accounts/login/', {'email': 'doc@example.com', 'password': 'wrong'})
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
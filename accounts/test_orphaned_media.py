@@ -0,0 +1,70 @@
+import os
+import pytest
+from datetime import date
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from accounts.models import ExamenRadiologique, RadiologyImage, StoredFile
+from accounts.media_gc import walk_media
+
+
+@pytest.fixture
+def media(settings, tmp_path, dossier):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    examen = ExamenRadiologique.objects.create(date=date(2024, 6, 1), dossier_patient=dossier)
+    kept = RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile('kept.png', b'kept'))
+    orphan = RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile('orphan.png', b'orphan'))
+    # Suppression sans libération (avant ce ramasse-miettes, ou via QuerySet.update)
+    RadiologyImage.objects.filter(id=orphan.id).update(image='')
+
+    root = tmp_path / 'media'
+    (root / 'qr_code').mkdir()
+    (root / 'qr_code' / 'qr_patient_1.png').write_bytes(b'qr')
+    (root / 'radiology_images' / 'legacy-upload.png').write_bytes(b'legacy')
+    return root, kept, orphan
+
+
+def test_walk_media_yields_sorted_paths(tmp_path):
+    for name in ['a/b.png', 'a-c.png', 'a.png', 'B.png', 'a/0/z.png']:
+        path = tmp_path / 'radiology_images' / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x')
+
+    names = [name for name, _ in walk_media(str(tmp_path), 'radiology_images')]
+    assert names == sorted(names)
+    assert len(names) == 5
+
+
+@pytest.mark.django_db
+def test_dry_run_lists_orphans_without_touching_them(media, capsys):
+    root, kept, orphan = media
+
+    call_command('collect_orphaned_media', dry_run=True, min_age=0)
+
+    output = capsys.readouterr().out
+    assert 'qr_code/qr_patient_1.png' in output
+    assert 'radiology_images/legacy-upload.png' in output
+    assert kept.image.name not in output
+    assert '3 fichier(s) orphelin(s) trouvé(s)' in output
+    assert (root / 'qr_code' / 'qr_patient_1.png').exists()
+
+
+@pytest.mark.django_db
+def test_orphans_are_deleted_or_quarantined_in_batches(media, tmp_path):
+    root, kept, orphan = media
+    orphan_name = StoredFile.objects.exclude(name=kept.image.name).get().name
+
+    call_command('collect_orphaned_media', min_age=0, batch_size=1, directory=['radiology_images'], quarantine=str(tmp_path / 'quarantine'))
+
+    assert (tmp_path / 'quarantine' / 'radiology_images' / 'legacy-upload.png').exists()
+    assert not (root / orphan_name).exists()
+    assert os.path.exists(kept.image.path)
+    assert list(StoredFile.objects.values_list('name', flat=True)) == [kept.image.name]
+    # --directory : les QR codes ne sont pas parcourus
+    assert (root / 'qr_code' / 'qr_patient_1.png').exists()
+
+    call_command('collect_orphaned_media')  # fichiers trop récents : rien n'est supprimé
+    assert (root / 'qr_code' / 'qr_patient_1.png').exists()
+
+    call_command('collect_orphaned_media', min_age=0)
+    assert not (root / 'qr_code' / 'qr_patient_1.png').exists()
+    assert os.path.exists(kept.image.path)
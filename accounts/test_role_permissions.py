@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.authentication import ClaimsJWTAuthentication, TokenPrincipal, user_principal_cache
+from accounts.models import User, Technician, Patient, DossierPatient
+from accounts.permissions import has_role
+from accounts.serializers import CustomTokenObtainPairSerializer
+
+
+@pytest.fixture
+def laborantin():
+    user = User.objects.create_user(email='labo@example.com', password='password123', role='technicien')
+    Technician.objects.create(user=user, nom='Labo', prenom='L', role='laborantin')
+    return User.objects.get(pk=user.pk)
+
+
+@pytest.mark.django_db
+def test_token_carries_technician_role(laborantin):
+    token = CustomTokenObtainPairSerializer.get_token(laborantin)
+    assert token.access_token['technician_role'] == 'laborantin'
+
+
+@pytest.mark.django_db
+def test_has_role_uses_claim_without_query(laborantin):
+    token = AccessToken(str(CustomTokenObtainPairSerializer.get_token(laborantin).access_token))
+
+    with CaptureQueriesContext(connection) as queries:
+        assert has_role(laborantin, token, technician_roles=['laborantin'])
+        assert not has_role(laborantin, token, technician_roles=['radiologue'])
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_has_role_falls_back_to_single_query_per_request(laborantin):
+    request = APIRequestFactory().get('/')
+    with CaptureQueriesContext(connection) as queries:
+        assert has_role(laborantin, technician_roles=['laborantin'], request=request)
+        assert has_role(laborantin, technician_roles=['medecin', 'laborantin'], request=request)
+    assert len(queries) == 1
+
+    # le rôle n'est pas mémorisé sur l'utilisateur : une nouvelle requête voit le changement
+    Technician.objects.filter(user=laborantin).update(role='radiologue')
+    assert has_role(laborantin, technician_roles=['radiologue'], request=APIRequestFactory().get('/'))
+
+
+@pytest.mark.django_db
+def test_token_claims_for_patient():
+    user = User.objects.create_user(email='patient@example.com', password='password123', role='patient')
+    patient = Patient.objects.create(
+        user=user, nom='P', prenom='P', date_naissance='1990-01-01', adresse='a', tel='0', personne_a_contacter='c', nss='NSS1'
+    )
+    dossier = DossierPatient.objects.create(patient=patient)
+
+    with CaptureQueriesContext(connection) as queries:
+        token = CustomTokenObtainPairSerializer.get_token(user)
+    # l'autre requête enregistre le jeton dans token_blacklist
+    assert len([q for q in queries.captured_queries if 'token_blacklist' not in q['sql']]) == 1
+    assert token['profile_id'] == patient.id
+    assert token['dossier_id'] == dossier.id
+    assert token['technician_role'] is None
+
+
+@pytest.mark.django_db
+def test_authentication_builds_principal_without_user_query(laborantin):
+    access = str(CustomTokenObtainPairSerializer.get_token(laborantin).access_token)
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+    ClaimsJWTAuthentication().authenticate(request)  # état de l'utilisateur mis en cache
+
+    with CaptureQueriesContext(connection) as queries:
+        user, token = ClaimsJWTAuthentication().authenticate(request)
+        assert has_role(user, token, technician_roles=['laborantin'])
+    assert len(queries) == 0
+    assert isinstance(user, TokenPrincipal)
+    assert user.pk == laborantin.pk
+    assert user.role == 'technicien'
+    assert user.profile_id == laborantin.technician.id
+
+
+@pytest.mark.django_db
+def test_authentication_caches_user_state_until_it_changes(laborantin):
+    user_principal_cache.clear()
+    access = str(CustomTokenObtainPairSerializer.get_token(laborantin).access_token)
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+    auth = ClaimsJWTAuthentication()
+
+    with CaptureQueriesContext(connection) as queries:
+        auth.authenticate(request)
+        auth.authenticate(request)
+    assert len(queries) == 1
+
+    laborantin.is_active = False
+    laborantin.save()  # post_save invalide l'entrée du cache
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate(request)
+
+
+@pytest.mark.django_db
+def test_authentication_rejects_token_after_technician_role_change(laborantin):
+    user_principal_cache.clear()
+    access = str(CustomTokenObtainPairSerializer.get_token(laborantin).access_token)
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+    auth = ClaimsJWTAuthentication()
+    auth.authenticate(request)
+
+    technician = laborantin.technician
+    technician.role = 'medecin'
+    technician.save()  # post_save invalide l'entrée du cache
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate(request)
+
+    technician.role = 'laborantin'
+    technician.save()
+    auth.authenticate(request)
+    technician.delete()
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate(request)
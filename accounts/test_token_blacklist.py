@@ -0,0 +1,86 @@
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from accounts.blacklist import BloomFilter, jti_blacklist_filter
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(email='user@example.com', password='password123', role='administratif')
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    values = [f'jti-{i}' for i in range(1000)]
+    for value in values:
+        bloom.add(value)
+    assert all(value in bloom for value in values)
+    assert sum(f'other-{i}' in bloom for i in range(1000)) < 20
+
+
+@pytest.mark.django_db
+def test_refresh_skips_database_until_logout(user):
+    jti_blacklist_filter.clear()
+    refresh = CustomTokenObtainPairSerializer.get_token(user)
+    client = APIClient()
+
+    assert client.post('/accounts/refresh/', {'refresh': str(refresh)}).status_code == status.HTTP_200_OK
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post('/accounts/refresh/', {'refresh': str(refresh)})
+    assert response.status_code == status.HTTP_200_OK
+    assert not any('token_blacklist' in q['sql'] for q in queries.captured_queries)
+
+    client.force_authenticate(user=user)
+    response = client.post('/accounts/logout/', {'refresh': str(refresh)})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    client.force_authenticate(user=None)
+    response = client.post('/accounts/refresh/', {'refresh': str(refresh)})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_compact_token_blacklist_removes_expired_tokens(user):
+    now = timezone.now()
+    expired = [
+        OutstandingToken.objects.create(user=user, jti=f'old-{i}', token='t', expires_at=now - timedelta(days=1))
+        for i in range(5)
+    ]
+    BlacklistedToken.objects.create(token=expired[0])
+    alive = OutstandingToken.objects.create(user=user, jti='alive', token='t', expires_at=now + timedelta(days=1))
+    BlacklistedToken.objects.create(token=alive)
+
+    call_command('compact_token_blacklist', batch_size=2)
+
+    assert list(OutstandingToken.objects.values_list('jti', flat=True)) == ['alive']
+    assert BlacklistedToken.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_filter_sync_rereads_recent_rows_committed_out_of_order(user):
+    jti_blacklist_filter.clear()
+    now = timezone.now()
+    tokens = [
+        OutstandingToken.objects.create(user=user, jti=f'jti-{i}', token='t', expires_at=now + timedelta(days=1))
+        for i in range(3)
+    ]
+    assert not jti_blacklist_filter.might_contain('jti-0')
+
+    # D'autres workers valident l'id 3 avant l'id 2 : la synchronisation voit d'abord l'id 3...
+    BlacklistedToken.objects.create(id=3, token=tokens[2])
+    jti_blacklist_filter._synced_at = 0.0
+    assert jti_blacklist_filter.might_contain('jti-2')
+    assert not jti_blacklist_filter.might_contain('jti-1')
+
+    # ... puis l'id 2, encore dans la fenêtre relue à chaque synchronisation
+    BlacklistedToken.objects.create(id=2, token=tokens[1])
+    jti_blacklist_filter._synced_at = 0.0
+    assert jti_blacklist_filter.might_contain('jti-1')
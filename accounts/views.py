@@ -25,6 +25,10 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.exceptions import APIException
 from .mixin import CheckUserRoleMixin
+from .authentication import resolve_login_profile, user_principal_cache
+from .pagination import PaginatedListMixin, KEYSET_PAGINATION_PARAMETERS
+from .filters import AdminFilter
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -94,64 +98,19 @@ class LoginView(TokenObtainPairView, CheckUserRoleMixin):
         This method authenticates the user, generates access and refresh tokens,
         and sets the refresh token as an HttpOnly cookie.
         """
-        # Call the original post method to get the tokens (access and refresh)
-        response = super().post(request, *args, **kwargs)
-        access_token = response.data.get('access')
-        refresh_token = response.data.get('refresh')
-        user = self.get_user_from_request(request)
-        role = user.role if user else None
+        # Validate the credentials once: the serializer authenticates the user and mints the tokens
+        user, data = self.validate_credentials(request)
+        refresh_token = data.get('refresh')
+        response = Response(data, status=status.HTTP_200_OK)
 
-        
         response.data['userID'] = user.id
 
-
         # Add role to the response data
-        response.data['role'] = role
-        if role == 'technicien':
-            # Retrieve and include the technician role
-            try:
-                technician = Technician.objects.get(user=user)
-                response.data['technician_role'] = technician.role
-                response.data['technicien_id'] = technician.id
-                response.data['nom'] = technician.nom
-                response.data['prenom'] = technician.prenom
-            except Technician.DoesNotExist:
-                response.data['technician_role'] = None 
-                response.data['technicien_id'] = None
-
+        response.data['role'] = user.role
 
-
-        if role == 'patient':
-            try:
-                patient = Patient.objects.get(user=user)
-                dossier = DossierPatient.objects.get(patient=patient)
-                response.data['dossier_id'] = dossier.id 
-                response.data['patient_id'] = patient.id 
-                response.data['nom'] = patient.nom
-                response.data['prenom'] = patient.prenom
-            except Patient.DoesNotExist:
-                response.data['dossier_id'] = None  #
-                response.data['patient_id'] = None
-            except DossierPatient.DoesNotExist:
-                response.data['dossier_id'] = None 
-
-        if role == 'admin':
-            try:
-                admin = Admin.objects.get(user=user)
-                response.data['admin_id'] = admin.id
-                response.data['nom'] = admin.nom
-                response.data['prenom'] = admin.prenom
-            except Admin.DoesNotExist:
-                response.data['admin_id'] = None
-
-        if role == 'administratif':
-            try:
-                administratif = Administratif.objects.get(user=user)
-                response.data['administratif_id'] = administratif.id
-                response.data['nom'] = administratif.nom
-                response.data['prenom'] = administratif.prenom
-            except Administratif.DoesNotExist:
-                response.data['administratif_id'] = None 
+        # Profile fields for the user's role (technician role, profile / dossier ids, nom, prenom),
+        # already loaded in a single joined query when the token claims were built
+        response.data.update(resolve_login_profile(user))
 
         # Set the refresh token as a cookie
         response.set_cookie(
@@ -165,15 +124,18 @@ class LoginView(TokenObtainPairView, CheckUserRoleMixin):
         # Return the response with the access token in the body
         return response
 
-    def get_user_from_request(self, request):
+    def validate_credentials(self, request):
         """
-        Retrieve user from the request data and validate it.
+        Validate the user credentials and return the user with the token data.
 
         This method uses the custom serializer to validate the user credentials.
         """
         ser = self.get_serializer(data=request.data)
-        ser.is_valid(raise_exception=True)
-        return ser.user
+        try:
+            ser.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        return ser.user, ser.validated_data
 
 ###########################################################################################################################################
 
@@ -218,6 +180,7 @@ class LogoutAPIView(APIView, CheckUserRoleMixin):
 
         # If valid, save (perform logout logic)
         serializer.save()
+        user_principal_cache.invalidate(request.user.pk)
 
         # Return a response indicating successful logout
         return Response({"detail": "Successfully logged out."}, status=status.HTTP_204_NO_CONTENT)
@@ -558,8 +521,10 @@ class AdministratifView(APIView,CheckUserRoleMixin):
 
 
 
-class AdminView(APIView,CheckUserRoleMixin):
+class AdminView(PaginatedListMixin, APIView,CheckUserRoleMixin):
     permission_classes = [IsAuthenticated]
+    filterset_class = AdminFilter
+    list_date_field = None
 
      # Create a new admin (POST)
     @swagger_auto_schema(
@@ -589,7 +554,10 @@ class AdminView(APIView,CheckUserRoleMixin):
 
     # Get a specific admin or list of admins (GET)
     @swagger_auto_schema(
-        operation_description="Get a specific admin or a list of admins. This action can only be performed by an 'admin'.",
+        operation_description=(
+            "Get a specific admin or a list of admins. This action can only be performed by an 'admin'. "
+            "The list is paginated ({'next', 'results'}, newest first) and can be filtered by nom / prenom prefix."
+        ),
         manual_parameters=[
             openapi.Parameter(
                 'pk',
@@ -597,8 +565,10 @@ class AdminView(APIView,CheckUserRoleMixin):
                 description="Primary key of the admin to get.",
                 type=openapi.TYPE_INTEGER,
                 required=True,
-            )
-        ],
+            ),
+            openapi.Parameter('nom', openapi.IN_QUERY, description="Last name prefix (list only).", type=openapi.TYPE_STRING),
+            openapi.Parameter('prenom', openapi.IN_QUERY, description="First name prefix (list only).", type=openapi.TYPE_STRING),
+        ] + KEYSET_PAGINATION_PARAMETERS,
         responses={
             200: openapi.Response('Admin details', AdminSerializer),
             404: 'Admin not found',
@@ -621,10 +591,8 @@ class AdminView(APIView,CheckUserRoleMixin):
             serializer = AdminSerializer(admin_instance)
             return Response(serializer.data)
 
-        # If no pk is provided, return a list of all admins
-        admins = Admin.objects.all()
-        serializer = AdminSerializer(admins, many=True)
-        return Response(serializer.data)
+        # If no pk is provided, return a page of admins
+        return self.list_response(request, Admin.objects.all(), AdminSerializer)
     
 
     @swagger_auto_schema(
@@ -0,0 +1,12 @@
+import django_filters
+
+from accounts.models import Certificat
+
+
+class CertificatFilter(django_filters.FilterSet):
+    date_debut = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_fin = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = Certificat
+        fields = ['date', 'patient', 'medecin']
@@ -0,0 +1,22 @@
+import pytest
+from datetime import date
+from rest_framework import status
+from accounts.models import Certificat
+
+
+@pytest.mark.django_db
+def test_certificats_are_paginated_and_filtered(api_client, medecin, make_dossier):
+    patients = [make_dossier(i, nom=f'Patient{i}').patient for i in range(2)]
+    for day in range(1, 4):
+        for patient in patients:
+            Certificat.objects.create(date=date(2024, 1, day), medecin=medecin, contenu='Repos', patient=patient)
+
+    api_client.force_authenticate(user=medecin.user)
+
+    response = api_client.get('/administration/certificats/', {'patient': patients[0].id, 'page_size': 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert [c['date'] for c in response.data['results']] == ['2024-01-03', '2024-01-02']
+
+    response = api_client.get(response.data['next'])
+    assert [c['date'] for c in response.data['results']] == ['2024-01-01']
+    assert response.data['next'] is None
@@ -7,31 +7,48 @@ from .serializers import CertificatSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from accounts.mixin import CheckUserRoleMixin
+from accounts.pagination import PaginatedListMixin, KEYSET_PAGINATION_PARAMETERS
+from .filters import CertificatFilter
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-class CertificatView(APIView,CheckUserRoleMixin):
+class CertificatView(PaginatedListMixin, APIView,CheckUserRoleMixin):
     permission_classes = [IsAuthenticated]
+    filterset_class = CertificatFilter
     
     @swagger_auto_schema(
         operation_summary="Retrieve all certificates",
-        operation_description="This endpoint allows users with the roles of 'patient' or 'medecin' to retrieve all certificates.",
+        operation_description=(
+            "This endpoint allows users with the roles of 'patient' or 'medecin' to retrieve certificates, "
+            "most recent first, one page at a time ({'next', 'results'})."
+        ),
+        manual_parameters=KEYSET_PAGINATION_PARAMETERS + [
+            openapi.Parameter('date', openapi.IN_QUERY, description="Exact date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_debut', openapi.IN_QUERY, description="From date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_fin', openapi.IN_QUERY, description="To date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('patient', openapi.IN_QUERY, description="ID of the patient.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('medecin', openapi.IN_QUERY, description="ID of the doctor.", type=openapi.TYPE_INTEGER),
+        ],
         responses={
             200: openapi.Response(
                 description="Certificates retrieved successfully.",
                 examples={
-                    "application/json": [
-                        {
-                            "id": 1,
-                            "date": "2024-12-31",
-                            "medecin": 1,
-                            "contenu": "Medical certificate content.",
-                            "patient": 12
-                        }
-                    ]
+                    "application/json": {
+                        "next": "http://127.0.0.1:8000/administration/certificats/?page_size=50&cursor=MjAyNC0xMi0zMTox",
+                        "results": [
+                            {
+                                "id": 1,
+                                "date": "2024-12-31",
+                                "medecin": 1,
+                                "contenu": "Medical certificate content.",
+                                "patient": 12
+                            }
+                        ]
+                    }
                 }
             ),
+            400: openapi.Response("Invalid filter, cursor or page_size."),
             403: openapi.Response(
                 description="Access denied. You do not have permission to get this resource.",
                 examples={
@@ -47,9 +64,7 @@ class CertificatView(APIView,CheckUserRoleMixin):
         if not self.check_user_role(request.user,['patient'],['medecin']):
             return Response({'error': 'You do not have permission to get this resource.'}, status=status.HTTP_403_FORBIDDEN)
 
-        certificats = Certificat.objects.all()
-        serializer = CertificatSerializer(certificats, many=True)
-        return Response(serializer.data)
+        return self.list_response(request, Certificat.objects.all(), CertificatSerializer)
 
     @swagger_auto_schema(
         operation_summary="Create a new certificate",
@@ -0,0 +1,49 @@
+import pytest
+from rest_framework.test import APIClient
+from accounts.models import User, Technician, Patient, DossierPatient
+
+
+# Fixtures partagées par les tests des applications (pytest lancé depuis la racine du projet)
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def medecin():
+    user = User.objects.create_user(email='doc@example.com', password='password123', role='technicien')
+    return Technician.objects.create(user=user, nom='Doc', prenom='Dalia', role='medecin')
+
+
+@pytest.fixture
+def laborantin():
+    user = User.objects.create_user(email='labo@example.com', password='password123', role='technicien')
+    return Technician.objects.create(user=user, nom='Labo', prenom='Lina', role='laborantin')
+
+
+@pytest.fixture
+def make_dossier():
+    """
+    Crée un patient (utilisateur, Patient) et son dossier. Sans `index`, le
+    patient de référence (patient@example.com, NSS 123456789012345) ; avec,
+    un patient distinct par index. Les autres champs de Patient se passent
+    en arguments nommés.
+    """
+    def make(index=None, **fields):
+        suffix = '' if index is None else index
+        user = User.objects.create_user(email=f'patient{suffix}@example.com', password='password123', role='patient')
+        values = {
+            'nom': 'Rofieda', 'prenom': 'Mmr', 'date_naissance': '2005-09-13', 'adresse': 'kouba',
+            'tel': '0123456789', 'personne_a_contacter': 'Contact',
+            'nss': '123456789012345' if index is None else f'nss-{index}',
+        }
+        values.update(fields)
+        return DossierPatient.objects.create(patient=Patient.objects.create(user=user, **values))
+    return make
+
+
+@pytest.fixture
+def dossier(make_dossier):
+    return make_dossier()
@@ -1,6 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
 from accounts.models import Consultation , Resume
-from accounts.models import Technician, Ordonnance, DossierPatient  # Import des modèles associés
+from accounts.models import Technician, Ordonnance, DossierPatient, Medicament  # Import des modèles associés
+from traitements.autocomplete import medication_index
 
 
 
@@ -20,3 +22,53 @@ class ResumerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Resume
         fields = '__all__'  
+
+
+
+class OrdonnanceMedicamentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Medicament
+        fields = ['id', 'nom', 'dose', 'frequence', 'duree']
+
+
+class OrdonnanceCompleteSerializer(serializers.ModelSerializer):
+    """
+    Ordonnance créée avec ses médicaments et rattachée à sa consultation, en
+    une transaction : une insertion pour l'ordonnance, une insertion groupée
+    (bulk_create) pour les médicaments, une mise à jour de la consultation.
+    """
+    consultation = serializers.PrimaryKeyRelatedField(queryset=Consultation.objects.all(), write_only=True)
+    medicaments = OrdonnanceMedicamentSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = Ordonnance
+        fields = ['id', 'date', 'validation', 'consultation', 'medicaments']
+
+    def validate_consultation(self, consultation):
+        if consultation.ordonnance_id is not None:
+            raise serializers.ValidationError("Cette consultation a déjà une ordonnance.")
+        return consultation
+
+    def create(self, validated_data):
+        consultation = validated_data.pop('consultation')
+        medicaments = validated_data.pop('medicaments')
+
+        with transaction.atomic():
+            # Verrou sur la consultation : deux ordonnances ne peuvent pas lui être rattachées en même temps
+            consultation = Consultation.objects.select_for_update().get(pk=consultation.pk)
+            if consultation.ordonnance_id is not None:
+                raise serializers.ValidationError({'consultation': ["Cette consultation a déjà une ordonnance."]})
+
+            ordonnance = Ordonnance.objects.create(**validated_data)
+            Medicament.objects.bulk_create([Medicament(ordonnance=ordonnance, **data) for data in medicaments])
+            consultation.ordonnance = ordonnance
+            consultation.save(update_fields=['ordonnance'])
+
+            # bulk_create n'envoie pas post_save : autocomplétion mise à jour après validation
+            noms = [data['nom'] for data in medicaments]
+
+            def index_medicaments():
+                for nom in noms:
+                    medication_index.add(nom)
+            transaction.on_commit(index_medicaments)
+        return ordonnance
@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from accounts.models import Consultation, Ordonnance, Medicament, DossierSummary
+from traitements.autocomplete import medication_index
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    medication_index.clear()
+    yield
+    medication_index.clear()
+
+
+@pytest.fixture
+def consultation(medecin, dossier):
+    return Consultation.objects.create(date='2024-12-31', medecin=medecin, dossier=dossier)
+
+
+@pytest.fixture
+def api_client(api_client, medecin):
+    api_client.force_authenticate(user=medecin.user)
+    return api_client
+
+
+def payload(consultation, count=10):
+    return {
+        'date': '2024-12-31',
+        'consultation': consultation.id,
+        'medicaments': [{'nom': f'Medicament {i}', 'dose': '1g', 'frequence': '3/j', 'duree': '7 j'} for i in range(count)],
+    }
+
+
+@pytest.mark.django_db
+def test_creates_ordonnance_with_medicaments_in_one_request(api_client, consultation, django_capture_on_commit_callbacks):
+    medication_index.complete('x')  # index chargé : il doit suivre la création groupée
+
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post('/consultations/ordonnance/create-with-medicaments/', payload(consultation), format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    ordonnance = Ordonnance.objects.get(id=response.data['id'])
+    assert [m['nom'] for m in response.data['medicaments']] == [f'Medicament {i}' for i in range(10)]
+    assert Medicament.objects.filter(ordonnance=ordonnance).count() == 10
+    consultation.refresh_from_db()
+    assert consultation.ordonnance_id == ordonnance.id
+    assert DossierSummary.objects.get(dossier_id=consultation.dossier_id).pending_ordonnances_count == 1
+    assert len([q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "accounts_medicament"')]) == 1
+    assert medication_index.complete('medicament 3') == [('Medicament 3', 1)]
+
+
+@pytest.mark.django_db
+def test_invalid_medicament_writes_nothing(api_client, consultation):
+    data = payload(consultation, count=2)
+    del data['medicaments'][1]['dose']
+
+    response = api_client.post('/consultations/ordonnance/create-with-medicaments/', data, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['medicaments'][1] == {'dose': ['This field is required.']}
+    assert not Ordonnance.objects.exists()
+    assert not Medicament.objects.exists()
+
+
+@pytest.mark.django_db
+def test_consultation_must_not_have_an_ordonnance(api_client, consultation):
+    consultation.ordonnance = Ordonnance.objects.create(date='2024-12-30')
+    consultation.save()
+
+    response = api_client.post('/consultations/ordonnance/create-with-medicaments/', payload(consultation, count=1), format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'consultation' in response.data
+    assert Ordonnance.objects.count() == 1
+    assert api_client.post('/consultations/ordonnance/create-with-medicaments/', {**payload(consultation), 'medicaments': []}, format='json').status_code == status.HTTP_400_BAD_REQUEST
@@ -2,12 +2,14 @@
 from django.urls import path
 from .views import ConsultationCreateView , OrdonnanceCreateView , SupprimerOrdonnanceAPIView , SupprimerConsultationAPIView , ModifierOrdonnanceAPIV , ModifierConsultationAPIV
 from .views import ConsultationSearchByDateView , ConsultationSearchByDpiView , ConsultationSearchByTechnicienView
+from .views import OrdonnanceCompleteCreateView
 
 from .views import RechercheOrdonnanceAPIV , ValidationOrdonnance , RechercheResume,ModifierResumeAPIV,SupprimerResumeAPIView,ResumeCreateView
 
 
 urlpatterns = [
     path('ordonnance/create/', OrdonnanceCreateView.as_view(), name='create-ordonnance'),
+    path('ordonnance/create-with-medicaments/', OrdonnanceCompleteCreateView.as_view(), name='create-ordonnance-with-medicaments'),
     path('consultation/create/', ConsultationCreateView.as_view(), name='create-consultation'),
     path('ordonnance/<int:ordonnance_id>/delete/', SupprimerOrdonnanceAPIView.as_view(), name='delete-ordonnance'),
     path('consultation/<int:consultation_id>/delete/', SupprimerConsultationAPIView.as_view(), name='delete-consultation'),
@@ -8,7 +8,7 @@ from rest_framework import status
 
 
 from accounts.models import Consultation , Ordonnance , Technician , DossierPatient, Resume
-from .serializers import ConsultationSerializer , OrdonnanceSerializer, ResumerSerializer
+from .serializers import ConsultationSerializer , OrdonnanceSerializer, ResumerSerializer, OrdonnanceCompleteSerializer
 import random
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
@@ -70,6 +70,68 @@ class OrdonnanceCreateView(APIView,CheckUserRoleMixin):
 ###########################################################################################################################################
 
 
+class OrdonnanceCompleteCreateView(APIView,CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Create a prescription with its medications",
+        operation_description=(
+            "This endpoint allows doctors to write a whole prescription in one request: the prescription, its "
+            "medications and the consultation it belongs to are validated together, then written in a single "
+            "transaction (medications inserted in bulk). Nothing is written if any part is invalid. The "
+            "consultation must not already have a prescription."
+        ),
+        request_body=OrdonnanceCompleteSerializer,
+        responses={
+            201: openapi.Response(
+                description="Prescription created and attached to the consultation.",
+                examples={
+                    "application/json": {
+                        "id": 1,
+                        "date": "2024-12-31",
+                        "validation": False,
+                        "medicaments": [
+                            {"id": 10, "nom": "Paracetamol", "dose": "500mg", "frequence": "3 times a day", "duree": "7 days"},
+                            {"id": 11, "nom": "Ibuprofen", "dose": "200mg", "frequence": "2 times a day", "duree": "5 days"}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Invalid data provided.",
+                examples={
+                    "application/json": {
+                        "consultation": ["Cette consultation a déjà une ordonnance."],
+                        "medicaments": [{}, {"dose": ["This field is required."]}]
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied. You do not have permission to create this resource.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to create this resource."
+                    }
+                }
+            ),
+        }
+    )
+
+    def post(self, request, *args, **kwargs):
+        if not self.check_user_role(request.user,technician_roles=['medecin']):
+            return Response({'error': 'You do not have permission to create this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = OrdonnanceCompleteSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+###########################################################################################################################################
+
+
 class ConsultationCreateView(APIView,CheckUserRoleMixin):
     permission_classes = [IsAuthenticated]
     """
@@ -0,0 +1,132 @@
+from django.db import IntegrityError, transaction
+
+from accounts.models import User, Patient, DossierPatient, Technician
+from .qr import qr_pipeline
+from .names import index_patient_names
+from .serializers import PatientBulkRowSerializer
+
+
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _error(index, errors):
+    return {'row': index, 'status': 'error', 'errors': errors}
+
+
+def register_patients_bulk(rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Inscrit un lot de patients (utilisateur + patient + dossier) et renvoie un
+    rapport par ligne, dans l'ordre des lignes reçues.
+
+    Chaque bloc de `chunk_size` lignes valides coûte un nombre fixe de requêtes :
+    trois contrôles ensemblistes (emails, NSS, médecins traitants) puis, dans une
+    seule transaction, un bulk_create et une relecture des ids pour chacune des
+    tables User, Patient et DossierPatient. Les QR codes sont confiés à la file
+    de génération en arrière-plan après le commit.
+    """
+    report = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        serializer = PatientBulkRowSerializer(data=row)
+        if serializer.is_valid():
+            data = dict(serializer.validated_data)
+            data['email'] = User.objects.normalize_email(data['email'])
+            valid.append((index, data))
+        else:
+            report[index] = _error(index, serializer.errors)
+
+    seen_emails = set()
+    seen_nss = set()
+    for chunk in _chunks(valid, chunk_size):
+        emails = {data['email'] for _, data in chunk}
+        nss_values = {data['nss'] for _, data in chunk}
+        medecin_ids = {data['medecin_traitant'] for _, data in chunk if data.get('medecin_traitant')}
+
+        taken_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        taken_nss = set(Patient.objects.filter(nss__in=nss_values).values_list('nss', flat=True))
+        known_medecins = set(Technician.objects.filter(id__in=medecin_ids).values_list('id', flat=True))
+
+        accepted = []
+        for index, data in chunk:
+            errors = {}
+            if data['email'] in taken_emails or data['email'] in seen_emails:
+                errors['email'] = [f"a user with this email {data['email']} already exist"]
+            if data['nss'] in taken_nss or data['nss'] in seen_nss:
+                errors['nss'] = ["A patient with this nss already exists."]
+            medecin_id = data.get('medecin_traitant')
+            if medecin_id and medecin_id not in known_medecins:
+                errors['medecin_traitant'] = [f"Invalid pk \"{medecin_id}\" - object does not exist."]
+            if errors:
+                report[index] = _error(index, errors)
+                continue
+            seen_emails.add(data['email'])
+            seen_nss.add(data['nss'])
+            accepted.append((index, data))
+
+        if not accepted:
+            continue
+
+        try:
+            dossier_ids = _create_chunk([data for _, data in accepted])
+        except IntegrityError:
+            # Conflit avec une écriture concurrente : tout le bloc est annulé
+            for index, _ in accepted:
+                report[index] = _error(index, {'non_field_errors': ["Conflict with a concurrent registration, please retry."]})
+            continue
+
+        for (index, data), dossier_id in zip(accepted, dossier_ids):
+            report[index] = {'row': index, 'status': 'created', 'email': data['email'], 'dossier_id': dossier_id}
+
+    return report
+
+
+def _create_chunk(rows):
+    """
+    Crée les User / Patient / DossierPatient d'un bloc dans une transaction et
+    renvoie les ids des dossiers dans l'ordre des lignes.
+    """
+    # Hachage des mots de passe (parallèle) avant d'ouvrir la transaction
+    users = User.objects.build_users([
+        {'email': data['email'], 'password': data['password'], 'role': 'patient'}
+        for data in rows
+    ])
+
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        # bulk_create ne renvoie pas les clés primaires sous MySQL : relecture par clé unique
+        user_ids = dict(User.objects.filter(email__in=[data['email'] for data in rows]).values_list('email', 'id'))
+
+        Patient.objects.bulk_create([
+            Patient(
+                user_id=user_ids[data['email']],
+                nom=data['nom'],
+                prenom=data['prenom'],
+                date_naissance=data['date_naissance'],
+                adresse=data['adresse'],
+                tel=data['tel'],
+                mutuelle=data.get('mutuelle'),
+                medecin_traitant_id=data.get('medecin_traitant'),
+                personne_a_contacter=data['personne_a_contacter'],
+                nss=data['nss'],
+            )
+            for data in rows
+        ])
+        patient_ids = dict(Patient.objects.filter(nss__in=[data['nss'] for data in rows]).values_list('nss', 'id'))
+        # bulk_create n'envoie pas post_save : index des noms mis à jour pour tout le bloc
+        index_patient_names(patient_ids.values())
+
+        DossierPatient.objects.bulk_create([
+            DossierPatient(patient_id=patient_ids[data['nss']]) for data in rows
+        ])
+        dossier_ids = dict(
+            DossierPatient.objects.filter(patient_id__in=patient_ids.values()).values_list('patient_id', 'id')
+        )
+
+        ordered = [dossier_ids[patient_ids[data['nss']]] for data in rows]
+        transaction.on_commit(lambda: qr_pipeline.enqueue_many(ordered))
+    return ordered
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+from accounts.models import Patient
+
+
+class PatientLookupCache:
+    """
+    Cache LRU en mémoire (par processus) pour les recherches de dossier patient.
+
+    Les clés sont de la forme ('nss', nss) ou ('id_nom', id, nom) et les valeurs
+    le couple (patient_id, dossier_id). Les entrées d'un patient sont invalidées
+    par les signaux post_save / post_delete de Patient et DossierPatient
+    (voir dpi/signals.py). Le TTL borne la durée de vie d'une entrée modifiée
+    depuis un autre worker, que ces signaux n'atteignent pas.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_patient = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, patient_id, dossier_id):
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = ((patient_id, dossier_id), time.monotonic() + self.ttl)
+            self._keys_by_patient.setdefault(patient_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate_patient(self, patient_id):
+        with self._lock:
+            for key in self._keys_by_patient.pop(patient_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_patient.clear()
+
+    def _discard(self, key):
+        (patient_id, _), _ = self._entries.pop(key)
+        keys = self._keys_by_patient.get(patient_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_patient[patient_id]
+
+
+patient_lookup_cache = PatientLookupCache()
+
+
+def _lookup(key, **filters):
+    """
+    Renvoie (patient_id, dossier_id) en une seule requête (LEFT JOIN sur le dossier).
+
+    dossier_id vaut None si le patient existe sans dossier ; la fonction renvoie
+    None si aucun patient ne correspond. Seuls les résultats complets sont mis en cache.
+    """
+    cached = patient_lookup_cache.get(key)
+    if cached is not None:
+        return cached
+
+    row = Patient.objects.filter(**filters).values_list('id', 'dossier__id').first()
+    if row is None:
+        return None
+
+    patient_id, dossier_id = row
+    if dossier_id is not None:
+        patient_lookup_cache.set(key, patient_id, dossier_id)
+    return row
+
+
+def lookup_dossier_by_nss(nss):
+    return _lookup(('nss', nss), nss=nss)
+
+
+def lookup_dossier_by_id_and_nom(patient_id, nom):
+    return _lookup(('id_nom', int(patient_id), nom), id=patient_id, nom=nom)
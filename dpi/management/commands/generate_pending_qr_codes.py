@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from dpi.qr import generate_qr_codes, pending_qr_dossiers
+
+
+class Command(BaseCommand):
+    help = "Génère les QR codes des dossiers patients qui n'en ont pas encore (reprise après redémarrage)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Nombre de dossiers traités par lot.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(
+                pending_qr_dossiers()
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            total += generate_qr_codes(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"{total} QR code(s) généré(s)."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import DossierPatient
+from dpi.summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Reconstruit la table DossierSummary à partir des données cliniques, par lots de dossiers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Nombre de dossiers traités par lot.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(
+                DossierPatient.objects
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            total += rebuild_summaries(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"{total} résumé(s) de dossier reconstruit(s)."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Patient
+from dpi.names import index_patient_names
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche approchée des noms de patients (trigrammes et clés phonétiques), par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de patients traités par lot.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Patient.objects
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            total += index_patient_names(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"{total} patient(s) indexé(s)."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from dpi.search import SEARCH_SOURCES, index_objects, index_statistics
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte des textes cliniques (résumés, examens radiologiques, soins infirmiers), par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Nombre d'objets indexés par lot.")
+        parser.add_argument('--type', choices=list(SEARCH_SOURCES), help="Ne reconstruit que ce type d'objet.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        kinds = [options['type']] if options['type'] else list(SEARCH_SOURCES)
+        for kind in kinds:
+            model = SEARCH_SOURCES[kind].model
+            total = 0
+            last_id = 0
+            while True:
+                ids = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                total += index_objects(kind, ids)
+                last_id = ids[-1]
+            self.stdout.write(self.style.SUCCESS(f"{kind} : {total} document(s) indexé(s)."))
+        index_statistics.clear()
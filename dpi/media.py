@@ -0,0 +1,173 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from accounts.models import DossierPatient, RadiologyImage
+
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# Préfixe du chemin sous MEDIA_ROOT -> (rôles utilisateur, rôles 'Technician') autorisés en plus du patient du dossier
+MEDIA_ACCESS = {
+    'radiology_images/': (['patient'], ['medecin', 'radiologue']),
+    'qr_code/': (['administratif', 'patient', 'technicien'], None),
+}
+
+
+def media_dossier_ids(name):
+    """
+    Dossiers auxquels appartient un fichier média (chemin relatif à MEDIA_ROOT).
+    Le stockage étant dédoublonné, un même fichier peut être partagé par
+    plusieurs dossiers ; ensemble vide si aucune ligne n'y fait référence.
+
+    Le stockage garde le répertoire d'upload_to : le préfixe du chemin désigne
+    la seule colonne (indexée) à interroger.
+    """
+    if name.startswith('radiology_images/'):
+        return set(
+            RadiologyImage.objects
+            .filter(**{_radiology_field(name): name})
+            .values_list('examen_radiologique__dossier_patient_id', flat=True)
+        )
+    if name.startswith('qr_code/'):
+        return set(DossierPatient.objects.filter(qr=name).values_list('id', flat=True))
+    return set()
+
+
+def _radiology_field(name):
+    for field in ('thumbnail', 'web_image'):
+        if name.startswith(RadiologyImage._meta.get_field(field).upload_to):
+            return field
+    return 'image'
+
+
+def media_access(name):
+    for prefix, roles in MEDIA_ACCESS.items():
+        if name.startswith(prefix):
+            return roles
+    return None
+
+
+def media_path(name):
+    """
+    Chemin absolu d'un fichier média ; None s'il sort de MEDIA_ROOT ou n'existe pas.
+    """
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def file_etag(stat):
+    # Comme nginx : taille et date de modification, sans relire le fichier
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def parse_range(header, size):
+    """
+    Analyse un en-tête Range d'un seul intervalle et renvoie (début, longueur).
+    None si l'en-tête est absent ou non pris en charge (plusieurs intervalles,
+    autre unité) : le fichier est alors servi en entier. ValueError si
+    l'intervalle est hors du fichier (416).
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # 'bytes=-N' : les N derniers octets
+        length = min(int(last), size)
+        if length == 0:
+            raise ValueError("Unsatisfiable range.")
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range.")
+    return start, end - start + 1
+
+
+class FileRange:
+    """
+    Vue en lecture seule sur `length` octets d'un fichier à partir de `start`.
+
+    FileResponse la lit par blocs sans dépasser l'intervalle ; `fileno()` reste
+    exposé pour que le serveur WSGI (wsgi.file_wrapper, ex. gunicorn) l'envoie
+    avec os.sendfile depuis la position courante, sur Content-Length octets.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_media_file(request, path):
+    """
+    Réponse pour un fichier média : 304 / 412 selon ETag et Last-Modified,
+    206 pour une requête Range (un seul intervalle), 200 sinon. Le fichier est
+    transmis par FileResponse, sans être chargé en mémoire.
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        byte_range = None
+        if _if_range_matches(request, etag, last_modified):
+            try:
+                byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f"bytes */{stat.st_size}"
+                return response
+
+        if byte_range is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        else:
+            start, length = byte_range
+            response = FileResponse(FileRange(open(path, 'rb'), start, length), content_type=content_type, status=206)
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f"bytes {start}-{start + length - 1}/{stat.st_size}"
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
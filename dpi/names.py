@@ -0,0 +1,177 @@
+import heapq
+import re
+
+from django.db import transaction
+from django.db.models import Case, FloatField, Sum, Value, When
+
+from accounts.models import Patient, PatientNameKey
+from .search import DocumentFrequencies, fold
+
+
+_LETTERS = re.compile(r'[a-z]+')
+
+# Soundex2 (variante française de Soundex) : conversions initiales, puis préfixes
+PHONETIC_REPLACEMENTS = [
+    ('GUI', 'KI'), ('GUE', 'KE'), ('GA', 'KA'), ('GO', 'KO'), ('GU', 'K'),
+    ('CA', 'KA'), ('CO', 'KO'), ('CU', 'KU'), ('Q', 'K'), ('CC', 'K'), ('CK', 'K'), ('PH', 'F'),
+]
+PHONETIC_PREFIXES = [('MAC', 'MCC'), ('ASA', 'AZA'), ('KN', 'NN'), ('PF', 'FF'), ('SCH', 'SSS')]
+PHONETIC_KEY_LENGTH = 4
+PHONETIC_MARK = '#'
+
+# Clés de la requête lues dans l'index : les plus rares ('  j' ou 'an ' désignent
+# une bonne partie des patients et n'aident pas à choisir les candidats)
+CANDIDATE_KEYS = 6
+# Trigrammes de début de mot toujours lus en plus des plus rares : une faute de
+# frappe crée des trigrammes rares (absents du nom cherché), rarement au début du mot
+ANCHOR_TRIGRAMS = 2
+# Nombre de patients candidats (clés rares communes, pondérées par 1 / df) notés en Python
+CANDIDATES = 200
+TRIGRAM_WEIGHT = 0.6
+PHONETIC_WEIGHT = 0.4
+
+
+def name_words(text):
+    """
+    Mots d'un nom, repliés (minuscules, sans accents) : 'Benoît-Lefèvre' -> ['benoit', 'lefevre'].
+    """
+    return _LETTERS.findall(fold(text or ''))
+
+
+def trigrams(word):
+    """
+    Trigrammes d'un mot complété de deux espaces en tête et d'un en fin
+    (comme pg_trgm) : le début du mot pèse davantage.
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def phonetic_key(word):
+    """
+    Clé phonétique française (Soundex2) d'un mot replié : 'dupont', 'dupond'
+    et 'dupon' -> 'DPN'. Chaîne vide pour un mot sans lettre.
+    """
+    key = word.upper()
+    if not key:
+        return ''
+    for old, new in PHONETIC_REPLACEMENTS:
+        key = key.replace(old, new)
+    key = key[0] + re.sub('[EIOU]', 'A', key[1:])
+    for old, new in PHONETIC_PREFIXES:
+        if key.startswith(old):
+            key = new + key[len(old):]
+            break
+    key = re.sub('(?<![CS])H', '', key)
+    key = re.sub('(?<!A)Y', '', key)
+    key = re.sub('[ADTS]$', '', key) or key
+    key = key[0] + key[1:].replace('A', '')
+    key = re.sub(r'(.)\1+', r'\1', key)
+    return key[:PHONETIC_KEY_LENGTH]
+
+
+def name_keys(*names):
+    """
+    Clés indexées d'un ou plusieurs noms : trigrammes et clés phonétiques
+    (préfixées de '#') de chacun de leurs mots.
+    """
+    keys = set()
+    for word in (word for name in names for word in name_words(name)):
+        keys |= trigrams(word)
+        phonetic = phonetic_key(word)
+        if phonetic:
+            keys.add(PHONETIC_MARK + phonetic)
+    return keys
+
+
+def index_patient_names(patient_ids):
+    """
+    Met à jour les clés de nom des patients `patient_ids` : seules les clés
+    ajoutées ou disparues sont écrites (aucune écriture si le nom n'a pas changé).
+    """
+    patient_ids = list(patient_ids)
+    wanted = {
+        patient_id: name_keys(nom, prenom)
+        for patient_id, nom, prenom in Patient.objects.filter(id__in=patient_ids).values_list('id', 'nom', 'prenom')
+    }
+    existing = {}
+    for patient_id, key in PatientNameKey.objects.filter(patient_id__in=patient_ids).values_list('patient_id', 'key'):
+        existing.setdefault(patient_id, set()).add(key)
+
+    stale = {}
+    added = []
+    for patient_id in patient_ids:
+        keys, current = wanted.get(patient_id, set()), existing.get(patient_id, set())
+        if current - keys:
+            stale[patient_id] = current - keys
+        added.extend(PatientNameKey(patient_id=patient_id, key=key) for key in keys - current)
+
+    with transaction.atomic():
+        for patient_id, keys in stale.items():
+            PatientNameKey.objects.filter(patient_id=patient_id, key__in=keys).delete()
+        PatientNameKey.objects.bulk_create(added, batch_size=1000)
+    return len(wanted)
+
+
+key_frequencies = DocumentFrequencies(PatientNameKey, 'key')
+
+
+def name_similarity(query_words, nom, prenom):
+    """
+    Score (0 à 1) d'un patient pour une recherche : similarité de Jaccard des
+    trigrammes, et part des mots de la requête dont la clé phonétique est
+    celle d'un mot du nom.
+    """
+    words = name_words(nom) + name_words(prenom)
+    query_grams = set().union(*(trigrams(word) for word in query_words))
+    grams = set().union(*(trigrams(word) for word in words))
+    shared = len(query_grams & grams)
+    trigram_score = shared / (len(query_grams) + len(grams) - shared) if grams else 0
+
+    phonetics = {phonetic_key(word) for word in words}
+    phonetic_score = sum(phonetic_key(word) in phonetics for word in query_words) / len(query_words)
+    return TRIGRAM_WEIGHT * trigram_score + PHONETIC_WEIGHT * phonetic_score
+
+
+def anchor_keys(words):
+    """
+    Trigrammes de début de chaque mot ('dupont' -> '  d', ' du').
+    """
+    return {f"  {word}"[i:i + 3] for word in words for i in range(ANCHOR_TRIGRAMS)}
+
+
+def search_patient_names(query, limit=10):
+    """
+    Recherche approchée d'un patient par nom et/ou prénom, tolérante aux fautes
+    de frappe et aux variantes d'orthographe ('Dupond Jan' trouve 'Dupont Jean').
+
+    Seules les CANDIDATE_KEYS clés de la requête les moins fréquentes dans
+    l'index sont lues, plus les trigrammes de début de mot (anchor_keys) qui
+    retrouvent le nom même quand une faute crée les clés les plus rares ; une
+    requête groupée retient les CANDIDATES patients dont les clés communes
+    pèsent le plus (chacune 1 / nombre de patients qui l'ont : une clé rare
+    compte plus qu'une clé répandue). Ils sont ensuite notés par
+    name_similarity. Renvoie [(score, ligne patient)] par score décroissant.
+    """
+    query_words = name_words(query)
+    if not query_words:
+        return []
+
+    frequencies = key_frequencies.get(list(name_keys(query)))
+    keys = sorted(frequencies, key=lambda key: (frequencies[key], key))[:CANDIDATE_KEYS]
+    keys += [key for key in anchor_keys(query_words) if key in frequencies and key not in keys]
+    if not keys:
+        return []
+
+    weight = Case(*[When(key=key, then=Value(1 / frequencies[key])) for key in keys], output_field=FloatField())
+    candidates = list(
+        PatientNameKey.objects
+        .filter(key__in=keys)
+        .values('patient_id')
+        .annotate(weight=Sum(weight))
+        .order_by('-weight', 'patient_id')
+        .values_list('patient_id', flat=True)[:CANDIDATES]
+    )
+    patients = Patient.objects.filter(id__in=candidates).values('id', 'nom', 'prenom', 'date_naissance', 'dossier__id')
+    scored = ((name_similarity(query_words, patient['nom'], patient['prenom']), patient) for patient in patients)
+    return heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]['id']))
@@ -0,0 +1,134 @@
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import qrcode
+from qrcode.image.svg import SvgPathImage
+from django.core.files.base import ContentFile
+from django.db.models import Q
+
+from accounts.models import DossierPatient
+from accounts.pipeline import BatchPipeline
+
+
+QR_CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def qr_payload(nom, patient_id):
+    """
+    Contenu encodé dans le QR code d'un dossier : {"Patient": nom, "ID": id}.
+    """
+    return json.dumps({"Patient": nom, "ID": patient_id})
+
+
+def qr_etag(payload, extension):
+    """
+    Le rendu est une fonction pure du contenu : l'ETag se calcule sans générer l'image.
+    """
+    return hashlib.sha1(f"{extension}:{payload}".encode()).hexdigest()
+
+
+def render_qr(payload, extension='png'):
+    buffer = io.BytesIO()
+    if extension == 'svg':
+        qrcode.make(payload, image_factory=SvgPathImage).save(buffer)
+    else:
+        qrcode.make(payload).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class RenderedQRCache:
+    """
+    Cache LRU des images QR rendues, borné par la taille totale en octets.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self._entries[key] = data
+            self.current_bytes += len(data)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+rendered_qr_cache = RenderedQRCache()
+
+
+def render_qr_cached(payload, extension='png'):
+    key = (extension, payload)
+    data = rendered_qr_cache.get(key)
+    if data is None:
+        data = render_qr(payload, extension)
+        rendered_qr_cache.set(key, data)
+    return data
+
+
+def pending_qr_dossiers():
+    """
+    Dossiers dont le QR code n'a pas encore été généré.
+    """
+    return DossierPatient.objects.filter(Q(qr='') | Q(qr__isnull=True))
+
+
+def generate_qr_codes(dossier_ids):
+    """
+    Génère et enregistre les QR codes d'un lot de dossiers.
+
+    Les images sont écrites sur le stockage puis la colonne `qr` de tout le lot
+    est mise à jour en une seule requête. Les dossiers qui ont déjà un QR code
+    sont ignorés, ce qui rend l'opération idempotente.
+    """
+    dossiers = list(
+        pending_qr_dossiers().filter(id__in=dossier_ids).select_related('patient')
+    )
+    for dossier in dossiers:
+        png = render_qr(qr_payload(dossier.patient.nom, dossier.patient_id))
+        dossier.qr.save(f"qr_patient_{dossier.patient_id}.png", ContentFile(png), save=False)
+
+    if dossiers:
+        DossierPatient.objects.bulk_update(dossiers, ['qr'])
+    return len(dossiers)
+
+
+class QRCodePipeline(BatchPipeline):
+    """
+    Génération des QR codes en arrière-plan, par lots d'ids de dossiers, pour
+    absorber les pics d'inscriptions. En cas d'arrêt du processus, les
+    dossiers restés sans QR sont repris par la commande
+    `generate_pending_qr_codes`.
+    """
+    thread_name = 'qr-code-pipeline'
+
+    def process_batch(self, batch):
+        generate_qr_codes(batch)
+
+
+qr_pipeline = QRCodePipeline()
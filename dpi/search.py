@@ -0,0 +1,360 @@
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils.html import escape
+
+from accounts.models import Resume, ExamenRadiologique, SoinInfermier, SearchDocument, SearchPosting
+
+
+_WORD = re.compile(r'\w+')
+
+# Mots vides du français (sous forme repliée, sans accents) : ni indexés ni recherchés
+FRENCH_STOPWORDS = frozenset('''
+    a ai au aux avec ce ces cet cette d dans de des du elle en et etaient etait ete etre eu il ils
+    j je l la le les leur leurs lui m ma mais me meme mes moi mon n ne nos notre nous on ou par pas
+    pour qu que qui s sa se ses si son sont sur t ta te tes toi ton tu un une vos votre vous y
+    est sont ont avait avaient plus tres sans sous entre
+'''.split())
+
+# Suffixes retirés par le raciniseur, du plus long au plus court (formes repliées)
+FRENCH_SUFFIXES = [
+    ('issements', ''), ('issement', ''), ('atrices', ''), ('atrice', ''), ('ateurs', ''), ('ateur', ''),
+    ('ations', ''), ('ation', ''), ('ements', ''), ('ement', ''), ('euses', ''), ('euse', ''),
+    ('ences', ''), ('ence', ''), ('ances', ''), ('ance', ''), ('ismes', ''), ('isme', ''),
+    ('istes', ''), ('iste', ''), ('iques', ''), ('ique', ''), ('ables', ''), ('able', ''),
+    ('ives', ''), ('ive', ''), ('ifs', ''), ('if', ''), ('eux', ''), ('aux', 'al'),
+    ('ees', ''), ('ee', ''), ('es', ''), ('e', ''), ('s', ''), ('x', ''),
+]
+MIN_STEM_LENGTH = 3
+MAX_TERM_LENGTH = 64
+
+
+def fold(text):
+    """
+    Minuscules sans accents ni ligatures : 'Œdème pulmonaire' -> 'oedeme pulmonaire'.
+    """
+    text = text.lower().replace('œ', 'oe').replace('æ', 'ae')
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def stem(word):
+    """
+    Raciniseur léger du français (suppression de suffixes flexionnels et de
+    quelques suffixes dérivationnels) : 'fractures', 'fracturée' -> 'fractur'.
+    Le même traitement étant appliqué aux textes et aux requêtes, seule compte
+    sa régularité.
+    """
+    if word.isdigit():
+        return word
+    for suffix, replacement in FRENCH_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= MIN_STEM_LENGTH:
+            return word[:len(word) - len(suffix)] + replacement
+    return word
+
+
+def analyze_token(token):
+    """
+    Terme indexé d'un mot du texte, ou None pour un mot vide.
+    """
+    word = fold(token).replace('_', '')
+    if len(word) < 2 or word in FRENCH_STOPWORDS:
+        return None
+    return stem(word)[:MAX_TERM_LENGTH]
+
+
+def analyze(text):
+    """
+    Découpe un texte en termes indexés : mots, repliement des accents, mots
+    vides retirés, racinisation.
+    """
+    terms = []
+    for match in _WORD.finditer(text or ''):
+        term = analyze_token(match.group())
+        if term:
+            terms.append(term)
+    return terms
+
+
+class SearchSource:
+    """
+    Un type d'objet indexé : modèle, champs texte, et queryset annoté du
+    dossier (search_dossier_id) et de la date (search_date) de chaque objet.
+    """
+
+    def __init__(self, kind, model, fields, get_queryset):
+        self.kind = kind
+        self.model = model
+        self.fields = fields
+        self.get_queryset = get_queryset
+
+
+SEARCH_SOURCES = {
+    source.kind: source
+    for source in [
+        SearchSource(
+            'resume', Resume, ['diagnostic', 'symptomes', 'mesures_prises'],
+            lambda: Resume.objects.annotate(search_dossier_id=F('consultations__dossier_id'), search_date=F('consultations__date')),
+        ),
+        SearchSource(
+            'examen_radiologique', ExamenRadiologique, ['compte_rendu', 'description'],
+            lambda: ExamenRadiologique.objects.annotate(search_dossier_id=F('dossier_patient_id'), search_date=F('date')),
+        ),
+        SearchSource(
+            'soin_infirmier', SoinInfermier, ['observation', 'soin_realise'],
+            lambda: SoinInfermier.objects.annotate(search_dossier_id=F('dossier_id'), search_date=F('date')),
+        ),
+    ]
+}
+SOURCE_BY_MODEL = {source.model: source for source in SEARCH_SOURCES.values()}
+
+
+def index_objects(kind, ids):
+    """
+    (Ré)indexe les objets `ids` d'un type : les documents existants sont
+    remplacés, les objets disparus retirés de l'index. Une requête de lecture,
+    une suppression et deux insertions groupées par appel.
+    """
+    source = SEARCH_SOURCES[kind]
+    ids = list(ids)
+    rows = source.get_queryset().filter(id__in=ids).values('id', 'search_dossier_id', 'search_date', *source.fields)
+
+    documents = []
+    terms_by_object = {}
+    for row in rows:
+        terms = [term for field in source.fields for term in analyze(row[field])]
+        terms_by_object[row['id']] = terms
+        documents.append(SearchDocument(
+            kind=kind, object_id=row['id'], dossier_id=row['search_dossier_id'],
+            date=row['search_date'], length=len(terms),
+        ))
+
+    with transaction.atomic():
+        SearchDocument.objects.filter(kind=kind, object_id__in=ids).delete()
+        SearchDocument.objects.bulk_create(documents)
+        # Toutes les bases ne renvoient pas les clés des lignes insérées en lot (MySQL)
+        document_ids = dict(
+            SearchDocument.objects.filter(kind=kind, object_id__in=terms_by_object).values_list('object_id', 'id')
+        )
+        postings = []
+        for object_id, terms in terms_by_object.items():
+            frequencies = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            postings.extend(
+                SearchPosting(term=term, document_id=document_ids[object_id], frequency=frequency)
+                for term, frequency in frequencies.items()
+            )
+        SearchPosting.objects.bulk_create(postings, batch_size=1000)
+    return len(documents)
+
+
+def remove_objects(kind, ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+class IndexStatistics:
+    """
+    Nombre de documents et longueur moyenne (BM25), relus au plus toutes les
+    `ttl` secondes : une légère dérive n'affecte que marginalement le classement.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._value is None or self._expires_at < time.monotonic():
+                stats = SearchDocument.objects.aggregate(count=Count('id'), total=Sum('length'))
+                count = stats['count'] or 0
+                self._value = (count, (stats['total'] or 0) / count if count else 0)
+                self._expires_at = time.monotonic() + self.ttl
+            return self._value
+
+    def clear(self):
+        with self._lock:
+            self._value = None
+
+
+index_statistics = IndexStatistics()
+
+
+class DocumentFrequencies:
+    """
+    Nombre de documents contenant chaque terme (df), compté par une requête
+    groupée sur `field` de `model` puis gardé `ttl` secondes : la liste d'un
+    terme courant n'est pas recomptée à chaque recherche. Un terme absent de
+    l'index n'est pas gardé, pour être trouvé dès qu'il est indexé.
+    """
+
+    def __init__(self, model, field, ttl=600, max_terms=50000):
+        self.model = model
+        self.field = field
+        self.ttl = ttl
+        self.max_terms = max_terms
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, terms):
+        now = time.monotonic()
+        frequencies = {}
+        with self._lock:
+            for term in terms:
+                cached = self._values.get(term)
+                if cached is not None and cached[1] >= now:
+                    frequencies[term] = cached[0]
+        missing = [term for term in terms if term not in frequencies]
+        if missing:
+            counted = dict(
+                self.model.objects.filter(**{f'{self.field}__in': missing})
+                .values(self.field).annotate(df=Count('id')).values_list(self.field, 'df')
+            )
+            with self._lock:
+                if len(self._values) + len(counted) > self.max_terms:
+                    self._values = {}
+                self._values.update((term, (df, now + self.ttl)) for term, df in counted.items())
+            frequencies.update(counted)
+        return frequencies
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+
+term_frequencies = DocumentFrequencies(SearchPosting, 'term')
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Un terme présent dans plus de cette proportion des documents ne sert qu'à
+# noter les candidats trouvés par les termes plus rares de la requête
+COMMON_TERM_RATIO = 0.2
+# Documents lus par terme de recherche : les plus fréquents d'abord (index terme, -fréquence)
+MAX_POSTINGS_PER_TERM = 5000
+
+
+def search_documents(query, dossier_id=None, kinds=None, limit=20):
+    """
+    Recherche classée (BM25) dans l'index : renvoie [(score, SearchDocument)]
+    par score décroissant. Seules les listes inversées des termes de la requête
+    sont lues (index sur le terme) ; un document correspond dès qu'il contient
+    un des termes.
+
+    Les candidats viennent des termes rares (ou, à défaut, du moins courant),
+    au plus MAX_POSTINGS_PER_TERM documents par terme, pris parmi ceux où il
+    est le plus fréquent ; les termes courants ne font que noter ces candidats.
+    """
+    terms = list(dict.fromkeys(analyze(query)))
+    if not terms:
+        return []
+
+    document_count, average_length = index_statistics.get()
+    frequencies = term_frequencies.get(terms)
+    terms = sorted((term for term in terms if frequencies.get(term)), key=frequencies.get)
+    if not terms or not document_count:
+        return []
+
+    postings = SearchPosting.objects.all()
+    if dossier_id is not None:
+        postings = postings.filter(document__dossier_id=dossier_id)
+    if kinds:
+        postings = postings.filter(document__kind__in=kinds)
+
+    rare = [term for term in terms if frequencies[term] <= COMMON_TERM_RATIO * document_count] or terms[:1]
+    common = terms[len(rare):]
+
+    scores = {}
+
+    def score(rows):
+        for term, document_id, frequency, length in rows:
+            df = frequencies[term]
+            idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1))
+            scores[document_id] = scores.get(document_id, 0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+    columns = ('term', 'document_id', 'frequency', 'document__length')
+    for term in rare:
+        score(postings.filter(term=term).order_by('-frequency', 'document_id').values_list(*columns)[:MAX_POSTINGS_PER_TERM])
+    if common and scores:
+        candidates = list(scores)
+        for start in range(0, len(candidates), 1000):
+            batch = candidates[start:start + 1000]
+            score(postings.filter(term__in=common, document_id__in=batch).values_list(*columns))
+
+    best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+    documents = SearchDocument.objects.in_bulk([document_id for document_id, _ in best])
+    return [(round(value, 4), documents[document_id]) for document_id, value in best]
+
+
+def highlight(text, terms, context=12):
+    """
+    Extrait de `text` autour des mots correspondant à `terms` (termes
+    analysés), mots trouvés entourés de <mark> ; le reste est échappé (HTML).
+    None si aucun mot ne correspond.
+    """
+    if not text:
+        return None
+    words = list(_WORD.finditer(text))
+    hits = [index for index, match in enumerate(words) if analyze_token(match.group()) in terms]
+    if not hits:
+        return None
+
+    first = max(hits[0] - context, 0)
+    last = min(hits[0] + context, len(words) - 1)
+    start = words[first].start() if first else 0
+    end = words[last].end() if last < len(words) - 1 else len(text)
+    parts = ['…' if start > 0 else '']
+    position = start
+    for index in hits:
+        if index > last:
+            break
+        match = words[index]
+        parts.append(escape(text[position:match.start()]))
+        parts.append(f"<mark>{escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(escape(text[position:end]))
+    parts.append('…' if end < len(text) else '')
+    return ''.join(parts)
+
+
+def search(query, dossier_id=None, kinds=None, limit=20):
+    """
+    Résultats de la recherche plein texte, prêts à sérialiser : type, id,
+    dossier, date, score et extraits surlignés des champs correspondants.
+    Les textes sont relus en une requête par type d'objet.
+    """
+    hits = search_documents(query, dossier_id, kinds, limit)
+    terms = set(analyze(query))
+
+    ids_by_kind = {}
+    for _, document in hits:
+        ids_by_kind.setdefault(document.kind, []).append(document.object_id)
+    texts = {
+        kind: {row['id']: row for row in SEARCH_SOURCES[kind].model.objects.filter(id__in=ids).values('id', *SEARCH_SOURCES[kind].fields)}
+        for kind, ids in ids_by_kind.items()
+    }
+
+    results = []
+    for value, document in hits:
+        row = texts[document.kind].get(document.object_id, {})
+        highlights = {}
+        for field in SEARCH_SOURCES[document.kind].fields:
+            fragment = highlight(row.get(field), terms)
+            if fragment:
+                highlights[field] = fragment
+        results.append({
+            'type': document.kind,
+            'id': document.object_id,
+            'dossier': document.dossier_id,
+            'date': document.date,
+            'score': value,
+            'highlights': highlights,
+        })
+    return results
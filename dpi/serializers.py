@@ -1,5 +1,9 @@
 from rest_framework import serializers
 from accounts.models import DossierPatient , Patient ,Technician , User
+from accounts.models import Consultation, ExamenBiologique, ExamenRadiologique, SoinInfermier, Certificat, Ordonnance, DossierSummary
+from consultations.serializers import ResumerSerializer
+from examens.serializers import ResultatExamenSerializer, RadiologyImageSerializer
+from traitements.serializers import MedicamentSerializer
 
 class DossierPatientSerializer(serializers.ModelSerializer):
     class Meta:
@@ -68,3 +72,90 @@ class UserPatientSerializer (serializers.ModelSerializer) :
             'password', 'personne_a_contacter', 'nss', 'email' , 'medecin_traitant'
         ]  
 
+
+
+
+# une ligne de l'import en masse : pas de ModelSerializer ici, sinon chaque ligne
+# déclenche ses propres requêtes (unicité du nss, existence du médecin traitant)
+class PatientBulkRowSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(write_only=True)
+    nom = serializers.CharField(max_length=50)
+    prenom = serializers.CharField(max_length=50)
+    date_naissance = serializers.DateField()
+    adresse = serializers.CharField()
+    tel = serializers.CharField(max_length=15)
+    mutuelle = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    personne_a_contacter = serializers.CharField(max_length=100)
+    nss = serializers.CharField(max_length=100)
+    medecin_traitant = serializers.IntegerField(required=False, allow_null=True)
+
+
+
+# chronologie du dossier : les relations sont chargées par select_related / prefetch
+# dans dpi/timeline.py, ces serializers ne déclenchent donc aucune requête
+class TimelineOrdonnanceSerializer(serializers.ModelSerializer):
+    medicaments = MedicamentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Ordonnance
+        fields = ['id', 'date', 'validation', 'medicaments']
+
+
+class TimelineConsultationSerializer(serializers.ModelSerializer):
+    medecin = TechnicianSerializer(read_only=True)
+    resume = ResumerSerializer(read_only=True)
+    ordonnance = TimelineOrdonnanceSerializer(read_only=True)
+
+    class Meta:
+        model = Consultation
+        fields = ['id', 'date', 'medecin', 'diagnosticStatut', 'resume', 'ordonnance']
+
+
+class TimelineExamenBiologiqueSerializer(serializers.ModelSerializer):
+    technicien = TechnicianSerializer(read_only=True)
+    laborantin = TechnicianSerializer(read_only=True)
+    resultats = ResultatExamenSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ExamenBiologique
+        fields = ['id', 'date', 'technicien', 'laborantin', 'description', 'resultats']
+
+
+class TimelineExamenRadiologiqueSerializer(serializers.ModelSerializer):
+    technicien = TechnicianSerializer(read_only=True)
+    radiologue = TechnicianSerializer(read_only=True)
+    images = RadiologyImageSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ExamenRadiologique
+        fields = ['id', 'date', 'technicien', 'radiologue', 'compte_rendu', 'description', 'images']
+
+
+class TimelineSoinInfermierSerializer(serializers.ModelSerializer):
+    infirmier = TechnicianSerializer(read_only=True)
+    medicaments = MedicamentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = SoinInfermier
+        fields = ['id', 'date', 'heure', 'infirmier', 'observation', 'soin_realise', 'medicaments']
+
+
+class TimelineCertificatSerializer(serializers.ModelSerializer):
+    medecin = TechnicianSerializer(read_only=True)
+
+    class Meta:
+        model = Certificat
+        fields = ['id', 'date', 'medecin', 'contenu']
+
+
+
+class DossierSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DossierSummary
+        fields = [
+            'dossier', 'consultations_count', 'last_consultation_date',
+            'examens_biologiques_count', 'last_examen_biologique_date',
+            'examens_radiologiques_count', 'last_examen_radiologique_date',
+            'pending_ordonnances_count', 'radiology_images_count', 'updated_at',
+        ]
@@ -0,0 +1,122 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import Patient, DossierPatient
+from accounts.models import Consultation, ExamenBiologique, ExamenRadiologique, RadiologyImage, Ordonnance
+from accounts.models import Resume, SoinInfermier
+from .lookup import patient_lookup_cache
+from .summary import record_created, refresh_summary
+from .search import SOURCE_BY_MODEL, index_objects, remove_objects
+from .names import index_patient_names
+
+
+@receiver([post_save, post_delete], sender=Patient)
+def invalidate_patient_lookup(sender, instance, **kwargs):
+    patient_lookup_cache.invalidate_patient(instance.id)
+
+
+# Index des noms (recherche approchée) : seules les clés modifiées sont réécrites
+@receiver(post_save, sender=Patient)
+def index_patient_name(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_patient_names([instance.id])
+
+
+@receiver([post_save, post_delete], sender=DossierPatient)
+def invalidate_dossier_lookup(sender, instance, **kwargs):
+    patient_lookup_cache.invalidate_patient(instance.patient_id)
+
+
+
+# DossierSummary : incrément à la création, recalcul du dossier sinon
+
+@receiver(post_save, sender=DossierPatient)
+def create_dossier_summary(sender, instance, created, **kwargs):
+    if created:
+        refresh_summary(instance.id)
+
+
+@receiver(post_save, sender=Consultation)
+def summary_consultation_saved(sender, instance, created, **kwargs):
+    if created and instance.ordonnance_id is None:
+        record_created(instance.dossier_id, 'consultations_count', 'last_consultation_date', instance.date)
+    else:
+        refresh_summary(instance.dossier_id)
+
+
+@receiver(post_save, sender=ExamenBiologique)
+def summary_examen_biologique_saved(sender, instance, created, **kwargs):
+    if created:
+        record_created(instance.dossier_patient_id, 'examens_biologiques_count', 'last_examen_biologique_date', instance.date)
+    else:
+        refresh_summary(instance.dossier_patient_id)
+
+
+@receiver(post_save, sender=ExamenRadiologique)
+def summary_examen_radiologique_saved(sender, instance, created, **kwargs):
+    if created:
+        record_created(instance.dossier_patient_id, 'examens_radiologiques_count', 'last_examen_radiologique_date', instance.date)
+    else:
+        refresh_summary(instance.dossier_patient_id)
+
+
+@receiver(post_delete, sender=Consultation)
+def summary_consultation_deleted(sender, instance, **kwargs):
+    refresh_summary(instance.dossier_id, create=False)
+
+
+@receiver(post_delete, sender=ExamenBiologique)
+@receiver(post_delete, sender=ExamenRadiologique)
+def summary_examen_deleted(sender, instance, **kwargs):
+    refresh_summary(instance.dossier_patient_id, create=False)
+
+
+@receiver([post_save, post_delete], sender=RadiologyImage)
+def summary_radiology_image_changed(sender, instance, **kwargs):
+    dossier_id = ExamenRadiologique.objects.filter(id=instance.examen_radiologique_id).values_list('dossier_patient_id', flat=True).first()
+    if dossier_id is None:
+        return
+    if kwargs.get('created'):
+        record_created(dossier_id, 'radiology_images_count')
+    else:
+        refresh_summary(dossier_id, create=False)
+
+
+# une ordonnance n'est liée au dossier que par ses consultations : à la suppression,
+# le lien est mis à NULL sans signal, les dossiers sont donc relevés avant
+@receiver(pre_delete, sender=Ordonnance)
+def summary_ordonnance_deleting(sender, instance, **kwargs):
+    instance._summary_dossier_ids = set(Consultation.objects.filter(ordonnance_id=instance.id).values_list('dossier_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Ordonnance)
+def summary_ordonnance_changed(sender, instance, **kwargs):
+    dossier_ids = getattr(instance, '_summary_dossier_ids', None)
+    if dossier_ids is None:
+        dossier_ids = set(Consultation.objects.filter(ordonnance_id=instance.id).values_list('dossier_id', flat=True))
+    for dossier_id in dossier_ids:
+        refresh_summary(dossier_id, create=False)
+
+
+
+# Index plein texte (dpi/search.py) : réindexation de l'objet à chaque écriture
+
+@receiver(post_save, sender=Resume)
+@receiver(post_save, sender=ExamenRadiologique)
+@receiver(post_save, sender=SoinInfermier)
+def search_index_saved(sender, instance, **kwargs):
+    index_objects(SOURCE_BY_MODEL[sender].kind, [instance.id])
+
+
+@receiver(post_delete, sender=Resume)
+@receiver(post_delete, sender=ExamenRadiologique)
+@receiver(post_delete, sender=SoinInfermier)
+def search_index_deleted(sender, instance, **kwargs):
+    remove_objects(SOURCE_BY_MODEL[sender].kind, [instance.id])
+
+
+# le dossier et la date d'un résumé sont ceux de sa consultation
+@receiver([post_save, post_delete], sender=Consultation)
+def search_index_consultation_changed(sender, instance, **kwargs):
+    if instance.resume_id is not None:
+        index_objects('resume', [instance.resume_id])
@@ -0,0 +1,110 @@
+from django.db import connection
+from django.db.models import Count, DateField, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from accounts.models import (
+    DossierPatient, DossierSummary, Consultation, ExamenBiologique, ExamenRadiologique, RadiologyImage,
+)
+
+
+SUMMARY_FIELDS = [
+    'consultations_count', 'last_consultation_date',
+    'examens_biologiques_count', 'last_examen_biologique_date',
+    'examens_radiologiques_count', 'last_examen_radiologique_date',
+    'pending_ordonnances_count', 'radiology_images_count',
+]
+
+
+def compute_summaries(dossier_ids):
+    """
+    Calcule les résumés d'un lot de dossiers : cinq requêtes groupées par
+    dossier, quel que soit le nombre de dossiers du lot.
+    """
+    summaries = {dossier_id: {field: None if field.startswith('last_') else 0 for field in SUMMARY_FIELDS}
+                 for dossier_id in dossier_ids}
+
+    def collect(rows, count_field, date_field=None):
+        for row in rows:
+            summary = summaries[row['key']]
+            summary[count_field] = row['count']
+            if date_field:
+                summary[date_field] = row['last']
+
+    collect(
+        Consultation.objects.filter(dossier_id__in=dossier_ids)
+        .values(key=F('dossier_id')).annotate(count=Count('id'), last=Max('date')),
+        'consultations_count', 'last_consultation_date',
+    )
+    collect(
+        ExamenBiologique.objects.filter(dossier_patient_id__in=dossier_ids)
+        .values(key=F('dossier_patient_id')).annotate(count=Count('id'), last=Max('date')),
+        'examens_biologiques_count', 'last_examen_biologique_date',
+    )
+    collect(
+        ExamenRadiologique.objects.filter(dossier_patient_id__in=dossier_ids)
+        .values(key=F('dossier_patient_id')).annotate(count=Count('id'), last=Max('date')),
+        'examens_radiologiques_count', 'last_examen_radiologique_date',
+    )
+    # Une ordonnance n'est rattachée au dossier qu'à travers ses consultations
+    collect(
+        Consultation.objects.filter(dossier_id__in=dossier_ids, ordonnance__validation=False)
+        .values(key=F('dossier_id')).annotate(count=Count('ordonnance_id', distinct=True)),
+        'pending_ordonnances_count',
+    )
+    collect(
+        RadiologyImage.objects.filter(examen_radiologique__dossier_patient_id__in=dossier_ids)
+        .values(key=F('examen_radiologique__dossier_patient_id')).annotate(count=Count('id')),
+        'radiology_images_count',
+    )
+    return summaries
+
+
+def rebuild_summaries(dossier_ids):
+    """
+    Recalcule et enregistre (upsert) les résumés d'un lot de dossiers existants.
+    """
+    summaries = compute_summaries(list(dossier_ids))
+    objs = [DossierSummary(dossier_id=dossier_id, **fields) for dossier_id, fields in summaries.items()]
+    # MySQL résout le conflit sur n'importe quelle clé unique et refuse unique_fields
+    unique_fields = ['dossier'] if connection.features.supports_update_conflicts_with_target else None
+    DossierSummary.objects.bulk_create(
+        objs, update_conflicts=True, unique_fields=unique_fields, update_fields=SUMMARY_FIELDS + ['updated_at'],
+    )
+    return len(objs)
+
+
+def refresh_summary(dossier_id, create=True):
+    """
+    Recalcule le résumé d'un dossier. Avec create=False (suppressions), seule
+    une ligne existante est mise à jour : le dossier peut être en cours de suppression.
+    """
+    fields = compute_summaries([dossier_id])[dossier_id]
+    updated = DossierSummary.objects.filter(dossier_id=dossier_id).update(updated_at=timezone.now(), **fields)
+    if not updated and create and DossierPatient.objects.filter(id=dossier_id).exists():
+        rebuild_summaries([dossier_id])
+
+
+def record_created(dossier_id, count_field, date_field=None, date=None):
+    """
+    Mise à jour incrémentale à la création d'un élément : compteur + 1 et
+    dernière date = max(dernière date, date), en une requête UPDATE.
+    """
+    changes = {count_field: F(count_field) + 1, 'updated_at': timezone.now()}
+    if date_field:
+        date = Value(date, output_field=DateField())
+        changes[date_field] = Greatest(Coalesce(F(date_field), date), date)
+    if not DossierSummary.objects.filter(dossier_id=dossier_id).update(**changes):
+        refresh_summary(dossier_id)
+
+
+def get_summary(dossier_id):
+    """
+    Résumé d'un dossier, construit à la première lecture s'il n'existe pas encore
+    (dossiers créés par bulk_create, qui n'émet pas de signaux). None si le dossier n'existe pas.
+    """
+    summary = DossierSummary.objects.filter(dossier_id=dossier_id).first()
+    if summary is None and DossierPatient.objects.filter(id=dossier_id).exists():
+        rebuild_summaries([dossier_id])
+        summary = DossierSummary.objects.get(dossier_id=dossier_id)
+    return summary
@@ -0,0 +1,93 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import User, Patient, DossierPatient
+
+
+@pytest.fixture
+def api_client():
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(email='admin@example.com', password='password123', role='administratif'))
+    return client
+
+
+def patient_row(i, **overrides):
+    row = {
+        'email': f'patient{i}@example.com',
+        'password': 'password123',
+        'nom': f'Nom{i}',
+        'prenom': 'Prenom',
+        'date_naissance': '1990-01-01',
+        'adresse': 'Alger',
+        'tel': '0555000000',
+        'personne_a_contacter': 'Contact',
+        'nss': f'NSS{i}',
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.django_db
+def test_bulk_registration_json_with_row_errors(api_client):
+    Patient.objects.create(
+        user=User.objects.create_user(email='existing@example.com', password='x', role='patient'),
+        nom='Old', prenom='P', date_naissance='1990-01-01', adresse='a', tel='0', personne_a_contacter='c', nss='NSS-TAKEN'
+    )
+    rows = [
+        patient_row(0),
+        patient_row(1, nss='NSS-TAKEN'),
+        patient_row(2, email='patient0@example.com'),
+        patient_row(3, date_naissance='not-a-date'),
+        patient_row(4, medecin_traitant=999),
+        patient_row(5),
+    ]
+
+    response = api_client.post('/dpi/registerUserPatient/bulk/', rows, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['created'] == 2
+    assert [row['status'] for row in response.data['rows']] == ['created', 'error', 'error', 'error', 'error', 'created']
+    assert 'nss' in response.data['rows'][1]['errors']
+    assert 'email' in response.data['rows'][2]['errors']
+    assert 'date_naissance' in response.data['rows'][3]['errors']
+    assert 'medecin_traitant' in response.data['rows'][4]['errors']
+
+    dossier = DossierPatient.objects.get(id=response.data['rows'][0]['dossier_id'])
+    assert dossier.patient.nss == 'NSS0'
+    assert dossier.patient.user.check_password('password123')
+    assert dossier.patient.user.role == 'patient'
+
+
+@pytest.mark.django_db
+def test_bulk_registration_csv(api_client):
+    content = (
+        "email,password,nom,prenom,date_naissance,adresse,tel,mutuelle,personne_a_contacter,nss,medecin_traitant\n"
+        "a@example.com,password123,A,Pa,1990-01-01,Alger,0555,,Contact,CSV1,\n"
+        "b@example.com,password123,B,Pb,1991-02-02,Oran,0666,CNAS,Contact,CSV2,\n"
+    )
+    upload = SimpleUploadedFile('patients.csv', content.encode(), content_type='text/csv')
+
+    response = api_client.post('/dpi/registerUserPatient/bulk/', {'file': upload}, format='multipart')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['created'] == 2
+    assert set(Patient.objects.values_list('nss', flat=True)) == {'CSV1', 'CSV2'}
+
+
+@pytest.mark.django_db
+def test_bulk_registration_requires_rows(api_client):
+    response = api_client.post('/dpi/registerUserPatient/bulk/', {'patients': []}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_bulk_registration_rejects_malformed_bodies(api_client):
+    assert api_client.post('/dpi/registerUserPatient/bulk/', 'patients', format='json').status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.post('/dpi/registerUserPatient/bulk/', 42, format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+    content = "email,nom\n" + "x" * 200000 + ",A\n"
+    upload = SimpleUploadedFile('patients.csv', content.encode(), content_type='text/csv')
+    response = api_client.post('/dpi/registerUserPatient/bulk/', {'file': upload}, format='multipart')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'Invalid CSV file' in response.data['error']
@@ -0,0 +1,128 @@
+import pytest
+from datetime import date
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import (
+    Consultation, Resume, ExamenRadiologique, SoinInfermier,
+    SearchDocument, SearchPosting,
+)
+from dpi import search as search_module
+from dpi.search import analyze, highlight, index_statistics, search_documents, term_frequencies
+
+
+@pytest.fixture(autouse=True)
+def fresh_statistics():
+    index_statistics.clear()
+    term_frequencies.clear()
+    yield
+    index_statistics.clear()
+    term_frequencies.clear()
+
+
+@pytest.fixture
+def api_client(api_client, medecin):
+    api_client.force_authenticate(user=medecin.user)
+    return api_client
+
+
+def test_analyze_folds_accents_drops_stop_words_and_stems():
+    assert analyze("Œdème pulmonaire et fractures") == ['oedem', 'pulmonair', 'fractur']
+    assert analyze("Fracturée") == analyze("fracture") == analyze("FRACTURES")
+    assert analyze("les résultats normaux") == analyze("résultat normal")
+
+
+def test_highlight_marks_matching_words_and_escapes_html():
+    fragment = highlight("Suspicion <b>d'œdème</b> aigu", set(analyze("oedemes")))
+    assert fragment == "Suspicion &lt;b&gt;d&#x27;<mark>œdème</mark>&lt;/b&gt; aigu"
+    assert highlight("Pansement", set(analyze("fracture"))) is None
+
+
+@pytest.mark.django_db
+def test_index_follows_writes(medecin, make_dossier):
+    dossier = make_dossier(1)
+    resume = Resume.objects.create(diagnostic='Grippe saisonnière')
+    consultation = Consultation.objects.create(date=date(2024, 3, 1), medecin=medecin, dossier=dossier, resume=resume)
+
+    document = SearchDocument.objects.get(kind='resume', object_id=resume.id)
+    assert (document.dossier_id, document.date, document.length) == (dossier.id, date(2024, 3, 1), 2)
+    assert set(SearchPosting.objects.filter(document=document).values_list('term', flat=True)) == {'gripp', 'saisonnier'}
+
+    resume.diagnostic = 'Angine'
+    resume.save()
+    assert list(SearchPosting.objects.values_list('term', flat=True)) == ['angin']
+
+    consultation.delete()
+    assert SearchDocument.objects.get(kind='resume', object_id=resume.id).dossier_id is None
+    resume.delete()
+    assert not SearchDocument.objects.exists()
+    assert not SearchPosting.objects.exists()
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_highlights(api_client, make_dossier):
+    dossier = make_dossier(1)
+    ExamenRadiologique.objects.create(date=date(2024, 1, 2), dossier_patient=dossier, compte_rendu='Fracture du radius, fracture déplacée.')
+    ExamenRadiologique.objects.create(date=date(2024, 1, 3), dossier_patient=dossier, compte_rendu='Pas de fracture visible, contrôle du radius dans un mois et bilan complet prévu.')
+    SoinInfermier.objects.create(date=date(2024, 1, 4), dossier=dossier, soin_realise='Pansement', observation='Plaie propre')
+
+    response = api_client.get('/dpi/search/', {'q': 'fractures'})
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.data['results']
+    assert [r['type'] for r in results] == ['examen_radiologique', 'examen_radiologique']
+    assert results[0]['date'] == date(2024, 1, 2)
+    assert results[0]['score'] > results[1]['score']
+    assert results[0]['highlights'] == {'compte_rendu': '<mark>Fracture</mark> du radius, <mark>fracture</mark> déplacée.'}
+
+    response = api_client.get('/dpi/search/', {'q': 'plaies', 'type': 'soin_infirmier'})
+    assert response.data['results'][0]['highlights'] == {'observation': '<mark>Plaie</mark> propre'}
+
+    assert api_client.get('/dpi/search/', {'q': 'de la'}).data == {'results': []}
+    assert api_client.get('/dpi/search/').status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get('/dpi/search/', {'q': 'plaie', 'type': 'certificat'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+
+@pytest.mark.django_db
+def test_search_caches_frequencies_and_caps_postings_per_term(make_dossier, monkeypatch):
+    dossier = make_dossier(1)
+    for text in ['Toux', 'Toux toux', 'Toux toux toux', 'Fièvre']:
+        SoinInfermier.objects.create(date=date(2024, 1, 1), dossier=dossier, observation=text)
+    assert len(search_documents('toux')) == 3
+
+    # df relue du cache : plus de comptage des listes inversées
+    with CaptureQueriesContext(connection) as queries:
+        search_documents('toux')
+    assert not [q for q in queries.captured_queries if 'COUNT(' in q['sql'] and 'accounts_searchposting' in q['sql']]
+
+    # Seuls les documents où le terme est le plus fréquent sont lus
+    monkeypatch.setattr(search_module, 'MAX_POSTINGS_PER_TERM', 2)
+    assert [document.length for _, document in search_documents('toux')] == [3, 2]
+
+
+@pytest.mark.django_db
+def test_patient_only_searches_own_dossier(make_dossier):
+    own, other = make_dossier(1), make_dossier(2)
+    SoinInfermier.objects.create(date=date(2024, 1, 1), dossier=own, soin_realise='Injection insuline')
+    SoinInfermier.objects.create(date=date(2024, 1, 1), dossier=other, soin_realise='Injection insuline')
+    client = APIClient()
+    client.force_authenticate(user=own.patient.user)
+
+    response = client.get('/dpi/search/', {'q': 'insuline'})
+
+    assert [r['dossier'] for r in response.data['results']] == [own.id]
+    assert client.get('/dpi/search/', {'q': 'insuline', 'dossier': other.id}).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index_command(make_dossier):
+    dossier = make_dossier(1)
+    soin = SoinInfermier.objects.create(date=date(2024, 1, 1), dossier=dossier, soin_realise='Injection')
+    SoinInfermier.objects.filter(id=soin.id).update(soin_realise='Perfusion')  # sans signal
+
+    call_command('rebuild_search_index', batch_size=1)
+
+    assert list(SearchPosting.objects.values_list('term', flat=True)) == ['perfusion']
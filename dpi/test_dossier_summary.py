@@ -0,0 +1,90 @@
+import pytest
+from datetime import date
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import (
+    DossierPatient, DossierSummary, Consultation, Ordonnance,
+    ExamenBiologique, ExamenRadiologique, RadiologyImage,
+)
+
+
+@pytest.fixture
+def dossier(make_dossier, medecin, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return make_dossier(medecin_traitant=medecin)
+
+
+def summary_of(dossier):
+    return DossierSummary.objects.get(dossier=dossier)
+
+
+@pytest.mark.django_db
+def test_summary_follows_every_write(medecin, dossier):
+    assert summary_of(dossier).consultations_count == 0
+
+    Consultation.objects.create(date=date(2024, 1, 5), medecin=medecin, dossier=dossier)
+    Consultation.objects.create(date=date(2024, 1, 2), medecin=medecin, dossier=dossier)
+    ordonnance = Ordonnance.objects.create(date=date(2024, 1, 7))
+    consultation = Consultation.objects.create(date=date(2024, 1, 7), medecin=medecin, dossier=dossier, ordonnance=ordonnance)
+    examen = ExamenRadiologique.objects.create(date=date(2024, 1, 3), technicien=medecin, dossier_patient=dossier)
+    RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile('a.png', b'x'))
+    RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile('b.png', b'x'))
+    ExamenBiologique.objects.create(date=date(2024, 1, 4), technicien=medecin, dossier_patient=dossier)
+
+    summary = summary_of(dossier)
+    assert summary.consultations_count == 3
+    assert summary.last_consultation_date == date(2024, 1, 7)
+    assert summary.pending_ordonnances_count == 1
+    assert summary.examens_radiologiques_count == 1
+    assert summary.radiology_images_count == 2
+    assert summary.examens_biologiques_count == 1
+    assert summary.last_examen_biologique_date == date(2024, 1, 4)
+
+    ordonnance.validation = True
+    ordonnance.save()
+    assert summary_of(dossier).pending_ordonnances_count == 0
+
+    consultation.delete()
+    examen.delete()
+    summary = summary_of(dossier)
+    assert summary.consultations_count == 2
+    assert summary.last_consultation_date == date(2024, 1, 5)
+    assert summary.examens_radiologiques_count == 0
+    assert summary.radiology_images_count == 0
+
+
+@pytest.mark.django_db
+def test_dossier_deletion_removes_summary(medecin, dossier):
+    Consultation.objects.create(date=date(2024, 1, 5), medecin=medecin, dossier=dossier)
+    dossier.delete()
+    assert not DossierSummary.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_command_and_api(medecin, dossier):
+    Consultation.objects.create(date=date(2024, 1, 5), medecin=medecin, dossier=dossier)
+    DossierSummary.objects.all().delete()
+
+    call_command('rebuild_dossier_summaries', batch_size=1)
+    assert summary_of(dossier).consultations_count == 1
+
+    client = APIClient()
+    client.force_authenticate(user=medecin.user)
+    response = client.get(f'/dpi/dossier/{dossier.id}/summary/')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['consultations_count'] == 1
+    assert response.data['last_consultation_date'] == '2024-01-05'
+
+    assert client.get('/dpi/dossier/9999/summary/').status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_patient_only_reads_own_summary(dossier, make_dossier):
+    other = make_dossier(1)
+    client = APIClient()
+    client.force_authenticate(user=dossier.patient.user)
+
+    assert client.get(f'/dpi/dossier/{dossier.id}/summary/').status_code == status.HTTP_200_OK
+    assert client.get(f'/dpi/dossier/{other.id}/summary/').status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,98 @@
+import pytest
+from datetime import date
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import User, Technician, ExamenRadiologique, RadiologyImage
+from dpi.media import media_dossier_ids
+
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def image(settings, tmp_path, make_dossier):
+    settings.MEDIA_ROOT = str(tmp_path)
+    examen = ExamenRadiologique.objects.create(date=date(2024, 6, 1), dossier_patient=make_dossier(0))
+    return RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile('scan.png', CONTENT))
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_media_full_range_and_revalidation(image):
+    client = client_for(image.examen_radiologique.dossier_patient.patient.user)
+    url = image.image.url
+
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'image/png'
+    assert response['Accept-Ranges'] == 'bytes'
+    assert body(response) == CONTENT
+
+    response = client.get(url, HTTP_RANGE='bytes=100-199')
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+    assert response['Content-Length'] == '100'
+    assert body(response) == CONTENT[100:200]
+
+    response = client.get(url, HTTP_RANGE='bytes=-10')
+    assert body(response) == CONTENT[-10:]
+
+    response = client.get(url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+    etag = client.get(url)['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+    # If-Range périmé : le fichier entier est renvoyé
+    response = client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+    assert response.status_code == status.HTTP_200_OK
+    assert body(response) == CONTENT
+
+
+@pytest.mark.django_db
+def test_media_access_is_tied_to_the_dossier(image, make_dossier, laborantin):
+    url = image.image.url
+    other_patient = make_dossier(1).patient.user
+    assert client_for(other_patient).get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    user = User.objects.create_user(email='radio@example.com', password='password123', role='technicien')
+    Technician.objects.create(user=user, nom='Radio', prenom='Rania', role='radiologue')
+    assert client_for(user).get(url).status_code == status.HTTP_200_OK
+
+    assert client_for(laborantin.user).get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    assert APIClient().get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_media_unknown_or_unreferenced_files(image, settings, tmp_path):
+    client = client_for(image.examen_radiologique.dossier_patient.patient.user)
+    (tmp_path / 'radiology_images' / 'orphan.png').write_bytes(b'x')
+
+    assert client.get('/media/radiology_images/orphan.png').status_code == status.HTTP_404_NOT_FOUND
+    assert client.get('/media/other/file.txt').status_code == status.HTTP_404_NOT_FOUND
+    assert client.get('/media/radiology_images/../../etc/passwd').status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_media_owner_of_each_rendition(image):
+    RadiologyImage.objects.filter(pk=image.pk).update(
+        thumbnail='radiology_images/thumbnails/ab/scan.jpg', web_image='radiology_images/web/ab/scan.jpg',
+    )
+    dossier_id = image.examen_radiologique.dossier_patient_id
+
+    assert media_dossier_ids(image.image.name) == {dossier_id}
+    assert media_dossier_ids('radiology_images/thumbnails/ab/scan.jpg') == {dossier_id}
+    assert media_dossier_ids('radiology_images/web/ab/scan.jpg') == {dossier_id}
+    assert media_dossier_ids('radiology_images/web/ab/other.jpg') == set()
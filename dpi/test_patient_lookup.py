@@ -0,0 +1,44 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from dpi.lookup import patient_lookup_cache, lookup_dossier_by_nss, lookup_dossier_by_id_and_nom
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    patient_lookup_cache.clear()
+    yield
+    patient_lookup_cache.clear()
+
+
+@pytest.mark.django_db
+def test_lookup_by_nss_single_query_then_cached(dossier):
+    with CaptureQueriesContext(connection) as first:
+        assert lookup_dossier_by_nss('123456789012345') == (dossier.patient_id, dossier.id)
+    assert len(first.captured_queries) == 1
+
+    with CaptureQueriesContext(connection) as second:
+        assert lookup_dossier_by_nss('123456789012345') == (dossier.patient_id, dossier.id)
+    assert len(second.captured_queries) == 0
+
+
+@pytest.mark.django_db
+def test_lookup_invalidated_on_patient_save(dossier):
+    lookup_dossier_by_nss('123456789012345')
+
+    patient = dossier.patient
+    patient.nss = '999'
+    patient.save()
+
+    assert lookup_dossier_by_nss('123456789012345') is None
+    assert lookup_dossier_by_nss('999') == (patient.id, dossier.id)
+
+
+@pytest.mark.django_db
+def test_lookup_invalidated_on_dossier_delete(dossier):
+    patient_id = dossier.patient_id
+    assert lookup_dossier_by_id_and_nom(patient_id, 'Rofieda') == (patient_id, dossier.id)
+
+    dossier.delete()
+
+    assert lookup_dossier_by_id_and_nom(patient_id, 'Rofieda') == (patient_id, None)
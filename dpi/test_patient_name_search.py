@@ -0,0 +1,129 @@
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import User, PatientNameKey
+from dpi.bulk import register_patients_bulk
+from dpi import names
+from dpi.names import key_frequencies, name_keys, phonetic_key, search_patient_names
+
+
+@pytest.fixture
+def create_patient(make_dossier):
+    def create(index, nom, prenom):
+        return make_dossier(index, nom=nom, prenom=prenom).patient
+    return create
+
+
+@pytest.fixture(autouse=True)
+def fresh_frequencies():
+    key_frequencies.clear()
+    yield
+    key_frequencies.clear()
+
+
+@pytest.fixture
+def api_client(api_client):
+    user = User.objects.create_user(email='accueil@example.com', password='password123', role='administratif')
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def test_phonetic_key_groups_french_spellings():
+    assert phonetic_key('dupont') == phonetic_key('dupond') == phonetic_key('dupon')
+    assert phonetic_key('philippe') == phonetic_key('filip')
+    assert phonetic_key('gauthier') == phonetic_key('gautier')
+    assert '#DPN' in name_keys('Dupont') and '  d' in name_keys('Dupont')
+
+
+@pytest.mark.django_db
+def test_name_keys_follow_patient_writes(create_patient):
+    patient = create_patient(1, 'Dupont', 'Jean')
+    assert set(PatientNameKey.objects.filter(patient=patient).values_list('key', flat=True)) == name_keys('Dupont', 'Jean')
+
+    patient.nom = 'Martin'
+    patient.save()
+    assert set(PatientNameKey.objects.filter(patient=patient).values_list('key', flat=True)) == name_keys('Martin', 'Jean')
+
+    patient.delete()
+    assert not PatientNameKey.objects.exists()
+
+
+@pytest.mark.django_db
+def test_fuzzy_search_ranks_closest_names_first(api_client, create_patient):
+    dupont = create_patient(1, 'Dupont', 'Jean')
+    create_patient(2, 'Durand', 'Jeanne')
+    create_patient(3, 'Benali', 'Yacine')
+    lefevre = create_patient(4, 'Lefèvre', 'Stéphane')
+
+    response = api_client.get('/dpi/search-patient-name/', {'q': 'dupond jan'})
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.data['results']
+    assert results[0]['id'] == dupont.id
+    assert results[0]['dossier'] == dupont.dossier.id
+    assert results[0]['score'] > results[1]['score']
+    assert dupont.id not in [r['id'] for r in results[1:]]
+
+    assert api_client.get('/dpi/search-patient-name/', {'q': 'stefan lefevre', 'limit': 1}).data['results'][0]['id'] == lefevre.id
+    assert api_client.get('/dpi/search-patient-name/').status_code == status.HTTP_400_BAD_REQUEST
+
+
+
+@pytest.mark.django_db
+def test_rare_keys_pick_candidates_among_same_prefix_names(create_patient, monkeypatch):
+    monkeypatch.setattr(names, 'CANDIDATES', 5)
+    # Autant de clés communes avec 'jean zoe' que la patiente cherchée, mais seulement les plus répandues
+    for index in range(20):
+        create_patient(index, 'Zora', 'Jeanne')
+    zoe = create_patient(20, 'Zoé', 'Jaen')
+
+    results = search_patient_names('jean zoe', limit=3)
+
+    assert results[0][1]['id'] == zoe.id
+    assert results[0][0] > results[1][0]
+
+
+@pytest.mark.django_db
+def test_typo_keys_do_not_crowd_out_the_searched_name(create_patient, monkeypatch):
+    monkeypatch.setattr(names, 'CANDIDATE_KEYS', 3)
+    # Homonymes : leurs clés sont plus répandues que les trigrammes nés des fautes ('pom', 'omt', 'jez')
+    dupont = create_patient(1, 'Dupont', 'Jean')
+    create_patient(2, 'Dupont', 'Jean')
+    for index, (nom, prenom) in enumerate([('Pompidou', 'Lina'), ('Comte', 'Ali'), ('Jezequel', 'Marc')], start=3):
+        create_patient(index, nom, prenom)
+
+    results = search_patient_names('dupomt jezn')
+
+    assert results[0][1]['id'] == dupont.id
+    assert [row['nom'] for _, row in results[:2]] == ['Dupont', 'Dupont']
+
+
+@pytest.mark.django_db
+def test_patients_cannot_search_names(create_patient):
+    patient = create_patient(1, 'Dupont', 'Jean')
+    client = APIClient()
+    client.force_authenticate(user=patient.user)
+    assert client.get('/dpi/search-patient-name/', {'q': 'dupont'}).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_bulk_registered_patients_are_indexed():
+    register_patients_bulk([{
+        'email': 'bulk@example.com', 'password': 'password123', 'nom': 'Gauthier', 'prenom': 'Lina',
+        'date_naissance': '2001-01-01', 'adresse': 'kouba', 'tel': '0123456789',
+        'personne_a_contacter': 'Contact', 'nss': 'nss-bulk',
+    }])
+
+    assert [row['nom'] for _, row in search_patient_names('gautier')] == ['Gauthier']
+
+
+@pytest.mark.django_db
+def test_rebuild_patient_name_index_command(create_patient):
+    patient = create_patient(1, 'Dupont', 'Jean')
+    PatientNameKey.objects.all().delete()
+    assert search_patient_names('dupont') == []
+
+    call_command('rebuild_patient_name_index', batch_size=1)
+
+    assert [row['id'] for _, row in search_patient_names('dupont')] == [patient.id]
@@ -0,0 +1,66 @@
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import DossierPatient
+from dpi.qr import generate_qr_codes
+
+
+@pytest.fixture
+def dossiers(settings, tmp_path, make_dossier):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return [make_dossier(i, nom=f'Patient{i}') for i in range(3)]
+
+
+@pytest.mark.django_db
+def test_generate_qr_codes_fills_pending_dossiers(dossiers):
+    assert generate_qr_codes([d.id for d in dossiers]) == 3
+
+    for dossier in dossiers:
+        dossier.refresh_from_db()
+        # stockage adressé par contenu : qr_code/<xx>/<empreinte>.png
+        assert dossier.qr.name.startswith('qr_code/') and dossier.qr.name.endswith('.png')
+
+    # Déjà générés : rien à refaire
+    assert generate_qr_codes([d.id for d in dossiers]) == 0
+
+
+@pytest.mark.django_db
+def test_generate_pending_qr_codes_command(dossiers):
+    call_command('generate_pending_qr_codes', batch_size=2)
+
+    assert not DossierPatient.objects.filter(qr='').exists()
+    assert not DossierPatient.objects.filter(qr__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_qr_code_endpoint_renders_and_revalidates(dossiers):
+    client = APIClient()
+    client.force_authenticate(user=dossiers[0].patient.user)
+    url = f'/dpi/dossier/{dossiers[0].id}/qr.png'
+
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'image/png'
+    assert response.content.startswith(b'\x89PNG')
+    assert response['Last-Modified']
+    assert response['Cache-Control'] == 'private, no-cache'
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = client.get(f'/dpi/dossier/{dossiers[0].id}/qr.svg')
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'image/svg+xml'
+
+    assert client.get(f'/dpi/dossier/{dossiers[0].id}/qr.gif').status_code == status.HTTP_404_NOT_FOUND
+    assert client.get(f'/dpi/dossier/{dossiers[1].id}/qr.png').status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_search_patient_by_dossier_returns_stable_qr_url(dossiers):
+    client = APIClient()
+    client.force_authenticate(user=dossiers[0].patient.user)
+
+    response = client.get(f'/dpi/search-patient/{dossiers[0].id}/')
+    assert response.json()['qr'] == f'http://testserver/dpi/dossier/{dossiers[0].id}/qr.png'
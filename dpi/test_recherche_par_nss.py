@@ -10,7 +10,10 @@ from django.core.files.base import ContentFile
 
 # Fixture to create a patient, technician, and dossier_patient
 @pytest.fixture
-def create_patient_and_technician():
+def create_patient_and_technician(settings, tmp_path):
+    # Keep the generated QR code out of the project's media directory
+    settings.MEDIA_ROOT = str(tmp_path)
+
     # Create a user for technician (medecin)
     technician_user = User.objects.create_user(email='doctor@example.com', password='password123', role='medecin')
 
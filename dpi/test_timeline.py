@@ -0,0 +1,112 @@
+import pytest
+from datetime import date, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from accounts.models import (
+    Consultation, Ordonnance, Medicament, Resume,
+    ExamenBiologique, ResultatExamen, ExamenRadiologique, SoinInfermier, Certificat,
+)
+
+
+@pytest.fixture
+def dossier(make_dossier, medecin):
+    return make_dossier(medecin_traitant=medecin)
+
+
+@pytest.fixture
+def api_client(api_client, medecin):
+    api_client.force_authenticate(user=medecin.user)
+    return api_client
+
+
+def create_records(days, medecin, dossier):
+    start = date(2024, 1, 1)
+    for i in range(days):
+        day = start + timedelta(days=i)
+        ordonnance = Ordonnance.objects.create(date=day)
+        Medicament.objects.create(nom='Doliprane', dose='1g', ordonnance=ordonnance)
+        Consultation.objects.create(
+            date=day, medecin=medecin, dossier=dossier, ordonnance=ordonnance,
+            resume=Resume.objects.create(diagnostic='Grippe'),
+        )
+        examen = ExamenBiologique.objects.create(date=day, technicien=medecin, dossier_patient=dossier)
+        ResultatExamen.objects.create(parametre='Glycémie', valeur='1.1', unite='g/L', examen_biologique=examen)
+        ExamenRadiologique.objects.create(date=day, technicien=medecin, dossier_patient=dossier)
+        soin = SoinInfermier.objects.create(date=day, soin_realise='Pansement', dossier=dossier)
+        Medicament.objects.create(nom='Bétadine', dose='1', soin=soin)
+        Certificat.objects.create(date=day, medecin=medecin, contenu='Repos', patient=dossier.patient)
+
+
+@pytest.mark.django_db
+def test_timeline_merges_streams_in_date_order(api_client, medecin, dossier):
+    create_records(2, medecin, dossier)
+
+    response = api_client.get(f'/dpi/dossier/{dossier.id}/timeline/')
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.data['results']
+    assert response.data['next'] is None
+    assert len(results) == 10
+    assert [item['date'] for item in results] == sorted((item['date'] for item in results), reverse=True)
+    assert [item['type'] for item in results[:5]] == [
+        'consultation', 'examen_biologique', 'examen_radiologique', 'soin_infirmier', 'certificat'
+    ]
+    assert results[0]['ordonnance']['medicaments'][0]['nom'] == 'Doliprane'
+    assert results[0]['resume']['diagnostic'] == 'Grippe'
+    assert results[1]['resultats'][0]['parametre'] == 'Glycémie'
+    assert results[3]['medicaments'][0]['nom'] == 'Bétadine'
+
+
+@pytest.mark.django_db
+def test_timeline_cursor_pagination_and_fixed_query_count(api_client, medecin, dossier):
+    create_records(3, medecin, dossier)
+
+    with CaptureQueriesContext(connection) as small:
+        response = api_client.get(f'/dpi/dossier/{dossier.id}/timeline/', {'page_size': 4})
+    assert response.status_code == status.HTTP_200_OK
+
+    seen = [(item['type'], item['id']) for item in response.data['results']]
+    next_url = response.data['next']
+    while next_url:
+        response = api_client.get(next_url)
+        seen += [(item['type'], item['id']) for item in response.data['results']]
+        next_url = response.data['next']
+    assert len(seen) == len(set(seen)) == 15
+
+    create_records(10, medecin, dossier)
+    with CaptureQueriesContext(connection) as large:
+        response = api_client.get(f'/dpi/dossier/{dossier.id}/timeline/', {'page_size': 40})
+    assert len(response.data['results']) == 40
+    assert len(large.captured_queries) == len(small.captured_queries)
+
+
+@pytest.mark.django_db
+def test_timeline_date_window(api_client, medecin, dossier):
+    create_records(5, medecin, dossier)
+
+    response = api_client.get(
+        f'/dpi/dossier/{dossier.id}/timeline/', {'date_debut': '2024-01-02', 'date_fin': '2024-01-03'}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert {item['date'] for item in response.data['results']} == {'2024-01-02', '2024-01-03'}
+    assert len(response.data['results']) == 10
+
+
+@pytest.mark.django_db
+def test_timeline_rejects_bad_cursor_and_unknown_dossier(api_client, dossier):
+    response = api_client.get(f'/dpi/dossier/{dossier.id}/timeline/', {'cursor': 'nope'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = api_client.get('/dpi/dossier/9999/timeline/')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_patient_only_reads_own_timeline(api_client, dossier, make_dossier):
+    other = make_dossier(1)
+    api_client.force_authenticate(user=dossier.patient.user)
+
+    assert api_client.get(f'/dpi/dossier/{dossier.id}/timeline/').status_code == status.HTTP_200_OK
+    assert api_client.get(f'/dpi/dossier/{other.id}/timeline/').status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,146 @@
+import base64
+import heapq
+from datetime import date as date_type
+
+from django.db.models import Q, prefetch_related_objects
+
+from accounts.models import Consultation, ExamenBiologique, ExamenRadiologique, SoinInfermier, Certificat
+from accounts.pagination import KeysetPaginator
+from .serializers import (
+    TimelineConsultationSerializer, TimelineExamenBiologiqueSerializer, TimelineExamenRadiologiqueSerializer,
+    TimelineSoinInfermierSerializer, TimelineCertificatSerializer,
+)
+
+
+class TimelineStream:
+    """
+    Une source d'éléments de la chronologie : queryset de base (avec ses
+    jointures), prefetch appliqué aux seuls éléments de la page, serializer.
+    """
+
+    def __init__(self, kind, get_queryset, prefetch, serializer_class):
+        self.kind = kind
+        self.get_queryset = get_queryset
+        self.prefetch = prefetch
+        self.serializer_class = serializer_class
+
+
+# L'ordre de la liste est celui des éléments d'une même date
+TIMELINE_STREAMS = [
+    TimelineStream(
+        'consultation',
+        lambda dossier_id, patient_id: Consultation.objects.filter(dossier_id=dossier_id)
+        .select_related('medecin', 'resume', 'ordonnance'),
+        ['ordonnance__medicaments'],
+        TimelineConsultationSerializer,
+    ),
+    TimelineStream(
+        'examen_biologique',
+        lambda dossier_id, patient_id: ExamenBiologique.objects.filter(dossier_patient_id=dossier_id)
+        .select_related('technicien', 'laborantin'),
+        ['resultats'],
+        TimelineExamenBiologiqueSerializer,
+    ),
+    TimelineStream(
+        'examen_radiologique',
+        lambda dossier_id, patient_id: ExamenRadiologique.objects.filter(dossier_patient_id=dossier_id)
+        .select_related('technicien', 'radiologue'),
+        ['images'],
+        TimelineExamenRadiologiqueSerializer,
+    ),
+    TimelineStream(
+        'soin_infirmier',
+        lambda dossier_id, patient_id: SoinInfermier.objects.filter(dossier_id=dossier_id)
+        .select_related('infirmier'),
+        ['medicaments'],
+        TimelineSoinInfermierSerializer,
+    ),
+    TimelineStream(
+        'certificat',
+        lambda dossier_id, patient_id: Certificat.objects.filter(patient_id=patient_id)
+        .select_related('medecin'),
+        [],
+        TimelineCertificatSerializer,
+    ),
+]
+
+
+class TimelinePaginator(KeysetPaginator):
+    """
+    Pagination keyset sur plusieurs flux fusionnés.
+
+    Les éléments sont triés du plus récent au plus ancien, puis par rang du flux
+    (consultations d'abord) et par id décroissant ; le curseur encode le triplet
+    (date, rang, id) du dernier élément renvoyé.
+    Chaque flux coûte une requête par page (page_size + 1 lignes au plus),
+    plus une requête par prefetch, quel que soit le nombre d'éléments.
+    """
+
+    def encode_cursor(self, entry):
+        entry_date, rank, entry_id, _ = entry
+        value = f"{entry_date.isoformat()}:{rank}:{entry_id}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            raw_date, raw_rank, raw_id = value.split(':')
+            return date_type.fromisoformat(raw_date), int(raw_rank), int(raw_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor.")
+
+    def paginate_streams(self, streams, request, dossier_id, patient_id, date_debut=None, date_fin=None):
+        """
+        Renvoie la page demandée : liste de (date, rang, id, instance).
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        cursor = request.GET.get(self.cursor_query_param)
+        position = self.decode_cursor(cursor) if cursor else None
+
+        fetched = []
+        for rank, stream in enumerate(streams):
+            queryset = stream.get_queryset(dossier_id, patient_id)
+            if date_debut:
+                queryset = queryset.filter(date__gte=date_debut)
+            if date_fin:
+                queryset = queryset.filter(date__lte=date_fin)
+            if position:
+                queryset = queryset.filter(self._after(position, rank))
+            rows = queryset.order_by('-date', '-id')[:self.page_size + 1]
+            fetched.append([(row.date, rank, row.id, row) for row in rows])
+
+        merged = heapq.merge(*fetched, key=lambda entry: (entry[0], -entry[1], entry[2]), reverse=True)
+        page = [entry for _, entry in zip(range(self.page_size + 1), merged)]
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.last_item = page[-1] if page else None
+
+        # Prefetch sur les seuls éléments retenus, une requête par relation
+        for rank, stream in enumerate(streams):
+            if stream.prefetch:
+                instances = [entry[3] for entry in page if entry[1] == rank]
+                if instances:
+                    prefetch_related_objects(instances, *stream.prefetch)
+        return page
+
+    @staticmethod
+    def _after(position, rank):
+        """
+        Filtre des éléments d'un flux situés après le curseur dans l'ordre décroissant.
+        """
+        last_date, last_rank, last_id = position
+        if rank > last_rank:
+            return Q(date__lte=last_date)
+        if rank == last_rank:
+            return Q(date__lt=last_date) | Q(date=last_date, id__lt=last_id)
+        return Q(date__lt=last_date)
+
+
+def serialize_timeline(page, streams, context):
+    items = []
+    for _, rank, _, instance in page:
+        stream = streams[rank]
+        items.append({'type': stream.kind, **stream.serializer_class(instance, context=context).data})
+    return items
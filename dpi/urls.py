@@ -1,5 +1,6 @@
 from django.urls import path
 from .views import  SupprimerDpiAPIView, ModifierDossierAPIView, DossierPatientSearchView,PatientSearchByNSSView , creatuserPatientView,SearchPatientByDossier
+from .views import DossierQRCodeView, BulkPatientRegistrationView, DossierTimelineView, DossierSummaryView, ClinicalSearchView, PatientNameSearchView
 
 
 from . import views
@@ -10,8 +11,14 @@ urlpatterns = [
     path('dossier/<int:dpi_id>/modify/', ModifierDossierAPIView.as_view(), name='modify-dossier'),
     path('search-by-qr/', DossierPatientSearchView.as_view(), name='dossier-patient-search'),
     path('search_by_nss/', PatientSearchByNSSView.as_view(), name='dossier-patient-search-by-nss'),
+    path('search-patient-name/', PatientNameSearchView.as_view(), name='patient-name-search'),
     path('search-patient/<int:dossier_id>/', SearchPatientByDossier.as_view(), name='search_patient_by_dossier'),
     path('registerUserPatient/', creatuserPatientView.as_view() , name='creat_patient_and_dossier'),
+    path('registerUserPatient/bulk/', BulkPatientRegistrationView.as_view(), name='bulk_register_patients'),
+    path('dossier/<int:dossier_id>/qr.<str:extension>', DossierQRCodeView.as_view(), name='dossier-qr-code'),
+    path('dossier/<int:dossier_id>/timeline/', DossierTimelineView.as_view(), name='dossier-timeline'),
+    path('dossier/<int:dossier_id>/summary/', DossierSummaryView.as_view(), name='dossier-summary'),
+    path('search/', ClinicalSearchView.as_view(), name='clinical-search'),
 
 
    
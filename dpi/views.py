@@ -4,11 +4,24 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from accounts.models import DossierPatient, Patient , Technician
-from .serializers import DossierPatientSerializer , PatientSerializer, UserPatientSerializer
+from .serializers import DossierPatientSerializer , PatientSerializer, UserPatientSerializer, DossierSummarySerializer
+from .lookup import lookup_dossier_by_nss, lookup_dossier_by_id_and_nom
+from .qr import qr_pipeline, qr_payload, qr_etag, render_qr_cached, QR_CONTENT_TYPES
+from .bulk import register_patients_bulk
+from accounts.csv_import import read_csv_rows
+from .timeline import TIMELINE_STREAMS, TimelinePaginator, serialize_timeline
+from .summary import get_summary
+from .media import media_access, media_dossier_ids, media_path, serve_media_file
+from .search import SEARCH_SOURCES, search
+from .names import search_patient_names
+from accounts.authentication import resolve_dossier_id
+from django.db import transaction
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from datetime import datetime
 
-import qrcode
-import io
-import json
 import base64
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
@@ -206,14 +219,16 @@ class DossierPatientSearchView(APIView,CheckUserRoleMixin):
             return Response({"detail": "Patient ID and name are required."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Find the patient based on the provided patient_id and patient_name
-            patient = get_object_or_404(Patient, id=patient_id, nom=patient_name)
-            
-            # Get the DossierPatient associated with the patient
-            dossier_patient = get_object_or_404(DossierPatient, patient=patient)
+            # Patient et dossier résolus en une seule requête indexée (cache LRU devant)
+            found = lookup_dossier_by_id_and_nom(patient_id, patient_name)
+
+            if found is None:
+                return Response({"detail": "Patient not found."}, status=status.HTTP_404_NOT_FOUND)
+            if found[1] is None:
+                return Response({"detail": "Dossier not found."}, status=status.HTTP_404_NOT_FOUND)
 
             # Return the dossier patient id in the response
-            return Response({"id": dossier_patient.id}, status=status.HTTP_200_OK)
+            return Response({"id": found[1]}, status=status.HTTP_200_OK)
             
 
         except Exception as e:
@@ -251,19 +266,16 @@ class PatientSearchByNSSView(APIView,CheckUserRoleMixin):
             return Response({"detail": "NSS is required."}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Search for the patient by NSS
-            patient = Patient.objects.get(nss=nss)
-            
-            # Get the DossierPatient associated with the patient
-            dossier_patient = get_object_or_404(DossierPatient, patient=patient)
+            # Search for the patient by NSS (index unique) and its dossier in one query
+            found = lookup_dossier_by_nss(nss)
+
+            if found is None:
+                return Response({"detail": "Patient not found."}, status=status.HTTP_404_NOT_FOUND)
+            if found[1] is None:
+                return Response({"detail": "Dossier not found."}, status=status.HTTP_404_NOT_FOUND)
 
-            
-            
             # Return the dossier patient id in the response
-            return Response({"id": dossier_patient.id}, status=status.HTTP_200_OK)
-        
-        except Patient.DoesNotExist:
-            return Response({"detail": "Patient not found."}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"id": found[1]}, status=status.HTTP_200_OK)
         
         except Exception as e:
 
@@ -293,7 +305,7 @@ class SearchPatientByDossier(APIView,CheckUserRoleMixin):
             description="Patient details retrieved successfully.",
             examples={
                 "application/json": {
-                    "qr": "http://127.0.0.1:8000/media/qr_code/qr_patient_32.png",
+                    "qr": "http://127.0.0.1:8000/dpi/dossier/32/qr.png",
                     "id": 1,
                     "nom": "Doe",
                     "prenom": "John",
@@ -332,8 +344,10 @@ class SearchPatientByDossier(APIView,CheckUserRoleMixin):
         dossier = get_object_or_404(DossierPatient, id=dossier_id)
         patient = dossier.patient
 
-        # Construire l'URL absolue pour le QR code
-        qr_url = request.build_absolute_uri(dossier.qr.url) if dossier.qr else None
+        # URL stable du QR code, rendu à la demande (indépendante du stockage local)
+        qr_url = request.build_absolute_uri(
+            reverse('dossier-qr-code', kwargs={'dossier_id': dossier.id, 'extension': 'png'})
+        )
         # Return patient details in JSON format
         response_data = {
             'qr': qr_url,
@@ -360,14 +374,15 @@ class creatuserPatientView(APIView, CheckUserRoleMixin):
 
     @swagger_auto_schema(
         operation_summary="Create a new patient user and associated medical file",
-        operation_description="This endpoint allows administrative staff or doctors to create a new patient user, along with their associated medical file and QR code.",
+        operation_description="This endpoint allows administrative staff or doctors to create a new patient user, along with their associated medical file. The QR code is generated in the background and attached to the file shortly after the response.",
         request_body=UserPatientSerializer,
         responses={
             201: openapi.Response(
                 description="Patient registered successfully, and medical file created successfully.",
                 examples={
                     "application/json": {
-                        "message": "Patient registered successfully, and dossier created successfully."
+                        "message": "Patient registered successfully, and dossier created successfully.",
+                        "dossier_id": 1
                     }
                 }
             ),
@@ -436,28 +451,579 @@ class creatuserPatientView(APIView, CheckUserRoleMixin):
             }
             patient = Patient.objects.create(**patient_data)
 
-            # Génération du QR code
-
-            qr_data = {"Patient": patient.nom, "ID": patient.id}  # Dictionnaire valide
-            qr_data_str = json.dumps(qr_data)  # Conversion en chaîne JSON
-            qr_image = qrcode.make(qr_data_str)
-            buffer = io.BytesIO()
-            qr_image.save(buffer, format="PNG")
-            
-            buffer.seek(0)
-
-            # Création du fichier image pour l'ImageField
-            qr_file = ContentFile(buffer.read(), name=f"qr_patient_{patient.id}.png")
-            buffer.close()
-             
-            dossier = DossierPatient.objects.create(patient=patient, qr=qr_file)
+            dossier = DossierPatient.objects.create(patient=patient)
 
+            # Génération du QR code en arrière-plan, une fois le dossier commité
+            transaction.on_commit(lambda: qr_pipeline.enqueue(dossier.id))
 
-
-            return Response({'message': 'Patient registered successfully , and dossier created successfully'}, status=status.HTTP_201_CREATED)
+            return Response({'message': 'Patient registered successfully , and dossier created successfully', 'dossier_id': dossier.id}, status=status.HTTP_201_CREATED)
         else : 
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
 
 
 
+
+###########################################################################################################################################
+
+class DossierQRCodeView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Render the QR code of a patient file",
+        operation_description=(
+            "Renders the QR code of a patient file (Dossier Patient) on demand, as PNG or SVG, from "
+            "{\"Patient\": nom, \"ID\": id}. Responses carry ETag and Last-Modified headers so clients "
+            "can revalidate with If-None-Match / If-Modified-Since and get a 304."
+        ),
+        manual_parameters=[
+            openapi.Parameter('dossier_id', openapi.IN_PATH, description="The ID of the patient file.", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('extension', openapi.IN_PATH, description="Image format: 'png' or 'svg'.", type=openapi.TYPE_STRING, required=True),
+        ],
+        responses={
+            200: openapi.Response(description="QR code image (image/png or image/svg+xml)."),
+            304: openapi.Response(description="Not modified."),
+            403: openapi.Response(
+                description="Access denied.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to see this resource."
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="Dossier not found or unsupported format.",
+                examples={
+                    "application/json": {
+                        "error": "dpi introuvable."
+                    }
+                }
+            ),
+        }
+    )
+
+    def get(self, request, dossier_id, extension):
+        if not self.check_user_role(request.user, user_roles=['administratif','patient','technicien']):
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Un patient ne consulte que son propre dossier
+        if request.user.role == 'patient' and resolve_dossier_id(request.user) != dossier_id:
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        if extension not in QR_CONTENT_TYPES:
+            return Response({'error': 'Format non supporté.'}, status=status.HTTP_404_NOT_FOUND)
+
+        row = DossierPatient.objects.filter(id=dossier_id).values_list(
+            'patient__id', 'patient__nom', 'patient__updated_at'
+        ).first()
+        if row is None:
+            return Response({'error': 'dpi introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+
+        patient_id, nom, updated_at = row
+        payload = qr_payload(nom, patient_id)
+        etag = quote_etag(qr_etag(payload, extension))
+        last_modified = int(updated_at.timestamp())
+
+        # 304 sans générer l'image si le client a déjà la bonne version
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(render_qr_cached(payload, extension), content_type=QR_CONTENT_TYPES[extension])
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Toujours revalidé (304 via ETag) : le QR suit aussitôt un changement du patient
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def perform_content_negotiation(self, request, force=False):
+        # La réponse est une image : ne pas rejeter un en-tête Accept du type image/png
+        return super().perform_content_negotiation(request, force=True)
+
+###########################################################################################################################################
+
+class BulkPatientRegistrationView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Register many patients at once",
+        operation_description=(
+            "Creates patient users, patients and their medical files in bulk. The body is either a JSON list "
+            "(or {\"patients\": [...]}) of objects with the same fields as registerUserPatient/, or a multipart "
+            "upload of a CSV file in the 'file' field whose header row names those fields. Rows are validated "
+            "together and written in chunks, one transaction per chunk. The response reports the outcome of every row."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_OBJECT),
+        ),
+        responses={
+            201: openapi.Response(
+                description="At least one patient was registered.",
+                examples={
+                    "application/json": {
+                        "created": 1,
+                        "failed": 1,
+                        "rows": [
+                            {"row": 0, "status": "created", "email": "patient@example.com", "dossier_id": 12},
+                            {"row": 1, "status": "error", "errors": {"nss": ["A patient with this nss already exists."]}}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="No patient could be registered.",
+                examples={
+                    "application/json": {
+                        "error": "Expected a list of patients or a CSV file."
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied. You do not have permission to create a patient user.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to create a patient user."
+                    }
+                }
+            )
+        }
+    )
+
+    def post(self, request):
+        if not self.check_user_role(request.user, user_roles=['administratif'], technician_roles=['medecin']):
+            return Response(
+                {'error': 'You do not have permission to create a patient user.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        uploaded = request.FILES.get('file')
+        if uploaded is not None:
+            try:
+                rows = read_csv_rows(uploaded)
+            except (UnicodeDecodeError, ValueError) as e:
+                return Response({'error': f"Invalid CSV file: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(request.data, list):
+            rows = request.data
+        elif isinstance(request.data, dict):
+            rows = request.data.get('patients')
+        else:
+            rows = None
+
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'Expected a list of patients or a CSV file.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = register_patients_bulk(rows)
+        created = sum(1 for row in report if row['status'] == 'created')
+        response_data = {
+            'created': created,
+            'failed': len(report) - created,
+            'rows': report,
+        }
+        return Response(response_data, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
+
+###########################################################################################################################################
+
+class DossierTimelineView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Timeline of a patient file",
+        operation_description=(
+            "Returns every clinical record of a patient file (Dossier Patient) in a single list, most recent first: "
+            "consultations (with resume and ordonnance), biological exams (with results), radiology exams (with images), "
+            "nursing care (with medications) and certificates. Each item carries a 'type' field. "
+            "The response is paginated with an opaque cursor taken from the 'next' link."
+        ),
+        manual_parameters=[
+            openapi.Parameter('dossier_id', openapi.IN_PATH, description="The ID of the patient file.", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('date_debut', openapi.IN_QUERY, description="Only records on or after this date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_fin', openapi.IN_QUERY, description="Only records on or before this date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Page size (default 50, max 500).", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor taken from the 'next' link of the previous page.", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response(
+                description="One page of the timeline.",
+                examples={
+                    "application/json": {
+                        "next": "http://127.0.0.1:8000/dpi/dossier/12/timeline/?page_size=50&cursor=MjAyNC0xMi0zMTowOjQy",
+                        "results": [
+                            {
+                                "type": "consultation",
+                                "id": 42,
+                                "date": "2024-12-31",
+                                "medecin": {"id": 3, "nom": "Dada", "prenom": "Dalia"},
+                                "diagnosticStatut": True,
+                                "resume": None,
+                                "ordonnance": {"id": 7, "date": "2024-12-31", "validation": False, "medicaments": []}
+                            },
+                            {
+                                "type": "examen_biologique",
+                                "id": 9,
+                                "date": "2024-12-30",
+                                "technicien": {"id": 3, "nom": "Dada", "prenom": "Dalia"},
+                                "laborantin": {"id": 5, "nom": "Smith", "prenom": "Jone"},
+                                "description": "Blood test",
+                                "resultats": []
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Invalid date, page size or cursor.",
+                examples={
+                    "application/json": {
+                        "error": "Invalid cursor."
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to see this resource."
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="Dossier not found.",
+                examples={
+                    "application/json": {
+                        "error": "dpi introuvable."
+                    }
+                }
+            ),
+        }
+    )
+
+    def get(self, request, dossier_id):
+        if not self.check_user_role(request.user, ['patient'], ['medecin']):
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Un patient ne consulte que son propre dossier
+        if request.user.role == 'patient' and resolve_dossier_id(request.user) != dossier_id:
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        patient_id = DossierPatient.objects.filter(id=dossier_id).values_list('patient_id', flat=True).first()
+        if patient_id is None:
+            return Response({'error': 'dpi introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+
+        paginator = TimelinePaginator()
+        try:
+            date_debut = request.GET.get('date_debut')
+            date_fin = request.GET.get('date_fin')
+            date_debut = datetime.strptime(date_debut, '%Y-%m-%d').date() if date_debut else None
+            date_fin = datetime.strptime(date_fin, '%Y-%m-%d').date() if date_fin else None
+            page = paginator.paginate_streams(TIMELINE_STREAMS, request, dossier_id, patient_id, date_debut, date_fin)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = serialize_timeline(page, TIMELINE_STREAMS, {'request': request})
+        return Response(paginator.get_paginated_data(results), status=status.HTTP_200_OK)
+
+
+###########################################################################################################################################
+
+class DossierSummaryView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Summary of a patient file",
+        operation_description=(
+            "Returns the precomputed counters of a patient file (Dossier Patient) for dashboards: number and "
+            "last date of consultations, biological and radiology exams, pending (not validated) ordonnances "
+            "and radiology images. The summary is kept up to date on every write."
+        ),
+        manual_parameters=[
+            openapi.Parameter('dossier_id', openapi.IN_PATH, description="The ID of the patient file.", type=openapi.TYPE_INTEGER, required=True),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Summary of the patient file.",
+                examples={
+                    "application/json": {
+                        "dossier": 12,
+                        "consultations_count": 4,
+                        "last_consultation_date": "2024-12-31",
+                        "examens_biologiques_count": 2,
+                        "last_examen_biologique_date": "2024-12-20",
+                        "examens_radiologiques_count": 1,
+                        "last_examen_radiologique_date": "2024-11-02",
+                        "pending_ordonnances_count": 1,
+                        "radiology_images_count": 3,
+                        "updated_at": "2024-12-31T10:15:00Z"
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to see this resource."
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="Dossier not found.",
+                examples={
+                    "application/json": {
+                        "error": "dpi introuvable."
+                    }
+                }
+            ),
+        }
+    )
+
+    def get(self, request, dossier_id):
+        if not self.check_user_role(request.user, user_roles=['administratif','patient','technicien']):
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Un patient ne consulte que son propre dossier
+        if request.user.role == 'patient' and resolve_dossier_id(request.user) != dossier_id:
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        summary = get_summary(dossier_id)
+        if summary is None:
+            return Response({'error': 'dpi introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(DossierSummarySerializer(summary).data, status=status.HTTP_200_OK)
+
+
+###########################################################################################################################################
+
+class MediaFileView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Serve an uploaded media file",
+        operation_description=(
+            "Serves radiology images (and their renditions) and QR codes stored under MEDIA_ROOT, at their "
+            "MEDIA_URL address. Access is checked against the patient file the media belongs to: a patient only "
+            "sees the media of their own file. Supports single-range 'Range' requests (206, progressive loading), "
+            "ETag / Last-Modified revalidation (304) and streams the file without loading it in memory "
+            "(zero-copy sendfile when the WSGI server provides wsgi.file_wrapper)."
+        ),
+        manual_parameters=[
+            openapi.Parameter('path', openapi.IN_PATH, description="Path of the file under MEDIA_ROOT, e.g. radiology_images/scan.png.", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('Range', openapi.IN_HEADER, description="bytes=start-end", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response(description="Whole file."),
+            206: openapi.Response(description="Requested byte range."),
+            304: openapi.Response(description="Not modified."),
+            403: openapi.Response(
+                description="Access denied.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to see this resource."
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="File not found.",
+                examples={
+                    "application/json": {
+                        "error": "Fichier introuvable."
+                    }
+                }
+            ),
+            416: openapi.Response(description="Range not satisfiable."),
+        }
+    )
+
+    def get(self, request, path):
+        roles = media_access(path)
+        if roles is None:
+            return Response({'error': 'Fichier introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not self.check_user_role(request.user, *roles):
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        dossier_ids = media_dossier_ids(path)
+        file_path = media_path(path)
+        if not dossier_ids or file_path is None:
+            return Response({'error': 'Fichier introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.user.role == 'patient' and resolve_dossier_id(request.user) not in dossier_ids:
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        return serve_media_file(request, file_path)
+
+    def perform_content_negotiation(self, request, force=False):
+        # La réponse est un fichier : ne pas rejeter un en-tête Accept du type image/*
+        return super().perform_content_negotiation(request, force=True)
+
+
+###########################################################################################################################################
+
+class ClinicalSearchView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+    max_limit = 100
+
+    @swagger_auto_schema(
+        operation_summary="Full-text search over clinical notes",
+        operation_description=(
+            "Searches the free text of consultation summaries (diagnostic, symptomes, mesures_prises), radiology "
+            "exams (compte_rendu, description) and nursing care (observation, soin_realise) through an inverted "
+            "index: French tokenization, accent folding ('oedeme' finds 'Œdème'), stop words and light stemming "
+            "('fractures' finds 'fracturée'). Results are ranked by relevance (BM25) and carry highlighted "
+            "excerpts of the matching fields. A patient only searches their own file."
+        ),
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Search text.", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('type', openapi.IN_QUERY, description="Restrict to one or more record types (comma separated): resume, examen_radiologique, soin_infirmier.", type=openapi.TYPE_STRING),
+            openapi.Parameter('dossier', openapi.IN_QUERY, description="Restrict to one patient file.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Number of results (default 20, max 100).", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Ranked results.",
+                examples={
+                    "application/json": {
+                        "results": [
+                            {
+                                "type": "examen_radiologique",
+                                "id": 4,
+                                "dossier": 12,
+                                "date": "2024-12-20",
+                                "score": 2.3121,
+                                "highlights": {
+                                    "compte_rendu": "Trait de <mark>fracture</mark> du radius distal, sans déplacement."
+                                }
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Missing query or invalid parameter.",
+                examples={
+                    "application/json": {
+                        "error": "The 'q' parameter is required."
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to see this resource."
+                    }
+                }
+            ),
+        }
+    )
+
+    def get(self, request):
+        if not self.check_user_role(request.user, ['patient'], ['medecin', 'infermier', 'radiologue']):
+            return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({'error': "The 'q' parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        kinds = [kind for kind in request.GET.get('type', '').split(',') if kind]
+        if any(kind not in SEARCH_SOURCES for kind in kinds):
+            return Response({'error': f"Invalid type, expected one of: {', '.join(SEARCH_SOURCES)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            dossier_id = int(request.GET['dossier']) if request.GET.get('dossier') else None
+            limit = min(int(request.GET.get('limit', 20)), self.max_limit)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'Invalid dossier or limit.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.user.role == 'patient':
+            own_dossier_id = resolve_dossier_id(request.user)
+            if dossier_id is not None and dossier_id != own_dossier_id:
+                return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
+            dossier_id = own_dossier_id
+            if dossier_id is None:
+                return Response({'results': []}, status=status.HTTP_200_OK)
+
+        return Response({'results': search(query, dossier_id, kinds, limit)}, status=status.HTTP_200_OK)
+
+
+###########################################################################################################################################
+
+class PatientNameSearchView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    @swagger_auto_schema(
+        operation_summary="Fuzzy patient search by name",
+        operation_description=(
+            "Finds patients from a partial or misspelled name and/or first name, e.g. 'dupond jan' finds "
+            "'Dupont Jean'. Matching uses the trigrams and a French phonetic key (Soundex2) of each word, "
+            "kept in an index updated on every save; results are ranked by similarity (score between 0 and 1). "
+            "This action can be performed by 'administratif' or 'technicien'."
+        ),
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Name and/or first name, in any order.", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Number of results (default 10, max 50).", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Ranked patients.",
+                examples={
+                    "application/json": {
+                        "results": [
+                            {
+                                "id": 7,
+                                "nom": "Dupont",
+                                "prenom": "Jean",
+                                "date_naissance": "1980-04-02",
+                                "dossier": 5,
+                                "score": 0.8615
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Missing query or invalid limit.",
+                examples={
+                    "application/json": {
+                        "error": "The 'q' parameter is required."
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to search for this resource."
+                    }
+                }
+            ),
+        }
+    )
+
+    def get(self, request):
+        if not self.check_user_role(request.user, ['administratif', 'technicien']):
+            return Response({'error': 'You do not have permission to search for this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({'error': "The 'q' parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.GET.get('limit', 10)), self.max_limit)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'Invalid limit.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [
+            {
+                'id': patient['id'],
+                'nom': patient['nom'],
+                'prenom': patient['prenom'],
+                'date_naissance': patient['date_naissance'],
+                'dossier': patient['dossier__id'],
+                'score': round(score, 4),
+            }
+            for score, patient in search_patient_names(query, limit)
+        ]
+        return Response({'results': results}, status=status.HTTP_200_OK)
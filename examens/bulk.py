@@ -0,0 +1,113 @@
+from django.db import DatabaseError, connection, transaction
+
+from accounts.models import ExamenBiologique, ResultatExamen, parse_numeric_value
+from .serializers import ResultatExamenBulkRowSerializer
+
+
+BULK_CHUNK_SIZE = 1000
+UPSERT_FIELDS = ['valeur', 'valeur_numerique', 'unite', 'commentaire']
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _error(index, errors):
+    return {'row': index, 'status': 'error', 'errors': errors}
+
+
+def ingest_resultats_bulk(rows, laborantin=None, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Enregistre un lot de résultats d'analyse (création ou mise à jour sur
+    (parametre, examen_biologique)) et renvoie un rapport par ligne, dans
+    l'ordre des lignes reçues.
+
+    Les ids d'examen sont vérifiés en une requête pour tout le lot ; chaque bloc
+    de `chunk_size` lignes valides coûte ensuite une lecture des résultats déjà
+    présents (pour distinguer créations et mises à jour) et un seul INSERT ...
+    ON CONFLICT / ON DUPLICATE KEY UPDATE. Si `laborantin` est donné, il est
+    affecté aux examens du lot qui n'en ont pas encore.
+    """
+    report = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        serializer = ResultatExamenBulkRowSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            report[index] = _error(index, serializer.errors)
+
+    examen_ids = {data['examen_biologique'] for _, data in valid}
+    known_examens = set(ExamenBiologique.objects.filter(id__in=examen_ids).values_list('id', flat=True))
+
+    accepted = []
+    seen = set()
+    for index, data in valid:
+        key = (data['examen_biologique'], data['parametre'])
+        if data['examen_biologique'] not in known_examens:
+            report[index] = _error(index, {'examen_biologique': [f"Invalid pk \"{data['examen_biologique']}\" - object does not exist."]})
+        elif key in seen:
+            # Un même INSERT ne peut pas toucher deux fois la même ligne
+            report[index] = _error(index, {'parametre': ["Duplicate parametre for this examen_biologique in the batch."]})
+        else:
+            seen.add(key)
+            accepted.append((index, data))
+
+    for chunk in _chunks(accepted, chunk_size):
+        try:
+            existing = _upsert_chunk([data for _, data in chunk])
+        except DatabaseError:
+            for index, _ in chunk:
+                report[index] = _error(index, {'non_field_errors': ["Could not store this result, please retry."]})
+            continue
+
+        for index, data in chunk:
+            key = (data['examen_biologique'], data['parametre'])
+            report[index] = {
+                'row': index,
+                'status': 'updated' if key in existing else 'created',
+                'examen_biologique': data['examen_biologique'],
+                'parametre': data['parametre'],
+            }
+
+    stored = {data['examen_biologique'] for index, data in accepted if report[index]['status'] != 'error'}
+    if laborantin is not None and stored:
+        ExamenBiologique.objects.filter(id__in=stored, laborantin__isnull=True).update(laborantin=laborantin)
+
+    return report
+
+
+def _upsert_chunk(rows):
+    """
+    Écrit un bloc de résultats en un seul upsert et renvoie les couples
+    (examen, paramètre) qui existaient déjà.
+    """
+    examen_ids = {data['examen_biologique'] for data in rows}
+    parametres = {data['parametre'] for data in rows}
+    # bulk_create n'appelle pas save() : valeur_numerique est calculée ici
+    objs = [
+        ResultatExamen(
+            examen_biologique_id=data['examen_biologique'],
+            parametre=data['parametre'],
+            valeur=data['valeur'],
+            valeur_numerique=parse_numeric_value(data['valeur']),
+            unite=data['unite'],
+            commentaire=data.get('commentaire'),
+        )
+        for data in rows
+    ]
+    # MySQL résout le conflit sur n'importe quelle clé unique et refuse unique_fields
+    unique_fields = ['parametre', 'examen_biologique'] if connection.features.supports_update_conflicts_with_target else None
+
+    with transaction.atomic():
+        existing = set(
+            ResultatExamen.objects
+            .select_for_update()
+            .filter(examen_biologique_id__in=examen_ids, parametre__in=parametres)
+            .values_list('examen_biologique_id', 'parametre')
+        )
+        ResultatExamen.objects.bulk_create(
+            objs, update_conflicts=True, unique_fields=unique_fields, update_fields=UPSERT_FIELDS,
+        )
+    return existing
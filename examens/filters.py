@@ -0,0 +1,34 @@
+import django_filters
+
+from accounts.models import ExamenBiologique, ExamenRadiologique, ResultatExamen
+
+
+class ExamenBiologiqueFilter(django_filters.FilterSet):
+    date_debut = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_fin = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = ExamenBiologique
+        fields = ['date', 'dossier_patient', 'technicien', 'laborantin']
+
+
+class ExamenRadiologiqueFilter(django_filters.FilterSet):
+    date_debut = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_fin = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = ExamenRadiologique
+        fields = ['date', 'dossier_patient', 'technicien', 'radiologue']
+
+
+class ResultatExamenFilter(django_filters.FilterSet):
+    # bornes sur la valeur analysée (index parametre, valeur_numerique) ;
+    # mêmes noms que la recherche de résultats (valeur_gt, valeur_gte, ...)
+    valeur_gt = django_filters.NumberFilter(field_name='valeur_numerique', lookup_expr='gt')
+    valeur_gte = django_filters.NumberFilter(field_name='valeur_numerique', lookup_expr='gte')
+    valeur_lt = django_filters.NumberFilter(field_name='valeur_numerique', lookup_expr='lt')
+    valeur_lte = django_filters.NumberFilter(field_name='valeur_numerique', lookup_expr='lte')
+
+    class Meta:
+        model = ResultatExamen
+        fields = ['examen_biologique', 'parametre']
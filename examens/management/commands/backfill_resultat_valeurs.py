@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import ResultatExamen, parse_numeric_value
+
+
+class Command(BaseCommand):
+    help = "Renseigne ResultatExamen.valeur_numerique pour les résultats existants, par lots (reprise possible)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de résultats traités par lot.")
+        parser.add_argument('--all', action='store_true', help="Recalcule aussi les résultats déjà renseignés.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = ResultatExamen.objects.all()
+        if not options['all']:
+            # Seuls les résultats non renseignés : relancer la commande reprend là où elle s'est arrêtée
+            queryset = queryset.filter(valeur_numerique__isnull=True)
+
+        total = 0
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).order_by('id').only('id', 'valeur')[:batch_size])
+            if not batch:
+                break
+            for resultat in batch:
+                resultat.valeur_numerique = parse_numeric_value(resultat.valeur)
+            ResultatExamen.objects.bulk_update(batch, ['valeur_numerique'])
+            total += len(batch)
+            last_id = batch[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"{total} résultat(s) traité(s)."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from examens.renditions import generate_renditions, pending_renditions
+
+
+class Command(BaseCommand):
+    help = "Génère les miniatures et déclinaisons web des images radiologiques qui n'en ont pas encore (reprise après redémarrage)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help="Nombre d'images traitées par lot.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(
+                pending_renditions()
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            total += generate_renditions(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"{total} image(s) traitée(s)."))
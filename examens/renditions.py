@@ -0,0 +1,101 @@
+import io
+import logging
+import os
+
+from PIL import Image, ImageOps
+from django.core.files.base import ContentFile
+from django.db.models import Q
+
+from accounts.models import RadiologyImage
+from accounts.pipeline import BatchPipeline
+
+logger = logging.getLogger(__name__)
+
+
+# Champ de RadiologyImage -> boîte englobante (px), de la plus grande à la plus petite :
+# chaque déclinaison est réduite à partir de la précédente, l'original n'est décodé qu'une fois
+RENDITION_SIZES = {
+    'web_image': (1600, 1600),
+    'thumbnail': (256, 256),
+}
+RENDITION_QUALITY = 85
+
+
+def pending_renditions():
+    """
+    Images radiologiques dont les déclinaisons n'ont pas encore été générées.
+    """
+    return RadiologyImage.objects.filter(Q(thumbnail='') | Q(thumbnail__isnull=True))
+
+
+def render_renditions(source):
+    """
+    Décode une image (fichier ouvert) et renvoie {champ: octets JPEG} pour
+    chaque déclinaison de RENDITION_SIZES.
+    """
+    largest = next(iter(RENDITION_SIZES.values()))
+    with Image.open(source) as original:
+        # JPEG : décodage directement à une échelle réduite (1/2 à 1/8), bien plus rapide
+        original.draft('RGB', largest)
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        renditions = {}
+        for field, size in RENDITION_SIZES.items():
+            image = image.copy()
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=RENDITION_QUALITY, optimize=True, progressive=True)
+            renditions[field] = buffer.getvalue()
+    return renditions
+
+
+def generate_renditions(image_ids):
+    """
+    Génère et enregistre les déclinaisons d'un lot d'images, puis met à jour
+    les colonnes de tout le lot en une seule requête. Les images déjà traitées
+    sont ignorées (opération idempotente) ; une image illisible est journalisée
+    et laissée en attente.
+    """
+    images = list(pending_renditions().filter(id__in=image_ids))
+    done = []
+    for image in images:
+        try:
+            with image.image.open('rb') as source:
+                renditions = render_renditions(source)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning("Cannot build renditions of radiology image %s", image.id, exc_info=True)
+            continue
+
+        stem = os.path.splitext(os.path.basename(image.image.name))[0]
+        for field, data in renditions.items():
+            getattr(image, field).save(f"{stem}_{field}.jpg", ContentFile(data), save=False)
+        done.append(image)
+
+    if done:
+        RadiologyImage.objects.bulk_update(done, list(RENDITION_SIZES))
+    return len(done)
+
+
+def clear_renditions(image):
+    """
+    Oublie les déclinaisons d'une image dont le fichier a été remplacé.
+    """
+    for field in RENDITION_SIZES:
+        setattr(image, field, None)
+
+
+class RenditionPipeline(BatchPipeline):
+    """
+    Génération des déclinaisons en arrière-plan, par lots d'ids d'images. Les
+    images restées en attente après un redémarrage sont reprises par la
+    commande `generate_radiology_renditions`.
+    """
+    thread_name = 'radiology-rendition-pipeline'
+
+    def process_batch(self, batch):
+        generate_renditions(batch)
+
+
+rendition_pipeline = RenditionPipeline(batch_size=10)
@@ -1,5 +1,9 @@
+import os
+
 from rest_framework import serializers
-from accounts.models import ResultatExamen , ExamenBiologique , ExamenRadiologique , RadiologyImage
+from django.core.validators import get_available_image_extensions
+from accounts.models import ResultatExamen , ExamenBiologique , ExamenRadiologique , RadiologyImage, RadiologyUpload
+from .uploads import MAX_UPLOAD_SIZE
 
 
 
@@ -7,7 +11,28 @@ class RadiologyImageSerializer(serializers.ModelSerializer):
     image=serializers.ImageField()
     class Meta:
         model = RadiologyImage
-        fields = ['id','examen_radiologique','image','uploaded_at','titre']
+        fields = ['id','examen_radiologique','image','uploaded_at','titre','thumbnail','web_image']
+        read_only_fields = ['thumbnail', 'web_image']
+
+
+# envoi par morceaux (examens/uploads.py) : seules les métadonnées passent par ce serializer
+class RadiologyUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RadiologyUpload
+        fields = ['id', 'examen_radiologique', 'radiologue', 'filename', 'titre', 'size', 'offset', 'created_at']
+        read_only_fields = ['id', 'offset', 'created_at']
+
+    def validate_filename(self, value):
+        value = os.path.basename(value)
+        extension = os.path.splitext(value)[1].lstrip('.').lower()
+        if extension not in get_available_image_extensions():
+            raise serializers.ValidationError(f"File extension \"{extension}\" is not allowed.")
+        return value
+
+    def validate_size(self, value):
+        if not 0 < value <= MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(f"Size must be between 1 and {MAX_UPLOAD_SIZE} bytes.")
+        return value
 
 
 class ExamenRadiologiqueSerializer(serializers.ModelSerializer):
@@ -18,7 +43,16 @@ class ExamenRadiologiqueSerializer(serializers.ModelSerializer):
 class ResultatExamenSerializer(serializers.ModelSerializer):
     class Meta:
         model = ResultatExamen
-        fields = ['id', 'parametre', 'valeur', 'unite', 'commentaire', 'examen_biologique']
+        fields = ['id', 'parametre', 'valeur', 'valeur_numerique', 'unite', 'commentaire', 'examen_biologique']
+        read_only_fields = ['valeur_numerique']
+
+# ligne d'un lot de résultats (examens/bulk.py) : l'existence de l'examen est vérifiée pour tout le lot en une requête
+class ResultatExamenBulkRowSerializer(serializers.Serializer):
+    examen_biologique = serializers.IntegerField()
+    parametre = serializers.CharField(max_length=100)
+    valeur = serializers.CharField(max_length=100)
+    unite = serializers.CharField(max_length=50)
+    commentaire = serializers.CharField(required=False, allow_blank=True, allow_null=True)
 
 class ExamenBiologiqueSerializer(serializers.ModelSerializer):
     resultats = ResultatExamenSerializer(many=True, read_only=True)   
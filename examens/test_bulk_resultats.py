@@ -0,0 +1,74 @@
+import pytest
+from datetime import date
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from accounts.models import ExamenBiologique, ResultatExamen
+
+
+@pytest.fixture
+def examen(dossier):
+    return ExamenBiologique.objects.create(date=date(2024, 6, 1), dossier_patient=dossier)
+
+
+@pytest.fixture
+def api_client(api_client, laborantin):
+    api_client.force_authenticate(user=laborantin.user)
+    return api_client
+
+
+@pytest.mark.django_db
+def test_bulk_ingestion_upserts_and_reports_rows(api_client, laborantin, examen):
+    ResultatExamen.objects.create(parametre='Cholesterol', valeur='210', unite='mg/dL', examen_biologique=examen)
+    rows = [
+        {'examen_biologique': examen.id, 'parametre': 'Glucose', 'valeur': '92,5', 'unite': 'mg/dL'},
+        {'examen_biologique': examen.id, 'parametre': 'Cholesterol', 'valeur': '190', 'unite': 'mg/dL', 'commentaire': 'contrôle'},
+        {'examen_biologique': 999, 'parametre': 'Glucose', 'valeur': '80', 'unite': 'mg/dL'},
+        {'examen_biologique': examen.id, 'parametre': 'Glucose', 'valeur': '93', 'unite': 'mg/dL'},
+        {'examen_biologique': examen.id, 'parametre': 'CRP'},
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.post('/examens/resultats_examens/bulk/', rows, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (response.data['created'], response.data['updated'], response.data['failed']) == (1, 1, 3)
+    assert [row['status'] for row in response.data['rows']] == ['created', 'updated', 'error', 'error', 'error']
+    assert 'examen_biologique' in response.data['rows'][2]['errors']
+    assert 'valeur' in response.data['rows'][4]['errors']
+    # validation des examens, lecture des existants, un seul INSERT
+    assert len([q for q in queries.captured_queries if 'accounts_resultatexamen' in q['sql']]) == 2
+
+    resultats = {r.parametre: r for r in ResultatExamen.objects.filter(examen_biologique=examen)}
+    assert resultats['Glucose'].valeur_numerique == 92.5
+    assert resultats['Cholesterol'].valeur == '190'
+    assert resultats['Cholesterol'].valeur_numerique == 190.0
+    assert resultats['Cholesterol'].commentaire == 'contrôle'
+    examen.refresh_from_db()
+    assert examen.laborantin == laborantin
+
+
+@pytest.mark.django_db
+def test_bulk_ingestion_csv(api_client, examen):
+    content = (
+        "examen_biologique,parametre,valeur,unite,commentaire\n"
+        f"{examen.id},Glucose,1.10,g/l,\n"
+        f"{examen.id},CRP,positif,mg/L,à contrôler\n"
+    ).encode()
+    upload = SimpleUploadedFile('run.csv', content, content_type='text/csv')
+
+    response = api_client.post('/examens/resultats_examens/bulk/', {'file': upload}, format='multipart')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['created'] == 2
+    assert ResultatExamen.objects.get(parametre='CRP').valeur_numerique is None
+
+
+@pytest.mark.django_db
+def test_bulk_ingestion_rejects_empty_batch_and_other_roles(api_client, examen):
+    assert api_client.post('/examens/resultats_examens/bulk/', [], format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+    api_client.force_authenticate(user=examen.dossier_patient.patient.user)
+    rows = [{'examen_biologique': examen.id, 'parametre': 'Glucose', 'valeur': '90', 'unite': 'mg/dL'}]
+    assert api_client.post('/examens/resultats_examens/bulk/', rows, format='json').status_code == status.HTTP_403_FORBIDDEN
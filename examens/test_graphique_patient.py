@@ -0,0 +1,65 @@
+import pytest
+from datetime import date
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from accounts.models import ExamenBiologique, ResultatExamen
+
+
+@pytest.fixture
+def api_client(api_client, laborantin):
+    api_client.force_authenticate(user=laborantin.user)
+    return api_client
+
+
+def create_exam(dossier, laborantin, exam_date, **results):
+    examen = ExamenBiologique.objects.create(date=exam_date, laborantin=laborantin, dossier_patient=dossier)
+    for parametre, (valeur, unite) in results.items():
+        ResultatExamen.objects.create(parametre=parametre, valeur=valeur, unite=unite, examen_biologique=examen)
+    return examen
+
+
+@pytest.mark.django_db
+def test_graphique_returns_full_history_with_stats(api_client, laborantin, dossier):
+    create_exam(dossier, laborantin, date(2022, 3, 1), Glucose=('92', 'mg/dL'), Cholesterol=('210', 'mg/dL'))
+    create_exam(dossier, laborantin, date(2023, 3, 1), Glucose=('130', 'mg/dL'), CRP=('positif', 'mg/L'))
+    create_exam(dossier, laborantin, date(2024, 3, 1), Glucose=('80', 'mg/dL'))
+    current = create_exam(dossier, laborantin, date(2024, 6, 1), Glucose=('85,5', 'mg/dL'), Cholesterol=('190', 'mg/dL'))
+    create_exam(dossier, laborantin, date(2025, 1, 1), Glucose=('999', 'mg/dL'))  # après l'examen courant
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(f'/examens/graphique-patient/{current.id}/')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len([q for q in queries.captured_queries if 'accounts_resultatexamen' in q['sql']]) == 1
+    assert response.data['dates'] == [date(2022, 3, 1), date(2023, 3, 1), date(2024, 3, 1), date(2024, 6, 1)]
+
+    series = {serie['parametre']: serie for serie in response.data['series']}
+    glucose = series['Glucose']
+    assert glucose['values'] == [92.0, 130.0, 80.0, 85.5]
+    assert glucose['min'] == 80.0 and glucose['max'] == 130.0
+    assert glucose['mean'] == pytest.approx(96.875)
+    assert glucose['flags'] == ['normal', 'high', 'normal', 'normal']
+    assert series['Cholesterol']['values'] == [210.0, None, None, 190.0]
+    assert series['CRP']['values'] == [None, None, None, None]
+    assert series['CRP']['mean'] is None
+
+    labels = response.data['labels']
+    current_data, previous_data = (dataset['data'] for dataset in response.data['datasets'])
+    assert current_data[labels.index('Glucose (mg/dL)')] == 85.5
+    assert previous_data[labels.index('Glucose (mg/dL)')] == 80.0
+
+
+@pytest.mark.django_db
+def test_graphique_filters_parameters_and_dates(api_client, laborantin, dossier):
+    create_exam(dossier, laborantin, date(2022, 3, 1), Glucose=('92', 'mg/dL'), Cholesterol=('210', 'mg/dL'))
+    current = create_exam(dossier, laborantin, date(2024, 6, 1), Glucose=('85', 'mg/dL'), Cholesterol=('190', 'mg/dL'))
+
+    response = api_client.get(
+        f'/examens/graphique-patient/{current.id}/', {'parametres': 'Glucose', 'date_debut': '2023-01-01'}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['labels'] == ['Glucose (mg/dL)']
+    assert response.data['series'][0]['values'] == [85.0]
+    assert response.data['datasets'][1]['data'] == []
@@ -0,0 +1,67 @@
+import pytest
+from datetime import date, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from accounts.models import ExamenBiologique, ResultatExamen
+from accounts.pagination import KeysetPaginator
+
+
+@pytest.fixture
+def api_client(api_client, laborantin):
+    api_client.force_authenticate(user=laborantin.user)
+    return api_client
+
+
+@pytest.fixture
+def examens(laborantin, dossier):
+    created = []
+    for i in range(7):
+        examen = ExamenBiologique.objects.create(date=date(2024, 1, 1) + timedelta(days=i), laborantin=laborantin, dossier_patient=dossier)
+        ResultatExamen.objects.create(parametre='Glucose', valeur=str(80 + i * 10), unite='mg/dL', examen_biologique=examen)
+        ResultatExamen.objects.create(parametre='CRP', valeur='positif', unite='mg/L', examen_biologique=examen)
+        created.append(examen)
+    return created
+
+
+@pytest.mark.django_db
+def test_examens_biologiques_are_paginated_with_prefetched_results(api_client, examens):
+    seen = []
+    url = '/examens/examens_biologiques/'
+    params = {'page_size': 3}
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        # une requête pour la page, une pour les résultats imbriqués
+        assert len([q for q in queries.captured_queries if 'accounts_examenbiologique' in q['sql'] or 'accounts_resultatexamen' in q['sql']]) == 2
+        assert all(len(examen['resultats']) == 2 for examen in response.data['results'])
+        seen += [examen['id'] for examen in response.data['results']]
+        url, params = response.data['next'], None
+
+    assert seen == [examen.id for examen in reversed(examens)]
+
+
+@pytest.mark.django_db
+def test_list_filters_and_page_size_cap(api_client, examens, dossier):
+    response = api_client.get('/examens/examens_biologiques/', {'date_debut': '2024-01-03', 'date_fin': '2024-01-04', 'dossier_patient': dossier.id})
+    assert [examen['date'] for examen in response.data['results']] == ['2024-01-04', '2024-01-03']
+
+    response = api_client.get('/examens/resultats_examens/', {'parametre': 'Glucose', 'valeur_gte': 120})
+    assert [resultat['valeur'] for resultat in response.data['results']] == ['140', '130', '120']
+    assert response.data['next'] is None
+
+    assert api_client.get('/examens/examens_biologiques/', {'date_debut': 'hier'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get('/examens/resultats_examens/', {'cursor': '???'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    response = api_client.get('/examens/resultats_examens/', {'page_size': 100000})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['results']) == 14
+    assert KeysetPaginator.max_page_size == 500
+
+
+@pytest.mark.django_db
+def test_examens_radiologiques_list_is_paginated(api_client, dossier):
+    response = api_client.get('/examens/examens_radiologiques/')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {'next': None, 'results': []}
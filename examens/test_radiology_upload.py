@@ -0,0 +1,171 @@
+import io
+import os
+import pytest
+from datetime import date
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+from accounts.models import User, Technician, ExamenRadiologique, RadiologyImage, RadiologyUpload
+from examens.renditions import generate_renditions, rendition_pipeline
+
+
+def png_bytes(width=2000, height=1000):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (120, 30, 200)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def radiologue(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.RADIOLOGY_UPLOAD_DIR = str(tmp_path / 'uploads')
+    user = User.objects.create_user(email='radio@example.com', password='password123', role='technicien')
+    return Technician.objects.create(user=user, nom='Radio', prenom='Rania', role='radiologue')
+
+
+@pytest.fixture
+def examen(dossier):
+    return ExamenRadiologique.objects.create(date=date(2024, 6, 1), dossier_patient=dossier)
+
+
+@pytest.fixture
+def api_client(api_client, radiologue):
+    api_client.force_authenticate(user=radiologue.user)
+    return api_client
+
+
+def put_chunk(client, upload_id, data, start=None, size=None):
+    headers = {}
+    if start is not None:
+        headers['HTTP_CONTENT_RANGE'] = f'bytes {start}-{start + len(data) - 1}/{size}'
+    return client.put(f'/examens/radiology-images/uploads/{upload_id}/', data, content_type='application/octet-stream', **headers)
+
+
+@pytest.mark.django_db
+def test_chunked_upload_resumes_and_creates_image(api_client, radiologue, examen):
+    content = png_bytes()
+    response = api_client.post('/examens/radiology-images/uploads/', {
+        'examen_radiologique': examen.id, 'radiologue': radiologue.id, 'filename': 'scanner.png',
+        'titre': 'Scanner', 'size': len(content),
+    }, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    upload_id = response.data['id']
+
+    first, rest = content[:1000], content[1000:]
+    response = put_chunk(api_client, upload_id, first, start=0, size=len(content))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['offset'] == 1000
+
+    # Morceau renvoyé deux fois (client qui n'a pas reçu la réponse) : refusé avec l'offset courant
+    response = put_chunk(api_client, upload_id, first, start=0, size=len(content))
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.data['offset'] == 1000
+
+    assert api_client.get(f'/examens/radiology-images/uploads/{upload_id}/').data['offset'] == 1000
+
+    response = put_chunk(api_client, upload_id, rest)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['thumbnail'] is None
+    image = RadiologyImage.objects.get(id=response.data['id'])
+    assert image.titre == 'Scanner'
+    with image.image.open('rb') as stored:
+        assert stored.read() == content
+    assert not RadiologyUpload.objects.exists()
+    examen.refresh_from_db()
+    assert examen.radiologue == radiologue
+
+
+@pytest.mark.django_db
+def test_upload_rejects_bad_input(api_client, radiologue, examen):
+    response = api_client.post('/examens/radiology-images/uploads/', {
+        'examen_radiologique': examen.id, 'filename': 'notes.exe', 'size': 10,
+    }, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'filename' in response.data
+
+    upload = RadiologyUpload.objects.create(examen_radiologique=examen, filename='a.png', size=4)
+    assert put_chunk(api_client, upload.id, b'12345').status_code == status.HTTP_400_BAD_REQUEST
+
+    response = put_chunk(api_client, upload.id, b'1234')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not RadiologyUpload.objects.exists()
+    assert not RadiologyImage.objects.exists()
+
+
+@pytest.mark.django_db
+def test_renditions_are_generated_and_listed(api_client, radiologue, examen):
+    image = RadiologyImage.objects.create(
+        examen_radiologique=examen, image=SimpleUploadedFile('scan.png', png_bytes(), content_type='image/png')
+    )
+
+    assert generate_renditions([image.id]) == 1
+    assert generate_renditions([image.id]) == 0
+
+    image.refresh_from_db()
+    with Image.open(image.thumbnail.path) as thumbnail:
+        assert thumbnail.format == 'JPEG'
+        assert thumbnail.size == (256, 128)
+    with Image.open(image.web_image.path) as web:
+        assert web.size == (1600, 800)
+    assert os.path.getsize(image.thumbnail.path) < len(png_bytes())
+
+    response = api_client.get('/examens/radiology-images/', {'examen': examen.id})
+    assert response.status_code == status.HTTP_200_OK
+    assert image.thumbnail.name.startswith('radiology_images/thumbnails/')
+    assert response.data[0]['thumbnail'].endswith(image.thumbnail.name)
+    assert response.data[0]['web_image'].endswith(image.web_image.name)
+
+
+@pytest.mark.django_db
+def test_rendition_command_skips_unreadable_images(radiologue, examen):
+    RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile('ok.png', png_bytes(300, 300)))
+    broken = RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile('broken.png', b'not an image'))
+
+    call_command('generate_radiology_renditions', batch_size=1)
+
+    assert RadiologyImage.objects.exclude(thumbnail='').exclude(thumbnail__isnull=True).count() == 1
+    broken.refresh_from_db()
+    assert not broken.thumbnail
+
+
+@pytest.mark.django_db
+def test_append_chunk_refuses_offset_advanced_during_write(api_client, radiologue, examen):
+    from examens.uploads import UploadOffsetMismatch, append_chunk
+
+    response = api_client.post('/examens/radiology-images/uploads/', {
+        'examen_radiologique': examen.id, 'radiologue': radiologue.id, 'filename': 'scanner.png',
+        'titre': 'Scanner', 'size': 100,
+    }, format='json')
+    upload_id = response.data['id']
+
+    class RacingStream(io.BytesIO):
+        # Un autre envoi enregistre le même morceau pendant la lecture de celui-ci
+        def read(self, size=-1):
+            RadiologyUpload.objects.filter(id=upload_id).update(offset=10)
+            return super().read(size)
+
+    with pytest.raises(UploadOffsetMismatch) as error:
+        append_chunk(upload_id, RacingStream(b'x' * 10), 0, 10)
+    assert error.value.offset == 10
+    assert RadiologyUpload.objects.get(id=upload_id).offset == 10
+
+
+@pytest.mark.django_db
+def test_replacing_an_image_clears_its_renditions(api_client, examen, django_capture_on_commit_callbacks, monkeypatch):
+    queued = []
+    monkeypatch.setattr(rendition_pipeline, 'enqueue', queued.append)
+    image = RadiologyImage.objects.create(examen_radiologique=examen, image=SimpleUploadedFile('old.png', png_bytes(300, 300)))
+    generate_renditions([image.id])
+    image.refresh_from_db()
+    assert image.thumbnail and image.web_image
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.put(f'/examens/radiology-images/{image.id}/', {
+            'image': SimpleUploadedFile('new.png', png_bytes(400, 200), content_type='image/png'),
+        }, format='multipart')
+
+    assert response.status_code == status.HTTP_200_OK
+    image.refresh_from_db()
+    assert not image.thumbnail and not image.web_image
+    assert queued == [image.id]  # nouvelles déclinaisons mises en file
@@ -0,0 +1,85 @@
+import pytest
+from datetime import date
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import User, Technician, ExamenBiologique, ResultatExamen, parse_numeric_value
+
+
+def create_exam(dossier, laborantin, exam_date, **results):
+    examen = ExamenBiologique.objects.create(date=exam_date, laborantin=laborantin, dossier_patient=dossier)
+    for parametre, valeur in results.items():
+        ResultatExamen.objects.create(parametre=parametre, valeur=valeur, unite='mg/dL', examen_biologique=examen)
+    return examen
+
+
+def test_parse_numeric_value():
+    assert parse_numeric_value('85,5') == 85.5
+    assert parse_numeric_value('12 mg') == 12.0
+    assert parse_numeric_value(' < 0.5 mg/L') is None
+    assert parse_numeric_value('> 200') is None
+    assert parse_numeric_value('positif') is None
+    assert parse_numeric_value(None) is None
+
+
+@pytest.mark.django_db
+def test_save_parses_value(laborantin, dossier):
+    examen = create_exam(dossier, laborantin, date(2024, 1, 1), Glucose='130', CRP='positif')
+    glucose = ResultatExamen.objects.get(examen_biologique=examen, parametre='Glucose')
+    assert glucose.valeur_numerique == 130.0
+    assert ResultatExamen.objects.get(parametre='CRP').valeur_numerique is None
+
+    glucose.valeur = '92,4'
+    glucose.save(update_fields=['valeur'])
+    glucose.refresh_from_db()
+    assert glucose.valeur_numerique == 92.4
+
+
+@pytest.mark.django_db
+def test_backfill_command(laborantin, dossier):
+    create_exam(dossier, laborantin, date(2024, 1, 1), Glucose='130', Cholesterol='190', CRP='positif')
+    ResultatExamen.objects.update(valeur_numerique=None)
+
+    call_command('backfill_resultat_valeurs', batch_size=2)
+
+    assert dict(ResultatExamen.objects.values_list('parametre', 'valeur_numerique')) == {
+        'Glucose': 130.0, 'Cholesterol': 190.0, 'CRP': None,
+    }
+
+
+@pytest.mark.django_db
+def test_search_by_numeric_range(laborantin, dossier):
+    create_exam(dossier, laborantin, date(2023, 5, 1), Glucose='140')
+    create_exam(dossier, laborantin, date(2024, 5, 1), Glucose='127,5')
+    create_exam(dossier, laborantin, date(2024, 6, 1), Glucose='99')
+    create_exam(dossier, laborantin, date(2024, 7, 1), Glucose='non dosable')
+    create_exam(dossier, laborantin, date(2024, 8, 1), Glucose='< 50')  # borne seule : hors des plages
+
+    client = APIClient()
+    client.force_authenticate(user=laborantin.user)
+    url = '/examens/search-resultat-biologique/'
+
+    response = client.get(url, {'parametre': 'Glucose', 'valeur_gt': '126', 'date_debut': '2024-01-01'})
+    assert response.status_code == status.HTTP_200_OK
+    assert [r['valeur_numerique'] for r in response.data['results']] == [127.5]
+
+    response = client.get(url, {'parametre': 'Glucose', 'valeur_lte': '140'})
+    assert sorted(r['valeur'] for r in response.data['results']) == ['127,5', '140', '99']
+
+    # recherche transversale paginée
+    response = client.get(url, {'parametre': 'Glucose', 'page_size': 2})
+    assert len(response.data['results']) == 2
+    assert len(client.get(response.data['next']).data['results']) == 2
+
+    assert client.get(url, {'parametre': 'Glucose', 'valeur_gt': 'abc'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get(url, {'parametre': 'Glucose', 'valeur_gt': 'nan'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get(url, {'parametre': 'Glucose', 'valeur_lt': 'inf'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get(url, {'valeur_gt': '126'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    client.force_authenticate(user=dossier.patient.user)
+    assert client.get(url, {'parametre': 'Glucose'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    infirmier = User.objects.create_user(email='inf@example.com', password='password123', role='technicien')
+    Technician.objects.create(user=infirmier, nom='Inf', prenom='I', role='infermier')
+    client.force_authenticate(user=infirmier)
+    assert client.get(url, {'parametre': 'Glucose'}).status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,70 @@
+import pytest
+from datetime import date, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from accounts.models import ExamenBiologique
+
+
+@pytest.fixture
+def dossier(make_dossier, medecin):
+    return make_dossier(medecin_traitant=medecin)
+
+
+def create_examens(count, medecin, laborantin, dossier):
+    start = date(2024, 1, 1)
+    return [
+        ExamenBiologique.objects.create(
+            date=start + timedelta(days=i // 3),  # plusieurs examens par jour
+            technicien=medecin,
+            laborantin=laborantin,
+            dossier_patient=dossier,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_search_query_count_does_not_grow_with_results(api_client, laborantin, medecin, dossier):
+    api_client.force_authenticate(user=laborantin.user)
+
+    create_examens(3, medecin, laborantin, dossier)
+    with CaptureQueriesContext(connection) as small:
+        response = api_client.get('/examens/search-examens-biologiques/')
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data) == 3
+
+    create_examens(30, medecin, laborantin, dossier)
+    with CaptureQueriesContext(connection) as large:
+        response = api_client.get('/examens/search-examens-biologiques/')
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data) == 33
+    assert response.data[0]['nom_medecin'] == 'Doc'
+    assert response.data[0]['nom_lab'] == 'Labo'
+
+    assert len(large.captured_queries) == len(small.captured_queries)
+
+
+@pytest.mark.django_db
+def test_search_keyset_pagination_walks_all_pages(api_client, laborantin, medecin, dossier):
+    api_client.force_authenticate(user=laborantin.user)
+    examens = create_examens(11, medecin, laborantin, dossier)
+
+    seen = []
+    url = '/examens/search-examens-biologiques/?page_size=4'
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        seen.extend(item['id'] for item in response.data['results'])
+        url = response.data['next']
+
+    expected = [e.id for e in sorted(examens, key=lambda e: (e.date, e.id), reverse=True)]
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_search_invalid_cursor(api_client, laborantin):
+    api_client.force_authenticate(user=laborantin.user)
+    response = api_client.get('/examens/search-examens-biologiques/?cursor=not-a-cursor')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['detail'] == "Invalid cursor."
@@ -0,0 +1,123 @@
+import warnings
+
+import numpy as np
+
+from accounts.models import ResultatExamen
+
+
+# Valeurs de référence (adulte) : (paramètre, unité) en minuscules -> (min, max)
+REFERENCE_RANGES = {
+    ('glucose', 'mg/dl'): (70.0, 100.0),
+    ('glycémie', 'g/l'): (0.70, 1.10),
+    ('glycemie', 'g/l'): (0.70, 1.10),
+    ('cholesterol', 'mg/dl'): (0.0, 200.0),
+    ('cholestérol', 'g/l'): (0.0, 2.0),
+    ('triglycérides', 'g/l'): (0.0, 1.5),
+    ('hémoglobine', 'g/dl'): (12.0, 17.0),
+    ('créatinine', 'mg/l'): (6.0, 12.0),
+    ('urée', 'g/l'): (0.15, 0.45),
+}
+
+
+def reference_range(parametre, unite):
+    return REFERENCE_RANGES.get((parametre.strip().lower(), unite.strip().lower()))
+
+
+def _flags(values, bounds):
+    if bounds is None:
+        return [None] * len(values)
+    low, high = bounds
+    flags = np.where(values < low, 'low', np.where(values > high, 'high', 'normal')).astype(object)
+    flags[np.isnan(values)] = None
+    return flags.tolist()
+
+
+def _to_list(values):
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+class TrendMatrix:
+    """
+    Historique des résultats d'un dossier pivoté en matrice paramètre x examen.
+
+    `values[i, j]` est la valeur numérique (ResultatExamen.valeur_numerique) du
+    paramètre `series[i]` pour l'examen `exam_ids[j]`, NaN si absente ou non
+    numérique ; les examens sont triés par (date, id) croissants.
+    """
+
+    def __init__(self, series, exam_ids, dates, values):
+        self.series = series
+        self.exam_ids = exam_ids
+        self.dates = dates
+        self.values = values
+
+    @classmethod
+    def load(cls, dossier_id, parametres=None, date_debut=None, date_fin=None):
+        """
+        Charge l'historique en une seule requête et le pivote avec NumPy.
+        """
+        queryset = ResultatExamen.objects.filter(examen_biologique__dossier_patient_id=dossier_id)
+        if parametres:
+            queryset = queryset.filter(parametre__in=parametres)
+        if date_debut:
+            queryset = queryset.filter(examen_biologique__date__gte=date_debut)
+        if date_fin:
+            queryset = queryset.filter(examen_biologique__date__lte=date_fin)
+        rows = list(queryset.values_list('parametre', 'unite', 'valeur_numerique', 'examen_biologique_id', 'examen_biologique__date'))
+
+        if not rows:
+            return cls([], [], [], np.empty((0, 0)))
+
+        parametres_col, unites, numeriques, exam_col, dates_col = zip(*rows)
+
+        # Colonnes : examens triés par (date, id) ; lignes : couples (paramètre, unité)
+        exam_ids, first, columns = np.unique(np.array(exam_col, dtype=np.int64), return_index=True, return_inverse=True)
+        ordinals = np.array([dates_col[i].toordinal() for i in first], dtype=np.int64)
+        order = np.lexsort((exam_ids, ordinals))
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        columns = rank[columns]
+        exam_ids = exam_ids[order]
+        dates = [dates_col[i] for i in first[order]]
+
+        series_keys, rows_index = np.unique(
+            np.array([f"{parametre}\x00{unite}" for parametre, unite in zip(parametres_col, unites)]),
+            return_inverse=True,
+        )
+
+        values = np.full((len(series_keys), len(exam_ids)), np.nan)
+        values[rows_index, columns] = np.array(numeriques, dtype=float)  # None -> NaN
+
+        series = [tuple(key.split('\x00', 1)) for key in series_keys.tolist()]
+        return cls(series, exam_ids.tolist(), dates, values)
+
+    def column_of(self, exam_id):
+        return self.exam_ids.index(exam_id) if exam_id in self.exam_ids else None
+
+    def to_series(self):
+        """
+        Séries multi-points avec min / max / moyenne et repères de normalité.
+        """
+        with warnings.catch_warnings():
+            # lignes entièrement NaN : les statistiques valent NaN, converties en None
+            warnings.simplefilter('ignore', RuntimeWarning)
+            minimums = np.nanmin(self.values, axis=1) if self.values.size else []
+            maximums = np.nanmax(self.values, axis=1) if self.values.size else []
+            means = np.nanmean(self.values, axis=1) if self.values.size else []
+
+        result = []
+        for index, (parametre, unite) in enumerate(self.series):
+            row = self.values[index]
+            bounds = reference_range(parametre, unite)
+            result.append({
+                'parametre': parametre,
+                'unite': unite,
+                'label': f"{parametre} ({unite})",
+                'values': _to_list(row),
+                'min': _to_list([minimums[index]])[0],
+                'max': _to_list([maximums[index]])[0],
+                'mean': _to_list([means[index]])[0],
+                'reference': list(bounds) if bounds else None,
+                'flags': _flags(row, bounds),
+            })
+        return result
@@ -0,0 +1,143 @@
+import os
+import re
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou fichier, l'UPDATE conditionnel reste la garde
+    fcntl = None
+
+from PIL import Image
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import RadiologyImage, RadiologyUpload, ExamenRadiologique
+from .renditions import rendition_pipeline
+
+
+MAX_UPLOAD_SIZE = 2 * 1024 ** 3
+STREAM_CHUNK_SIZE = 1024 * 1024
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class UploadOffsetMismatch(Exception):
+    """
+    Le morceau reçu ne commence pas là où l'envoi s'est arrêté.
+    """
+
+    def __init__(self, offset):
+        super().__init__(f"Expected a chunk starting at byte {offset}.")
+        self.offset = offset
+
+
+def part_path(upload):
+    return os.path.join(settings.RADIOLOGY_UPLOAD_DIR, f"{upload.id}.part")
+
+
+def parse_content_range(header, size):
+    """
+    Analyse un en-tête 'Content-Range: bytes début-fin/total' et renvoie
+    (début, longueur). ValueError si l'en-tête est invalide pour cet envoi.
+    """
+    match = _CONTENT_RANGE.match(header.strip())
+    if not match:
+        raise ValueError("Invalid Content-Range header.")
+    start, end, total = match.groups()
+    start, end = int(start), int(end)
+    if end < start or end >= size or (total != '*' and int(total) != size):
+        raise ValueError("Content-Range does not match the upload size.")
+    return start, end - start + 1
+
+
+def append_chunk(upload_id, stream, start, length):
+    """
+    Ajoute `length` octets lus sur `stream` au fichier temporaire de l'envoi.
+
+    Aucune transaction ni verrou de ligne n'est tenu pendant la lecture du
+    client : l'offset est vérifié, le morceau écrit, puis le nouvel offset
+    enregistré par un UPDATE conditionnel (WHERE offset = début) ; si un autre
+    envoi du même morceau l'a devancé, UploadOffsetMismatch (409). Un verrou
+    fichier non bloquant empêche deux écritures simultanées du même fichier :
+    le second client reçoit aussitôt un 409 au lieu d'attendre.
+
+    Le fichier est tronqué à `offset` avant d'écrire, ce qui efface un morceau
+    interrompu après l'écriture mais avant l'enregistrement de l'offset. Si le
+    client se déconnecte, les octets effectivement reçus sont conservés et
+    l'envoi reprend à partir de là.
+    """
+    upload = RadiologyUpload.objects.get(id=upload_id)
+    if start != upload.offset:
+        raise UploadOffsetMismatch(upload.offset)
+    if start + length > upload.size:
+        raise ValueError("Chunk goes past the declared upload size.")
+
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o600), 'r+b') as part:
+        if fcntl is not None:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadOffsetMismatch(upload.offset)
+        # Relu sous le verrou : un envoi concurrent a pu terminer ce morceau entre-temps
+        offset = RadiologyUpload.objects.filter(id=upload.id).values_list('offset', flat=True).first()
+        if offset != start:
+            raise UploadOffsetMismatch(offset or 0)
+
+        written = 0
+        part.seek(start)
+        part.truncate()
+        while written < length:
+            data = stream.read(min(STREAM_CHUNK_SIZE, length - written)) if stream is not None else b''
+            if not data:
+                break
+            part.write(data)
+            written += len(data)
+        part.flush()
+
+        updated = RadiologyUpload.objects.filter(id=upload.id, offset=start).update(
+            offset=start + written, updated_at=timezone.now(),
+        )
+    if not updated:
+        raise UploadOffsetMismatch(RadiologyUpload.objects.filter(id=upload.id).values_list('offset', flat=True).first() or 0)
+
+    upload.offset = start + written
+    return upload
+
+
+def complete_upload(upload):
+    """
+    Transforme un envoi terminé en RadiologyImage : vérification du fichier
+    avec Pillow, copie vers le stockage des médias, puis génération des
+    déclinaisons en arrière-plan. ValueError si le fichier n'est pas une image.
+    """
+    path = part_path(upload)
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        abort_upload(upload)
+        raise ValueError(f"Uploaded file is not a valid image: {e}")
+
+    with transaction.atomic():
+        radiology_image = RadiologyImage(examen_radiologique_id=upload.examen_radiologique_id, titre=upload.titre)
+        with open(path, 'rb') as part:
+            radiology_image.image.save(upload.filename, File(part), save=True)
+        if upload.radiologue_id:
+            ExamenRadiologique.objects.filter(id=upload.examen_radiologique_id).update(radiologue_id=upload.radiologue_id)
+        upload.delete()
+        transaction.on_commit(lambda: rendition_pipeline.enqueue(radiology_image.id))
+
+    os.remove(path)
+    return radiology_image
+
+
+def abort_upload(upload):
+    """
+    Abandonne un envoi : supprime la ligne et le fichier temporaire.
+    """
+    path = part_path(upload)
+    upload.delete()
+    if os.path.exists(path):
+        os.remove(path)
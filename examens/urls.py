@@ -3,11 +3,14 @@ from .views import (
     ExamenRadiologiqueView,
     ExamenBiologiqueView,
     ResultatExamenView,
+    BulkResultatExamenView,
     SearchExamenBiologiqueView,
     SearchExamenRadiologiqueView,
     SearchResultatBiologiqueByIdView,
     GraphiquePatientView,
-    RadiologyImageAPIView
+    RadiologyImageAPIView,
+    RadiologyUploadView,
+    RadiologyUploadDetailView,
 )
 
 urlpatterns = [
@@ -19,9 +22,12 @@ urlpatterns = [
 
     path('resultats_examens/', ResultatExamenView.as_view(), name='resultats-examens-list'), #post
     path('resultat_examen/<int:pk>/', ResultatExamenView.as_view(), name='resultat-examen-detail'), #put, delete
+    path('resultats_examens/bulk/', BulkResultatExamenView.as_view(), name='resultats-examens-bulk'), #post (lot JSON ou CSV)
 
     path('radiology-images/', RadiologyImageAPIView.as_view(), name='radiology_image_list'),  # GET (recherche), POST
     path('radiology-images/<int:pk>/', RadiologyImageAPIView.as_view(), name='radiology_image_detail'),  # PUT, DELETE
+    path('radiology-images/uploads/', RadiologyUploadView.as_view(), name='radiology_upload_list'),  # POST (ouverture d'un envoi par morceaux)
+    path('radiology-images/uploads/<uuid:upload_id>/', RadiologyUploadDetailView.as_view(), name='radiology_upload_detail'),  # GET (offset), PUT (morceau), DELETE
 
     path('search-examens-biologiques/', SearchExamenBiologiqueView.as_view(), name='search_examens_biologiques'), #recherche
     path('search-examens-radiologiques/', SearchExamenRadiologiqueView.as_view(), name='search_examens_radiologiques'), #recherche
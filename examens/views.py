@@ -2,25 +2,58 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from accounts.models  import ExamenRadiologique , ExamenBiologique , ResultatExamen, Technician, RadiologyImage
-from .serializers import ExamenRadiologiqueSerializer , ExamenBiologiqueSerializer , ResultatExamenSerializer, RadiologyImageSerializer
+from accounts.models  import ExamenRadiologique , ExamenBiologique , ResultatExamen, Technician, RadiologyImage, RadiologyUpload
+from .serializers import ExamenRadiologiqueSerializer , ExamenBiologiqueSerializer , ResultatExamenSerializer, RadiologyImageSerializer, RadiologyUploadSerializer
 from datetime import datetime
+import math
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from accounts.mixin import CheckUserRoleMixin
+from accounts.pagination import KeysetPaginator, PaginatedListMixin, KEYSET_PAGINATION_PARAMETERS
+from .filters import ExamenBiologiqueFilter, ExamenRadiologiqueFilter, ResultatExamenFilter
+from .trends import TrendMatrix
+from .bulk import ingest_resultats_bulk
+from accounts.csv_import import read_csv_rows
+from .renditions import clear_renditions, rendition_pipeline
+from .uploads import UploadOffsetMismatch, append_chunk, complete_upload, abort_upload, parse_content_range
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-class ResultatExamenView(APIView,CheckUserRoleMixin):
+class ResultatExamenView(PaginatedListMixin, APIView,CheckUserRoleMixin):
     permission_classes = [IsAuthenticated]
+    filterset_class = ResultatExamenFilter
+    list_date_field = None
 
     @swagger_auto_schema(
         operation_summary="Retrieve all exam results",
-        operation_description="This endpoint retrieves all exam results. Requires the user to have the role of 'patient', 'laborantin', or 'medecin'.",
+        operation_description=(
+            "This endpoint retrieves exam results, newest first, one page at a time ({'next', 'results'}). "
+            "Requires the user to have the role of 'patient', 'laborantin', or 'medecin'."
+        ),
+        manual_parameters=KEYSET_PAGINATION_PARAMETERS + [
+            openapi.Parameter('examen_biologique', openapi.IN_QUERY, description="ID of the biological exam.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('parametre', openapi.IN_QUERY, description="Exact parameter name.", type=openapi.TYPE_STRING),
+            openapi.Parameter('valeur_gt', openapi.IN_QUERY, description="Numeric value strictly greater than.", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('valeur_gte', openapi.IN_QUERY, description="Numeric value greater than or equal to.", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('valeur_lt', openapi.IN_QUERY, description="Numeric value strictly less than.", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('valeur_lte', openapi.IN_QUERY, description="Numeric value less than or equal to.", type=openapi.TYPE_NUMBER),
+        ],
         responses={
-            200: ResultatExamenSerializer(many=True),
+            200: openapi.Response(
+                description="One page of exam results.",
+                examples={
+                    "application/json": {
+                        "next": "http://127.0.0.1:8000/examens/resultats_examens/?page_size=50&cursor=MTIz",
+                        "results": [
+                            {"id": 124, "parametre": "Glucose", "valeur": "92", "valeur_numerique": 92.0, "unite": "mg/dL", "commentaire": None, "examen_biologique": 101}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response("Invalid filter, cursor or page_size."),
             403: openapi.Response("You do not have permission to get this resource.")
         }
     )
@@ -29,9 +62,7 @@ class ResultatExamenView(APIView,CheckUserRoleMixin):
         if not self.check_user_role(request.user, ['patient'],['laborantin','medecin']):
             return Response({'error': 'You do not have permission to get this resource.'}, status=status.HTTP_403_FORBIDDEN)
 
-        resultats = ResultatExamen.objects.all()
-        serializer = ResultatExamenSerializer(resultats, many=True)
-        return Response(serializer.data)
+        return self.list_response(request, ResultatExamen.objects.all(), ResultatExamenSerializer)
 
     @swagger_auto_schema(
         operation_summary="Create a new exam result",
@@ -126,46 +157,146 @@ class ResultatExamenView(APIView,CheckUserRoleMixin):
             return Response({'error': 'Résultat d\'examen non trouvé'}, status=status.HTTP_404_NOT_FOUND)
 
 
+###########################################################################################################################################
+
+class BulkResultatExamenView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Ingest many exam results at once",
+        operation_description=(
+            "Stores a batch of exam results, typically one analyzer run. The body is either a JSON list "
+            "(or {\"resultats\": [...]}) of objects with the fields examen_biologique, parametre, valeur, unite "
+            "and optionally commentaire, or a multipart upload of a CSV file in the 'file' field whose header row "
+            "names those fields. A result that already exists for the same (parametre, examen_biologique) is updated. "
+            "Exam ids are checked once for the whole batch and rows are written with a single upsert per chunk. "
+            "The authenticated laborantin is assigned to the exams that have none. "
+            "The response reports the outcome of every row."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_OBJECT),
+        ),
+        responses={
+            200: openapi.Response(
+                description="At least one result was stored.",
+                examples={
+                    "application/json": {
+                        "created": 1,
+                        "updated": 1,
+                        "failed": 1,
+                        "rows": [
+                            {"row": 0, "status": "created", "examen_biologique": 101, "parametre": "Glucose"},
+                            {"row": 1, "status": "updated", "examen_biologique": 101, "parametre": "Cholesterol"},
+                            {"row": 2, "status": "error", "errors": {"examen_biologique": ["Invalid pk \"999\" - object does not exist."]}}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="No result could be stored.",
+                examples={
+                    "application/json": {
+                        "error": "Expected a list of results or a CSV file."
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied. You do not have permission to create this resource.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to create this resource."
+                    }
+                }
+            )
+        }
+    )
+
+    def post(self, request):
+        if not self.check_user_role(request.user, technician_roles=['laborantin']):
+            return Response({'error': 'You do not have permission to create this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        uploaded = request.FILES.get('file')
+        if uploaded is not None:
+            try:
+                rows = read_csv_rows(uploaded)
+            except (UnicodeDecodeError, ValueError) as e:
+                return Response({'error': f"Invalid CSV file: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(request.data, list):
+            rows = request.data
+        elif isinstance(request.data, dict):
+            rows = request.data.get('resultats')
+        else:
+            rows = None
+
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'Expected a list of results or a CSV file.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        laborantin = Technician.objects.filter(user_id=request.user.id).first()
+        report = ingest_resultats_bulk(rows, laborantin=laborantin)
+        counts = {'created': 0, 'updated': 0, 'error': 0}
+        for row in report:
+            counts[row['status']] += 1
+        response_data = {
+            'created': counts['created'],
+            'updated': counts['updated'],
+            'failed': counts['error'],
+            'rows': report,
+        }
+        stored = counts['created'] + counts['updated']
+        return Response(response_data, status=status.HTTP_200_OK if stored else status.HTTP_400_BAD_REQUEST)
+
+
 
 ###########################################################################################################################################
  
 
-class ExamenBiologiqueView(APIView):
+class ExamenBiologiqueView(PaginatedListMixin, APIView, CheckUserRoleMixin):
     permission_classes = [IsAuthenticated]
+    filterset_class = ExamenBiologiqueFilter
 
     def check_user_role(self, user, allowed_roles=None):
         """
         Check if the authenticated user has a role of 'technicien' and if their technician role matches allowed roles.
         
         """
-        
-        
-        if user.role != 'technicien':  # Only 'technicien' users are allowed
-            return False
-
-        # Check if the user has a related 'Technician' instance
-        try:
-            technician = user.technician  # Access the related 'Technician' model
-            if allowed_roles and technician.role in allowed_roles:
-                return True  # User's technician role matches allowed roles
-            return False  # User's technician role does not match allowed roles
-        except Technician.DoesNotExist:
-            return False  # No related Technician instance
+        return user.role == 'technicien' and super().check_user_role(user, technician_roles=allowed_roles)
         
 
     @swagger_auto_schema(
         operation_summary="Retrieve all biological exams",
-        operation_description="Fetch all biological exams recorded in the system.",
+        operation_description=(
+            "Fetch the biological exams recorded in the system with their results, most recent first, "
+            "one page at a time ({'next', 'results'})."
+        ),
+        manual_parameters=KEYSET_PAGINATION_PARAMETERS + [
+            openapi.Parameter('date', openapi.IN_QUERY, description="Exact date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_debut', openapi.IN_QUERY, description="From date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_fin', openapi.IN_QUERY, description="To date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('dossier_patient', openapi.IN_QUERY, description="ID of the patient file.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('technicien', openapi.IN_QUERY, description="ID of the prescribing technician.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('laborantin', openapi.IN_QUERY, description="ID of the laborantin.", type=openapi.TYPE_INTEGER),
+        ],
         responses={
-            200: ExamenBiologiqueSerializer(many=True),
+            200: openapi.Response(
+                description="One page of biological exams.",
+                examples={
+                    "application/json": {
+                        "next": "http://127.0.0.1:8000/examens/examens_biologiques/?page_size=50&cursor=MjAyNC0xMi0zMTo0Mg==",
+                        "results": [
+                            {"id": 42, "date": "2024-12-31", "technicien": 3, "laborantin": 5, "description": "Bilan", "dossier_patient": 12, "resultats": []}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response("Invalid filter, cursor or page_size."),
         }
     )
 
     def get(self, request):
-        
-        examens = ExamenBiologique.objects.all()
-        serializer = ExamenBiologiqueSerializer(examens, many=True)
-        return Response(serializer.data)
+        # resultats imbriqués : une requête de prefetch pour toute la page
+        examens = ExamenBiologique.objects.prefetch_related('resultats')
+        return self.list_response(request, examens, ExamenBiologiqueSerializer)
     
     @swagger_auto_schema(
         operation_summary="Create a biological exam",
@@ -322,40 +453,46 @@ class ExamenBiologiqueView(APIView):
 ###########################################################################################################################################
 
 
-class ExamenRadiologiqueView(APIView):
+class ExamenRadiologiqueView(PaginatedListMixin, APIView, CheckUserRoleMixin):
     permission_classes = [IsAuthenticated]
+    filterset_class = ExamenRadiologiqueFilter
 
 
     def check_user_role(self, user,allowed_roles=None):
         """
-        Check if the authenticated user has a role of 'technicien' and, if so, if their related 'Technician' role is 'medecin'.
+        Check if the authenticated user has a role of 'technicien' and, if so, if their related 'Technician' role is among the allowed roles.
         """
-        # First, check if the user has a role of 'technicien'
-        if user.role != 'technicien':
-            return False  # User is not a 'technicien', return False
-        
-        # Now check if the user has a related 'Technician' and if the role is 'medecin'
-        try:
-            technician = user.technician  # Access the related 'Technician' model
-            if allowed_roles and technician.role in allowed_roles:
-                return True  # User's technician role matches allowed roles
-            return False  # User's technician role does not match allowed roles
-        except Technician.DoesNotExist:
-            return False  # No related Technician instance
+        return user.role == 'technicien' and super().check_user_role(user, technician_roles=allowed_roles)
 
     @swagger_auto_schema(
         operation_summary="Retrieve all radiological exams",
-        operation_description="This endpoint allows retrieving all radiological exams.",
+        operation_description="This endpoint allows retrieving the radiological exams, most recent first, one page at a time ({'next', 'results'}).",
+        manual_parameters=KEYSET_PAGINATION_PARAMETERS + [
+            openapi.Parameter('date', openapi.IN_QUERY, description="Exact date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_debut', openapi.IN_QUERY, description="From date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_fin', openapi.IN_QUERY, description="To date (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('dossier_patient', openapi.IN_QUERY, description="ID of the patient file.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('technicien', openapi.IN_QUERY, description="ID of the prescribing technician.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('radiologue', openapi.IN_QUERY, description="ID of the radiologist.", type=openapi.TYPE_INTEGER),
+        ],
         responses={
-            200: ExamenRadiologiqueSerializer(many=True),
+            200: openapi.Response(
+                description="One page of radiological exams.",
+                examples={
+                    "application/json": {
+                        "next": None,
+                        "results": [
+                            {"id": 12, "date": "2024-12-31", "technicien": 3, "radiologue": 4, "compte_rendu": "RAS", "description": "Thorax", "dossier_patient": 12}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response("Invalid filter, cursor or page_size."),
         }
     )
 
     def get(self, request):
-        
-        examens = ExamenRadiologique.objects.all()
-        serializer = ExamenRadiologiqueSerializer(examens, many=True)
-        return Response(serializer.data)
+        return self.list_response(request, ExamenRadiologique.objects.all(), ExamenRadiologiqueSerializer)
 
     @swagger_auto_schema(
         operation_summary="Create a radiological exam",
@@ -502,6 +639,26 @@ class ExamenRadiologiqueView(APIView):
 
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
+
+def radiology_image_data(request, image):
+    """
+    Représentation d'une image radiologique avec les URL absolues du fichier
+    et de ses déclinaisons (None tant qu'elles ne sont pas générées).
+    """
+    def absolute_url(field):
+        return request.build_absolute_uri(field.url) if field else None
+
+    return {
+        'id': image.id,
+        'examen_radiologique': image.examen_radiologique_id,
+        'image': absolute_url(image.image),
+        'uploaded_at': image.uploaded_at,
+        'titre': image.titre,
+        'thumbnail': absolute_url(image.thumbnail),
+        'web_image': absolute_url(image.web_image),
+    }
+
+
 class RadiologyImageAPIView(APIView,CheckUserRoleMixin):
     """
     API pour gérer les opérations CRUD et la recherche sur RadiologyImage.
@@ -597,19 +754,10 @@ class RadiologyImageAPIView(APIView,CheckUserRoleMixin):
         serializer = RadiologyImageSerializer(data=request.data)
         if serializer.is_valid():
             radiology_image = serializer.save()
+            # Miniature et déclinaison web générées en arrière-plan
+            transaction.on_commit(lambda: rendition_pipeline.enqueue(radiology_image.id))
 
-            # Construire l'URL complète de l'image
-            image_url = request.build_absolute_uri(radiology_image.image.url)
-
-            response_data = {
-            'id': radiology_image.id,
-            'examen_radiologique': radiology_image.examen_radiologique_id,
-            'image': image_url,
-            'titre': radiology_image.titre,
-            'uploaded_at': radiology_image.uploaded_at
-        }
-
-            return Response(response_data, status=status.HTTP_201_CREATED)
+            return Response(radiology_image_data(request, radiology_image), status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -675,17 +823,14 @@ class RadiologyImageAPIView(APIView,CheckUserRoleMixin):
         # Validation et mise à jour
         serializer = RadiologyImageSerializer(image, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            # Ajout de l'URL complète de l'image
-            image_url = request.build_absolute_uri(image.image.url)
-            response_data = {
-            'id': image.id,
-            'examen_radiologique': image.examen_radiologique_id,
-            'image': image_url,
-            'titre': image.titre,
-            'uploaded_at': image.uploaded_at
-        }
-            return Response(response_data, status=status.HTTP_200_OK)
+            if 'image' in serializer.validated_data:
+                # Nouveau fichier : les déclinaisons sont à refaire
+                clear_renditions(image)
+                serializer.save()
+                transaction.on_commit(lambda: rendition_pipeline.enqueue(image.id))
+            else:
+                serializer.save()
+            return Response(radiology_image_data(request, image), status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -742,7 +887,10 @@ class RadiologyImageAPIView(APIView,CheckUserRoleMixin):
 
     @swagger_auto_schema(
         operation_summary="Search for radiology images",
-        operation_description="This endpoint allows users (patient,radiologue,medecin) to search for radiology images based on multiple filters like image ID, file path, date, exam, or title.",
+        operation_description=(
+            "This endpoint allows users (patient,radiologue,medecin) to search for radiology images based on multiple filters like image ID, file path, date, exam, or title. "
+            "Each image comes with the URLs of its thumbnail (256px) and web-sized (1600px) JPEG renditions, null until the background pipeline has built them."
+        ),
         manual_parameters=[
             openapi.Parameter('id', openapi.IN_QUERY, description="Search by image ID", type=openapi.TYPE_INTEGER),
             openapi.Parameter('image', openapi.IN_QUERY, description="Search by image file path", type=openapi.TYPE_STRING),
@@ -760,7 +908,9 @@ class RadiologyImageAPIView(APIView,CheckUserRoleMixin):
                             "examen_radiologique": 12,
                             "image": "http://127.0.0.1:8000/media/radiology_images/sample.jpg",
                             "uploaded_at": "2024-12-31T12:00:00Z",
-                            "titre": "Chest X-ray"
+                            "titre": "Chest X-ray",
+                            "thumbnail": "http://127.0.0.1:8000/media/radiology_images/thumbnails/sample_thumbnail.jpg",
+                            "web_image": "http://127.0.0.1:8000/media/radiology_images/web/sample_web_image.jpg"
                         }
                     ]
                 }
@@ -802,20 +952,174 @@ class RadiologyImageAPIView(APIView,CheckUserRoleMixin):
         if titre : 
             images = images.filter(titre=titre)    
 
-        resultats = []
-        for image in images:
-            full_image_url = request.build_absolute_uri(image.image.url)
-            resultats.append({
-            'id': image.id,
-            'examen_radiologique': image.examen_radiologique.id,
-            'image': full_image_url,
-            'uploaded_at': image.uploaded_at,
-            'titre': image.titre
-            })
+        resultats = [radiology_image_data(request, image) for image in images]
         return Response(resultats, status=status.HTTP_200_OK)
 
 
 
+###########################################################################################################################################
+
+class RadiologyUploadView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Start a resumable radiology image upload",
+        operation_description=(
+            "Opens a chunked upload session for a large radiology image. The bytes are then sent with PUT "
+            "radiology-images/uploads/<id>/ (raw body, optional 'Content-Range: bytes start-end/size' header). "
+            "When the last byte is received the image is attached to the radiological exam and its thumbnail "
+            "and web renditions are generated in the background."
+        ),
+        request_body=RadiologyUploadSerializer,
+        responses={
+            201: openapi.Response(
+                description="Upload session created.",
+                examples={
+                    "application/json": {
+                        "id": "4f6c1d2e-8a1b-4c55-9a43-2f1e0b1c9d10",
+                        "examen_radiologique": 12,
+                        "radiologue": 3,
+                        "filename": "scanner.png",
+                        "titre": "Chest CT",
+                        "size": 524288000,
+                        "offset": 0,
+                        "created_at": "2024-12-31T12:00:00Z"
+                    }
+                }
+            ),
+            400: openapi.Response("Invalid data provided."),
+            403: openapi.Response("You do not have permission to create this resource.")
+        }
+    )
+
+    def post(self, request):
+        if not self.check_user_role(request.user, technician_roles=['radiologue']):
+            return Response({'error': 'You do not have permission to create this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = RadiologyUploadSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RadiologyUploadDetailView(APIView, CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="State of a resumable upload",
+        operation_description="Returns the upload session; 'offset' is the number of bytes already stored, i.e. where to resume.",
+        responses={
+            200: RadiologyUploadSerializer,
+            403: openapi.Response("You do not have permission to get this resource."),
+            404: openapi.Response("Upload not found.")
+        }
+    )
+
+    def get(self, request, upload_id):
+        if not self.check_user_role(request.user, technician_roles=['radiologue']):
+            return Response({'error': 'You do not have permission to get this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = get_object_or_404(RadiologyUpload, id=upload_id)
+        return Response(RadiologyUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_summary="Send a chunk of a resumable upload",
+        operation_description=(
+            "Appends the raw request body to the upload. The chunk must start at the current offset: either "
+            "send 'Content-Range: bytes start-end/size' or omit it to append at the offset. A chunk that does not "
+            "start at the offset is rejected with 409 and the current offset. The body is streamed to disk "
+            "without being buffered in memory. The last chunk creates the radiology image (201)."
+        ),
+        manual_parameters=[
+            openapi.Parameter('Content-Range', openapi.IN_HEADER, description="bytes start-end/size", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Chunk stored, upload not complete yet.",
+                examples={"application/json": {"id": "4f6c1d2e-8a1b-4c55-9a43-2f1e0b1c9d10", "offset": 10485760, "size": 524288000}}
+            ),
+            201: openapi.Response(
+                description="Upload complete, radiology image created.",
+                examples={
+                    "application/json": {
+                        "id": 1,
+                        "examen_radiologique": 12,
+                        "image": "http://127.0.0.1:8000/media/radiology_images/scanner.png",
+                        "uploaded_at": "2024-12-31T12:00:00Z",
+                        "titre": "Chest CT",
+                        "thumbnail": None,
+                        "web_image": None
+                    }
+                }
+            ),
+            400: openapi.Response("Invalid Content-Range, chunk too large or file is not an image."),
+            403: openapi.Response("You do not have permission to modify this resource."),
+            404: openapi.Response("Upload not found."),
+            409: openapi.Response(
+                description="Chunk does not start at the current offset.",
+                examples={"application/json": {"error": "Expected a chunk starting at byte 10485760.", "offset": 10485760}}
+            )
+        }
+    )
+
+    def put(self, request, upload_id):
+        if not self.check_user_role(request.user, technician_roles=['radiologue']):
+            return Response({'error': 'You do not have permission to modify this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = get_object_or_404(RadiologyUpload, id=upload_id)
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'error': 'Invalid Content-Length header.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        start = upload.offset
+        content_range = request.META.get('HTTP_CONTENT_RANGE')
+        if content_range:
+            try:
+                start, range_length = parse_content_range(content_range, upload.size)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if range_length != length:
+                return Response({'error': 'Content-Range does not match Content-Length.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Lecture directe du flux : le corps n'est jamais chargé en mémoire par les parsers
+            upload = append_chunk(upload.id, request.stream, start, length)
+        except UploadOffsetMismatch as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if upload.offset < upload.size:
+            return Response({'id': upload.id, 'offset': upload.offset, 'size': upload.size}, status=status.HTTP_200_OK)
+
+        try:
+            radiology_image = complete_upload(upload)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(radiology_image_data(request, radiology_image), status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        operation_summary="Abort a resumable upload",
+        operation_description="Deletes the upload session and the bytes received so far.",
+        responses={
+            204: openapi.Response("Upload aborted."),
+            403: openapi.Response("You do not have permission to delete this resource."),
+            404: openapi.Response("Upload not found.")
+        }
+    )
+
+    def delete(self, request, upload_id):
+        if not self.check_user_role(request.user, technician_roles=['radiologue']):
+            return Response({'error': 'You do not have permission to delete this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = get_object_or_404(RadiologyUpload, id=upload_id)
+        abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+
 ###########################################################################################################################################
 class SearchExamenBiologiqueView(APIView,CheckUserRoleMixin):
     permission_classes = [IsAuthenticated]
@@ -829,7 +1133,9 @@ class SearchExamenBiologiqueView(APIView,CheckUserRoleMixin):
             openapi.Parameter('date', openapi.IN_QUERY, description="Date of the exam (YYYY-MM-DD)", type=openapi.TYPE_STRING),
             openapi.Parameter('dossier', openapi.IN_QUERY, description="Patient file ID", type=openapi.TYPE_INTEGER),
             openapi.Parameter('description', openapi.IN_QUERY, description="Exam description (partial match)", type=openapi.TYPE_STRING),
-            openapi.Parameter('laborantin', openapi.IN_QUERY, description="Laborantin's name (partial match)", type=openapi.TYPE_STRING)
+            openapi.Parameter('laborantin', openapi.IN_QUERY, description="Laborantin's name (partial match)", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Page size (max 500). When set, the response is paginated: {'next': <url>, 'results': [...]}", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor taken from the 'next' link of the previous page (ordered by date, id descending)", type=openapi.TYPE_STRING)
         ],
         responses={
             200: openapi.Response(
@@ -890,7 +1196,8 @@ class SearchExamenBiologiqueView(APIView,CheckUserRoleMixin):
         laborantin = request.GET.get('laborantin',None)
 
         try:
-            examens_bio = ExamenBiologique.objects.all()
+            # Jointures résolues en une seule requête : plus de N+1 sur technicien / laborantin
+            examens_bio = ExamenBiologique.objects.select_related('technicien', 'laborantin')
 
             if id:
                 examens_bio = examens_bio.filter(id=id)
@@ -899,12 +1206,16 @@ class SearchExamenBiologiqueView(APIView,CheckUserRoleMixin):
             if date:
                 examens_bio = examens_bio.filter(date=date)
             if dossier:
-                examens_bio = examens_bio.filter(dossier_patient__id=dossier)
+                examens_bio = examens_bio.filter(dossier_patient_id=dossier)
             if description:
                 examens_bio = examens_bio.filter(description__icontains=description)
             if laborantin:
                 examens_bio = examens_bio.filter(laborantin__nom__icontains=laborantin)
 
+            paginator = KeysetPaginator()
+            paginate = paginator.is_requested(request)
+            if paginate:
+                examens_bio = paginator.paginate_queryset(examens_bio, request)
 
             # Construction de la réponse avec les objets et les informations du technicien
             result = []
@@ -913,16 +1224,18 @@ class SearchExamenBiologiqueView(APIView,CheckUserRoleMixin):
                     'id': examen.id,
                     'date': examen.date,
                     'description': examen.description,
-                    'dossier_patient': examen.dossier_patient.id,
-                    'technicien':examen.technicien.id,
-                    'nom_medecin': examen.technicien.nom,
-                    'prenom_medecin': examen.technicien.prenom,
-                    'laborantin': examen.laborantin.id if examen.laborantin else None,
+                    'dossier_patient': examen.dossier_patient_id,
+                    'technicien': examen.technicien_id,
+                    'nom_medecin': examen.technicien.nom if examen.technicien else None,
+                    'prenom_medecin': examen.technicien.prenom if examen.technicien else None,
+                    'laborantin': examen.laborantin_id,
                     'nom_lab': examen.laborantin.nom if examen.laborantin else None,
                     'prenom_lab': examen.laborantin.prenom if examen.laborantin else None
                    
                 })
 
+            if paginate:
+                return Response(paginator.get_paginated_data(result), status=status.HTTP_200_OK)
             return Response(result, status=status.HTTP_200_OK)
         
         except ExamenBiologique.DoesNotExist:
@@ -1115,22 +1428,29 @@ class SearchExamenRadiologiqueView(APIView,CheckUserRoleMixin):
 
 
 
-class SearchResultatBiologiqueByIdView(APIView,CheckUserRoleMixin):
+class SearchResultatBiologiqueByIdView(PaginatedListMixin, APIView,CheckUserRoleMixin):
     permission_classes = [IsAuthenticated]
+    list_date_field = None
+    VALEUR_LOOKUPS = {'valeur_gt': 'gt', 'valeur_gte': 'gte', 'valeur_lt': 'lt', 'valeur_lte': 'lte'}
 
     @swagger_auto_schema(
         operation_summary="Search biological examination results by ID",
         operation_description=(
             "This endpoint allows users to search for biological examination results using "
-            "the `idExamenBio` and optionally filter results by `parametre`."
+            "the `idExamenBio` and optionally filter results by `parametre`. "
+            "Numeric range filters (valeur_gt, valeur_gte, valeur_lt, valeur_lte) apply to the parsed numeric "
+            "value of each result; non-numeric results never match a range. "
+            "Technicians ('laborantin', 'medecin') may omit `idExamenBio` when `parametre` is given to search "
+            "across all examinations (e.g. glucose > 126 over a date range); this search is paginated "
+            "({'next', 'results'}, most recent results first)."
         ),
         manual_parameters=[
             openapi.Parameter(
                 "idExamenBio",
                 openapi.IN_QUERY,
-                description="ID of the biological examination to search for.",
+                description="ID of the biological examination to search for (optional for technicians when `parametre` is given).",
                 type=openapi.TYPE_INTEGER,
-                required=True,
+                required=False,
             ),
             openapi.Parameter(
                 "parametre",
@@ -1139,7 +1459,13 @@ class SearchResultatBiologiqueByIdView(APIView,CheckUserRoleMixin):
                 type=openapi.TYPE_STRING,
                 required=False,
             ),
-        ],
+            openapi.Parameter('valeur_gt', openapi.IN_QUERY, description="Numeric value strictly greater than.", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('valeur_gte', openapi.IN_QUERY, description="Numeric value greater than or equal to.", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('valeur_lt', openapi.IN_QUERY, description="Numeric value strictly lower than.", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('valeur_lte', openapi.IN_QUERY, description="Numeric value lower than or equal to.", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('date_debut', openapi.IN_QUERY, description="Examination date from (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_fin', openapi.IN_QUERY, description="Examination date to (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+        ] + KEYSET_PAGINATION_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Results found successfully.",
@@ -1199,17 +1525,47 @@ class SearchResultatBiologiqueByIdView(APIView,CheckUserRoleMixin):
         id_examen_bio = request.GET.get('idExamenBio', None)
         parametre = request.GET.get('parametre',None)
 
+        # Recherche transversale (sans idExamenBio) : réservée aux médecins et laborantins, sur un paramètre donné
         if not id_examen_bio:
-            return Response({"detail": "idExamenBio is required."}, status=status.HTTP_400_BAD_REQUEST)
+            if not parametre or request.user.role != 'technicien':
+                return Response({"detail": "idExamenBio is required."}, status=status.HTTP_400_BAD_REQUEST)
+            if not self.check_user_role(request.user, technician_roles=['laborantin','medecin']):
+                return Response({'error': 'You do not have permission to search for this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        range_filters = {}
+        for param, lookup in self.VALEUR_LOOKUPS.items():
+            value = request.GET.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                bound = float(value.replace(',', '.'))
+            except ValueError:
+                bound = None
+            if bound is None or not math.isfinite(bound):
+                return Response({"detail": f"{param} must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+            range_filters[f'valeur_numerique__{lookup}'] = bound
 
         try:
-            resultat = ResultatExamen.objects.filter(examen_biologique__id=id_examen_bio)
+            if id_examen_bio:
+                resultat = ResultatExamen.objects.filter(examen_biologique__id=id_examen_bio)
 
-            if not resultat:
-                return Response({"detail": "No result found for the given idExamenBio."}, status=status.HTTP_404_NOT_FOUND)
+                if not resultat:
+                    return Response({"detail": "No result found for the given idExamenBio."}, status=status.HTTP_404_NOT_FOUND)
+            else:
+                resultat = ResultatExamen.objects.all()
 
             if parametre:
                 resultat = resultat.filter(parametre=parametre)
+            if range_filters:
+                resultat = resultat.filter(**range_filters)
+            if request.GET.get('date_debut'):
+                resultat = resultat.filter(examen_biologique__date__gte=request.GET['date_debut'])
+            if request.GET.get('date_fin'):
+                resultat = resultat.filter(examen_biologique__date__lte=request.GET['date_fin'])
+
+            if not id_examen_bio:
+                # Sur tout l'historique : une page à la fois
+                return self.list_response(request, resultat, ResultatExamenSerializer)
 
             resultat_serializer = ResultatExamenSerializer(resultat, many=True)
             return Response(resultat_serializer.data, status=status.HTTP_200_OK)
@@ -1225,26 +1581,15 @@ class GraphiquePatientView(APIView, CheckUserRoleMixin):
 
     permission_classes = [IsAuthenticated]
 
-    def generate_data_array(self,result, labels):
-        data = []
-        for label in labels:
-            parametre, unite = label.split(' (')
-            unite = unite[:-1]  # Remove the closing parenthesis
-
-            # Find matching result in combined_results
-            if result.parametre == parametre and result.unite == unite:
-                data.append(float(result.valeur))
-            else:
-                data.append(0)
-        
-        return data
-
     @swagger_auto_schema(
         operation_summary="Retrieve datasets for a patient's biological exam results.",
         operation_description=(
             "This endpoint allows users with role 'laborantin'  to retrieve labels and datasets for graphical representation "
             "of a patient's biological exam results. The datasets include the current exam "
-            "and the most recent previous exam if available."
+            "and the most recent previous exam if available. "
+            "'dates' and 'series' give the whole history of the patient up to the current exam (or within "
+            "date_debut / date_fin): one multi-point series per parameter with min / max / mean and, when a "
+            "reference range is known, a 'low' / 'normal' / 'high' flag per point. Non-numeric or missing values are null."
         ),
         manual_parameters=[
             openapi.Parameter(
@@ -1253,25 +1598,50 @@ class GraphiquePatientView(APIView, CheckUserRoleMixin):
                 description="ID of the biological exam to retrieve.",
                 type=openapi.TYPE_INTEGER,
                 required=True
-            )
+            ),
+            openapi.Parameter('parametres', openapi.IN_QUERY, description="Comma separated list of parameters to include (default: all).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_debut', openapi.IN_QUERY, description="Start of the history (YYYY-MM-DD).", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_fin', openapi.IN_QUERY, description="End of the history (YYYY-MM-DD, default: date of the current exam).", type=openapi.TYPE_STRING),
         ],
         responses={
             200: openapi.Response(
                 description="Datasets retrieved successfully.",
                 examples={
                     "application/json": {
-                        "labels": ["Glucose (mg/dL)", "Cholesterol (mg/dL)"],
+                        "labels": ["Cholesterol (mg/dL)", "Glucose (mg/dL)"],
                         "datasets": [
                             {
-                                "data": [85, 190]
+                                "data": [190, 85]
                             },
                             {
-                                "data": [80, 200]
+                                "data": [200, 80]
+                            }
+                        ],
+                        "dates": ["2023-06-02", "2024-01-10", "2024-12-31"],
+                        "series": [
+                            {
+                                "parametre": "Glucose",
+                                "unite": "mg/dL",
+                                "label": "Glucose (mg/dL)",
+                                "values": [92, 80, 85],
+                                "min": 80,
+                                "max": 92,
+                                "mean": 85.67,
+                                "reference": [70, 100],
+                                "flags": ["normal", "normal", "normal"]
                             }
                         ]
                     }
                 }
             ),
+            400: openapi.Response(
+                description="Invalid date.",
+                examples={
+                    "application/json": {
+                        "error": "time data '2024-13-01' does not match format '%Y-%m-%d'"
+                    }
+                }
+            ),
             403: openapi.Response(
                 description="Access denied. You do not have permission to view this resource.",
                 examples={
@@ -1295,44 +1665,43 @@ class GraphiquePatientView(APIView, CheckUserRoleMixin):
         if not self.check_user_role(request.user,technician_roles=['laborantin']):
             return Response({'error': 'You do not have permission to see this resource.'}, status=status.HTTP_403_FORBIDDEN)
 
-        examen_actuel = ExamenBiologique.objects.filter(id=pk).first()
+        examen_actuel = ExamenBiologique.objects.filter(id=pk).values('id', 'date', 'dossier_patient_id').first()
 
         if not examen_actuel:
             return Response({"detail": "Examen non trouvé"}, status=status.HTTP_404_NOT_FOUND)
 
-        examen_precedent = ExamenBiologique.objects.filter(
-            dossier_patient_id=examen_actuel.dossier_patient_id,
-            date__lt=examen_actuel.date
-        ).order_by('-date').first()
-
-        resultats_actuel = ResultatExamen.objects.filter(examen_biologique=examen_actuel)
-        resultats_precedent = []
-
-        if examen_precedent:
-            resultats_precedent = ResultatExamen.objects.filter(examen_biologique=examen_precedent)
-
-        # Combine both arrays
-        combined_results = list(resultats_actuel) + list(resultats_precedent)
-
-        # Create labels and ensure no duplicates
-        labels = list(set([f"{result.parametre} ({result.unite})" for result in combined_results]))
+        parametres = [p.strip() for p in request.GET.get('parametres', '').split(',') if p.strip()]
+        try:
+            date_debut = request.GET.get('date_debut')
+            date_fin = request.GET.get('date_fin')
+            date_debut = datetime.strptime(date_debut, '%Y-%m-%d').date() if date_debut else None
+            date_fin = datetime.strptime(date_fin, '%Y-%m-%d').date() if date_fin else examen_actuel['date']
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Tout l'historique du dossier en une requête, pivoté en matrice paramètre x examen
+        trends = TrendMatrix.load(examen_actuel['dossier_patient_id'], parametres, date_debut, date_fin)
+        series = trends.to_series()
+
+        # Examen courant et examen précédent (le plus récent à une date antérieure)
+        current = trends.column_of(examen_actuel['id'])
+        previous = None
+        for column, exam_date in enumerate(trends.dates):
+            if exam_date < examen_actuel['date']:
+                previous = column
 
-        data1 =[self.generate_data_array(result, labels) for result in resultats_actuel]
-        data2 = [self.generate_data_array(result, labels) for result in resultats_precedent]
-        
         data = {
-            "labels": labels,
+            "labels": [serie['label'] for serie in series],
             "datasets": [
                 {
-                    "data": [sum(elements) for elements in zip(*data1)],
-                
+                    "data": [serie['values'][current] for serie in series] if current is not None else [],
                 },
                 {
-                    "data": [sum(elements) for elements in zip(*data2)],
+                    "data": [serie['values'][previous] for serie in series] if previous is not None else [],
                 }
-            ]
+            ],
+            "dates": trends.dates,
+            "series": series,
         }
 
-        
-
         return Response(data, status=status.HTTP_200_OK)
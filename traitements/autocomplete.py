@@ -0,0 +1,155 @@
+import bisect
+import heapq
+import threading
+import time
+
+from django.db.models import Count
+
+from accounts.models import Medicament
+from dpi.search import fold
+
+
+def medication_key(nom):
+    """
+    Forme normalisée d'un nom de médicament : minuscules, sans accents, espaces réduits.
+    """
+    return ' '.join(fold(nom or '').split())
+
+
+class MedicationPrefixIndex:
+    """
+    Index en mémoire (par processus) des noms de médicaments distincts et de
+    leur nombre de prescriptions, pour l'autocomplétion.
+
+    Les noms sont regroupés par forme normalisée (medication_key) ; le libellé
+    affiché est l'orthographe la plus fréquente. Un tableau trié des couples
+    (début de mot du nom, forme normalisée) est parcouru par bisect : 'clav'
+    trouve 'Amoxicilline acide clavulanique'. Le coût d'une recherche dépend du
+    nombre de noms distincts commençant par le préfixe, pas de la table des
+    médicaments.
+
+    L'index est construit à la première recherche (une requête GROUP BY), puis
+    tenu à jour par les signaux de Medicament (voir traitements/signals.py).
+    Le TTL borne la dérive due aux écritures d'un autre worker. À son
+    expiration, la requête qui le constate reconstruit l'index hors du verrou
+    puis remplace l'ancien d'un bloc ; les autres recherches continuent
+    entre-temps sur l'index périmé. Les écritures signalées pendant la
+    reconstruction sont notées et rejouées sur le nouvel index avant
+    l'échange (une écriture validée juste avant la lecture peut alors être
+    comptée deux fois jusqu'à la reconstruction suivante, plutôt que perdue).
+    """
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self._spellings = {}
+        self._entries = []
+        self._expires_at = None
+        # Écritures (nom, nombre) reçues pendant une reconstruction, None hors reconstruction
+        self._pending = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def complete(self, prefix, limit=10):
+        """
+        Les `limit` noms les plus prescrits dont un mot commence par `prefix` :
+        [(libellé, nombre de prescriptions)].
+        """
+        prefix = medication_key(prefix)
+        if not prefix:
+            return []
+        self._ensure_loaded()
+        with self._lock:
+            keys = set()
+            position = bisect.bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and self._entries[position][0].startswith(prefix):
+                keys.add(self._entries[position][1])
+                position += 1
+            best = heapq.nlargest(limit, keys, key=lambda key: (self._total(key), key))
+            return [(self._label(key), self._total(key)) for key in best]
+
+    def add(self, nom, count=1):
+        with self._lock:
+            self._record(nom, count)
+
+    def remove(self, nom, count=1):
+        with self._lock:
+            self._record(nom, -count)
+
+    def clear(self):
+        with self._lock:
+            self._spellings = {}
+            self._entries = []
+            self._expires_at = None
+
+    def _ensure_loaded(self):
+        if self._is_fresh():
+            return
+        # Premier chargement : les autres requêtes l'attendent ; sinon elles servent l'index périmé
+        if not self._refresh_lock.acquire(blocking=self._expires_at is None):
+            return
+        try:
+            if self._is_fresh():
+                return
+            with self._lock:
+                self._pending = []
+            spellings, entries = {}, []
+            for nom, count in Medicament.objects.values('nom').annotate(count=Count('id')).values_list('nom', 'count').order_by():
+                self._update(spellings, entries, nom, count, sort=False)
+            entries.sort()
+            with self._lock:
+                for nom, count in self._pending:
+                    self._update(spellings, entries, nom, count)
+                self._spellings, self._entries = spellings, entries
+                self._expires_at = time.monotonic() + self.ttl
+        finally:
+            with self._lock:
+                self._pending = None
+            self._refresh_lock.release()
+
+    def _is_fresh(self):
+        expires_at = self._expires_at
+        return expires_at is not None and expires_at >= time.monotonic()
+
+    def _record(self, nom, count):
+        if self._pending is not None:
+            self._pending.append((nom, count))
+        if self._expires_at is not None:
+            self._update(self._spellings, self._entries, nom, count)
+
+    @classmethod
+    def _update(cls, spellings_by_key, entries, nom, count, sort=True):
+        key = medication_key(nom)
+        if not key:
+            return
+        spellings = spellings_by_key.get(key)
+        if spellings is None:
+            spellings = spellings_by_key[key] = {}
+            for entry in cls._word_entries(key):
+                if sort:
+                    bisect.insort(entries, entry)
+                else:
+                    entries.append(entry)
+        spellings[nom] = spellings.get(nom, 0) + count
+        if spellings[nom] <= 0:
+            del spellings[nom]
+        if not spellings:
+            del spellings_by_key[key]
+            for entry in cls._word_entries(key):
+                position = bisect.bisect_left(entries, entry)
+                if position < len(entries) and entries[position] == entry:
+                    del entries[position]
+
+    @staticmethod
+    def _word_entries(key):
+        words = key.split(' ')
+        return [(' '.join(words[i:]), key) for i in range(len(words))]
+
+    def _total(self, key):
+        return sum(self._spellings[key].values())
+
+    def _label(self, key):
+        spellings = self._spellings[key]
+        return max(spellings, key=lambda nom: (spellings[nom], nom))
+
+
+medication_index = MedicationPrefixIndex()
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import Medicament
+from .autocomplete import medication_index
+
+
+# Autocomplétion des médicaments : l'index en mémoire suit les écritures validées
+
+@receiver(pre_save, sender=Medicament)
+def autocomplete_medicament_saving(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._autocomplete_previous_nom = Medicament.objects.filter(pk=instance.pk).values_list('nom', flat=True).first()
+
+
+@receiver(post_save, sender=Medicament)
+def autocomplete_medicament_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    nom = instance.nom
+    previous = instance.__dict__.pop('_autocomplete_previous_nom', None)
+    if created:
+        transaction.on_commit(lambda: medication_index.add(nom))
+    elif previous != nom:
+        def rename():
+            if previous is not None:
+                medication_index.remove(previous)
+            medication_index.add(nom)
+        transaction.on_commit(rename)
+
+
+@receiver(post_delete, sender=Medicament)
+def autocomplete_medicament_deleted(sender, instance, **kwargs):
+    nom = instance.nom
+    transaction.on_commit(lambda: medication_index.remove(nom))
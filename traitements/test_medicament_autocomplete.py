@@ -0,0 +1,106 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from accounts.models import Ordonnance, Medicament
+from traitements.autocomplete import MedicationPrefixIndex, medication_index
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    medication_index.clear()
+    yield
+    medication_index.clear()
+
+
+@pytest.fixture
+def api_client(api_client, medecin):
+    api_client.force_authenticate(user=medecin.user)
+    return api_client
+
+
+def prescribe(*noms):
+    ordonnance = Ordonnance.objects.create(date='2024-01-01')
+    return [Medicament.objects.create(nom=nom, dose='1', ordonnance=ordonnance) for nom in noms]
+
+
+@pytest.mark.django_db
+def test_autocomplete_ranks_by_popularity_without_querying(api_client):
+    prescribe('paracétamol', 'Paracetamol', 'Paracetamol', 'Paroxetine', 'Amoxicilline acide clavulanique', 'Ibuprofène')
+    api_client.get('/traitements/medicament/autocomplete/', {'q': 'x'})  # construction de l'index
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get('/traitements/medicament/autocomplete/', {'q': 'PAR'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'] == [{'nom': 'Paracetamol', 'count': 3}, {'nom': 'Paroxetine', 'count': 1}]
+    assert not [q for q in queries.captured_queries if 'accounts_medicament' in q['sql']]
+
+    results = api_client.get('/traitements/medicament/autocomplete/', {'q': 'clav'}).data['results']
+    assert results == [{'nom': 'Amoxicilline acide clavulanique', 'count': 1}]
+    assert api_client.get('/traitements/medicament/autocomplete/', {'q': 'par', 'limit': 1}).data['results'] == [{'nom': 'Paracetamol', 'count': 3}]
+    assert api_client.get('/traitements/medicament/autocomplete/', {'q': 'par', 'limit': 'x'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_index_follows_committed_writes(django_capture_on_commit_callbacks):
+    doliprane, = prescribe('Doliprane')
+    assert medication_index.complete('dol') == [('Doliprane', 1)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        prescribe('Doliprane', 'Dafalgan')
+    assert medication_index.complete('d') == [('Doliprane', 2), ('Dafalgan', 1)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        doliprane.nom = 'Efferalgan'
+        doliprane.save()
+    assert medication_index.complete('d') == [('Doliprane', 1), ('Dafalgan', 1)]
+    assert medication_index.complete('eff') == [('Efferalgan', 1)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Medicament.objects.filter(nom='Dafalgan').delete()
+    assert medication_index.complete('d') == [('Doliprane', 1)]
+
+
+def test_prefix_index_without_database():
+    index = MedicationPrefixIndex()
+    index._expires_at = float('inf')
+    index.add('Amoxicilline', 2)
+    index.add('Amoxicilline acide clavulanique')
+    index.remove('Amoxicilline', 2)
+    assert index.complete('amox') == [('Amoxicilline acide clavulanique', 1)]
+    assert index._entries == [('acide clavulanique', 'amoxicilline acide clavulanique'), ('amoxicilline acide clavulanique', 'amoxicilline acide clavulanique'), ('clavulanique', 'amoxicilline acide clavulanique')]
+
+
+@pytest.mark.django_db
+def test_expired_index_is_served_while_another_request_rebuilds():
+    prescribe('Doliprane')
+    assert medication_index.complete('dol') == [('Doliprane', 1)]
+    prescribe('Doliprane')
+    medication_index._expires_at = 0
+
+    # Reconstruction en cours ailleurs : l'index périmé répond sans requête
+    with medication_index._refresh_lock, CaptureQueriesContext(connection) as queries:
+        assert medication_index.complete('dol') == [('Doliprane', 1)]
+    assert not queries.captured_queries
+
+    assert medication_index.complete('dol') == [('Doliprane', 2)]
+
+
+@pytest.mark.django_db
+def test_writes_during_a_rebuild_survive_the_swap():
+    prescribe('Doliprane')
+    assert medication_index.complete('dol') == [('Doliprane', 1)]
+    medication_index._expires_at = 0
+
+    # Écriture d'un autre worker signalée après la lecture de la reconstruction
+    def write_during_rebuild(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if 'accounts_medicament' in sql:
+            medication_index.add('Dafalgan')
+        return result
+
+    with connection.execute_wrapper(write_during_rebuild):
+        medication_index.complete('d')
+
+    assert medication_index.complete('d') == [('Doliprane', 1), ('Dafalgan', 1)]
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import  SoinInfermierCreateView , MedicamentCreateView , SupprimerMedicamentAPIView , SupprimerSoinAPIView
 from .views import ModifierSoinInfermierAPIView , ModifierMedicamentAPIView , RechercheMedicamentAPIView , RechercheSoinInfermierAPIView
+from .views import AutocompleteMedicamentAPIView
 urlpatterns = [
     
     path('soin-infermier/create/', SoinInfermierCreateView.as_view(), name='create-soin-infermier'),
@@ -10,5 +11,6 @@ urlpatterns = [
     path('soin-infirmier/<int:soin_id>/modify/', ModifierSoinInfermierAPIView.as_view(), name='modify_soin_infirmier'),
     path('medicament/<int:medicament_id>/modify/', ModifierMedicamentAPIView.as_view(), name='modify-medicament'),
     path('medicament/search/',RechercheMedicamentAPIView.as_view() , name='search-medicament'),
+    path('medicament/autocomplete/', AutocompleteMedicamentAPIView.as_view(), name='autocomplete-medicament'),
     path('soin-infirmier/search/', RechercheSoinInfermierAPIView.as_view(), name='search-soin-infermier'),
 ]
@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from accounts.models import Ordonnance , DossierPatient, Technician , Medicament, SoinInfermier
 from .serializers import  SoinInfermierSerializer, MedicamentSerializer
+from .autocomplete import medication_index
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from accounts.mixin import CheckUserRoleMixin
@@ -688,3 +689,68 @@ class RechercheSoinInfermierAPIView(APIView,CheckUserRoleMixin):
             })
 
         return Response(resultats)
+
+
+###########################################################################################################################################
+
+
+class AutocompleteMedicamentAPIView(APIView,CheckUserRoleMixin):
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    @swagger_auto_schema(
+        operation_summary="Autocomplete medication names",
+        operation_description=(
+            "Suggests distinct medication names for prescription forms, most prescribed first. A name matches when "
+            "one of its words starts with 'q' (case and accent insensitive): 'clav' suggests 'Amoxicilline acide "
+            "clavulanique'. Suggestions come from an in-memory prefix index kept up to date on every medication "
+            "write, so the latency does not depend on the size of the medications table."
+        ),
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Beginning of the medication name.", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Number of suggestions (default 10, max 50).", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Suggestions, most prescribed first.",
+                examples={
+                    "application/json": {
+                        "results": [
+                            {"nom": "Paracetamol", "count": 152},
+                            {"nom": "Paracetamol codeine", "count": 12}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Invalid limit.",
+                examples={
+                    "application/json": {
+                        "error": "Invalid limit."
+                    }
+                }
+            ),
+            403: openapi.Response(
+                description="Access denied. You do not have permission to search for this resource.",
+                examples={
+                    "application/json": {
+                        "error": "You do not have permission to search for this resource."
+                    }
+                }
+            )
+        }
+    )
+
+    def get(self, request):
+        if not self.check_user_role(request.user, ['patient'],['infermier','medecin']):
+            return Response({'error': 'You do not have permission to search for this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            limit = min(int(request.GET.get('limit', 10)), self.max_limit)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'Invalid limit.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        suggestions = medication_index.complete(request.GET.get('q', ''), limit)
+        return Response({'results': [{'nom': nom, 'count': count} for nom, count in suggestions]}, status=status.HTTP_200_OK)